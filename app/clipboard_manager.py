@@ -1,33 +1,119 @@
+import hashlib
+import os
+import time
+
 from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QGuiApplication
 
+from app import instrumentation
+from app.clipboard_store import ClipboardStore
+
+MAX_HISTORY = 50  # Most recent entries returned by get_clipboard_history
+CLIPBOARD_IMAGE_DIR = "clipboard_images"
+
+
+def content_digest(data):
+    """Short, collision-resistant digest used to tell clipboard contents apart."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ClipboardEntry:
+    """One captured clipboard item.
+
+    ``kind`` is "text", "urls", "files" or "image". ``text`` is what gets shown and searched:
+    the text itself, one URL or path per line, or the image's path on disk. Images are written
+    once to CLIPBOARD_IMAGE_DIR under their digest and only referenced from the entry.
+    """
+
+    def __init__(self, kind, text, digest, timestamp=None, image=None):
+        self.kind = kind
+        self.text = text
+        self.digest = digest
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.image = image  # Pending QImage, dropped once it has been written to disk
+
 
 class ClipboardManager:
-    def __init__(self):
+    def __init__(self, store=None, image_dir=CLIPBOARD_IMAGE_DIR):
         self.clipboard = QGuiApplication.clipboard()
-        self.clipboard_history = []  # Store history of copied texts
-        self.previous_text = ""
+        self.store = store if store is not None else ClipboardStore()
+        self.image_dir = image_dir
+        self.previous_digest = None
         self.start_monitoring()
 
     def start_monitoring(self):
-        """Start a timer to check clipboard every 3 seconds."""
-        self.clipboard_timer = QTimer()
-        self.clipboard_timer.timeout.connect(self.check_clipboard)
-        self.clipboard_timer.start(3000)  # Check every 3 seconds
+        """Capture the clipboard whenever it reports a change instead of polling it.
+
+        Some platforms emit dataChanged several times for one copy (e.g. once per offered
+        format), so notifications are coalesced with a zero-delay single-shot timer that only
+        exists while a change is pending; when idle nothing wakes up.
+        """
+        self.change_timer = QTimer()
+        self.change_timer.setSingleShot(True)
+        self.change_timer.setInterval(0)
+        self.change_timer.timeout.connect(self.check_clipboard)
+        self.clipboard.dataChanged.connect(self.change_timer.start)
+
+    def stop_monitoring(self):
+        self.clipboard.dataChanged.disconnect(self.change_timer.start)
+        self.change_timer.stop()
 
     def check_clipboard(self):
-        """Check if clipboard content has changed and update history if needed."""
-        current_text = self.clipboard.text()
+        """Read the clipboard once and record it in the store if its content hash changed."""
+        with instrumentation.timed("clipboard.capture"):
+            entry = self.read_clipboard()
+            # Ensure non-empty content different from the last entry
+            if entry is None or entry.digest == self.previous_digest:
+                instrumentation.count("clipboard.skipped")
+                return
+            self.previous_digest = entry.digest
+            if entry.kind == "image" and not self.save_image(entry):
+                return
+            self.store.add(entry)
+            instrumentation.count(f"clipboard.captured.{entry.kind}")
+
+    def read_clipboard(self):
+        """Return a ClipboardEntry for the current clipboard contents, or None if it is empty."""
+        mime_data = self.clipboard.mimeData()
+        if mime_data is None:
+            return None
+        if mime_data.hasUrls():
+            urls = mime_data.urls()
+            if urls and all(url.isLocalFile() for url in urls):
+                kind, lines = "files", [url.toLocalFile() for url in urls]
+            else:
+                kind, lines = "urls", [url.toString() for url in urls]
+            text = "\n".join(lines)
+            if text:
+                return ClipboardEntry(kind, text, content_digest(f"{kind}\n{text}".encode("utf-8")))
+        if mime_data.hasImage():
+            image = self.clipboard.image()
+            if not image.isNull():
+                return ClipboardEntry("image", "", self.image_digest(image), image=image)
+        if mime_data.hasText():
+            text = mime_data.text()
+            if text:
+                return ClipboardEntry("text", text, content_digest(text.encode("utf-8", "surrogatepass")))
+        return None
 
-        # Ensure non-empty, unique text and different from last entry
-        if current_text and current_text != self.previous_text:
-            self.clipboard_history.append(current_text)
-            self.previous_text = current_text
+    @staticmethod
+    def image_digest(image):
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        header = f"image\n{image.width()}x{image.height()}:{image.format()}\n".encode("ascii")
+        return content_digest(header + bytes(bits))
 
-            # Limit history size to avoid excessive memory use
-            if len(self.clipboard_history) > 50:
-                self.clipboard_history.pop(0)
+    def save_image(self, entry):
+        """Write the image to disk once per digest and keep only its path on the entry."""
+        path = os.path.join(self.image_dir, f"{entry.digest}.png")
+        if not os.path.exists(path):
+            os.makedirs(self.image_dir, exist_ok=True)
+            if not entry.image.save(path, "PNG"):
+                return False
+        entry.text = os.path.abspath(path)
+        entry.image = None
+        return True
 
-    def get_clipboard_history(self):
-        """Return the list of clipboard history."""
-        return self.clipboard_history
+    def get_clipboard_history(self, limit=MAX_HISTORY):
+        """Return the most recent clipboard entries as display strings, oldest first."""
+        return [text for _, _, text, _, _, _ in reversed(self.store.recent(limit))]
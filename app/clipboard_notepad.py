@@ -1,21 +1,177 @@
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QTextEdit
+import time
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QListView, QPlainTextEdit, QLabel, QPushButton, QSplitter,
+    QApplication
+)
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer
+from PyQt5.QtGui import QPixmap
+
+FILTER_DEBOUNCE_MS = 150
+PAGE_SIZE = 200  # Rows fetched from the store per fetchMore
+PREVIEW_LENGTH = 200  # Characters of an entry shown in the list
+DETAIL_DISPLAY_LIMIT = 1_000_000  # Characters of a selected entry put in the detail pane
+KIND_LABELS = {"urls": "[URL] ", "files": "[Files] ", "image": "[Image] "}
+
+
+def entry_preview(kind, text):
+    """One-line, truncated label for an entry in the history list."""
+    preview = " ".join(text[:PREVIEW_LENGTH].split())
+    if len(text) > PREVIEW_LENGTH:
+        preview += "…"
+    return KIND_LABELS.get(kind, "") + preview
+
+
+class ClipboardHistoryModel(QAbstractListModel):
+    """List model over a ClipboardStore that fetches previews from SQLite a page at a time.
+
+    Only truncated previews of the fetched rows are kept; full contents are read from the store
+    when an entry is selected. With a filter set, pages come from the store's search instead.
+    """
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.filter_text = ""
+        self.rows = []  # (entry id, kind, preview, original size, last copied, copy count)
+        self.exhausted = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry_id, kind, preview, size, last_copied, copy_count = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return preview
+        if role == Qt.ToolTipRole:
+            copied = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_copied))
+            return f"Last copied {copied} · copied {copy_count}× · {size:,} bytes"
+        if role == Qt.UserRole:
+            return entry_id
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        offset = len(self.rows)
+        if self.filter_text:
+            page = self.store.search(self.filter_text, PAGE_SIZE, offset, preview_chars=PREVIEW_LENGTH + 1)
+        else:
+            page = self.store.recent(PAGE_SIZE, offset, preview_chars=PREVIEW_LENGTH + 1)
+        self.exhausted = len(page) < PAGE_SIZE
+        if page:
+            self.beginInsertRows(QModelIndex(), offset, offset + len(page) - 1)
+            self.rows.extend((entry_id, kind, entry_preview(kind, text), size, last_copied, copy_count)
+                             for entry_id, kind, text, size, last_copied, copy_count in page)
+            self.endInsertRows()
+
+    def set_filter(self, filter_text):
+        """Restart from the first page, matching only entries that contain ``filter_text``."""
+        self.beginResetModel()
+        self.filter_text = filter_text
+        self.rows = []
+        self.exhausted = False
+        self.endResetModel()
 
 
 class ClipboardNotepad(QDialog):
-    def __init__(self, clipboard_history, parent=None):
+    def __init__(self, store, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Clipboard History")
-        self.resize(400, 300)
+        self.resize(600, 400)
+        self.store = store
+        self.selected_id = None
 
         layout = QVBoxLayout()
-        self.text_edit = QTextEdit()
-        self.text_edit.setReadOnly(True)
-        layout.addWidget(self.text_edit)
+        self.filter_input = QLineEdit(self)
+        self.filter_input.setPlaceholderText("Filter clipboard history")
+        self.filter_input.setClearButtonEnabled(True)
+        layout.addWidget(self.filter_input)
+
+        self.history_model = ClipboardHistoryModel(store, self)
+        self.history_view = QListView(self)
+        self.history_view.setUniformItemSizes(True)  # Lets the view lay out only visible rows
+        self.history_view.setModel(self.history_model)
+        self.history_view.selectionModel().currentChanged.connect(self.show_entry)
+
+        detail = QSplitter(Qt.Vertical, self)
+        detail.addWidget(self.history_view)
+        self.detail_text = QPlainTextEdit(self)
+        self.detail_text.setReadOnly(True)
+        detail.addWidget(self.detail_text)
+        self.image_label = QLabel(self)
+        self.image_label.setAlignment(Qt.AlignCenter)
+        self.image_label.hide()
+        detail.addWidget(self.image_label)
+        layout.addWidget(detail)
+
+        button_layout = QHBoxLayout()
+        self.status_label = QLabel(self)
+        copy_button = QPushButton("Copy")
+        copy_button.clicked.connect(self.copy_selected)
+        button_layout.addWidget(self.status_label, 1)
+        button_layout.addWidget(copy_button)
+        layout.addLayout(button_layout)
         self.setLayout(layout)
 
-        # Load clipboard history
-        self.load_history(clipboard_history)
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(FILTER_DEBOUNCE_MS)
+        self.debounce_timer.timeout.connect(self.apply_filter)
+        self.filter_input.textChanged.connect(self.debounce_timer.start)
+
+        self.update_status()
+
+    def apply_filter(self):
+        self.debounce_timer.stop()
+        self.history_model.set_filter(self.filter_input.text().strip())
+        self.clear_detail()
+        self.update_status()
+
+    def update_status(self):
+        if self.history_model.filter_text:
+            self.status_label.setText("Filtered history")
+        else:
+            self.status_label.setText(f"{self.store.entry_count} entries")
+
+    def clear_detail(self):
+        self.selected_id = None
+        self.detail_text.clear()
+        self.image_label.clear()
+        self.image_label.hide()
+
+    def show_entry(self, current, previous=None):
+        """Load the selected entry's full content, which the list model never holds."""
+        self.clear_detail()
+        if not current.isValid():
+            return
+        self.selected_id = current.data(Qt.UserRole)
+        kind = self.history_model.rows[current.row()][1]
+        text = self.store.full_text(self.selected_id)
+        if text is None:
+            return
+        if kind == "image":
+            pixmap = QPixmap(text)
+            if not pixmap.isNull():
+                self.image_label.setPixmap(pixmap.scaled(self.image_label.width(), self.image_label.height() or 200,
+                                                         Qt.KeepAspectRatio, Qt.SmoothTransformation))
+                self.image_label.show()
+        elif len(text) > DETAIL_DISPLAY_LIMIT:
+            text = text[:DETAIL_DISPLAY_LIMIT] + f"\n\n… {len(text) - DETAIL_DISPLAY_LIMIT:,} more characters (use Copy)"
+        self.detail_text.setPlainText(text)
 
-    def load_history(self, clipboard_history):
-        """Load clipboard history into the text area."""
-        self.text_edit.setPlainText("\n".join(clipboard_history))
+    def copy_selected(self):
+        """Put the selected entry's full content back on the clipboard."""
+        if self.selected_id is None:
+            return
+        kind = self.history_model.rows[self.history_view.currentIndex().row()][1]
+        text = self.store.full_text(self.selected_id)
+        if text is None:
+            return
+        if kind == "image":
+            QApplication.clipboard().setPixmap(QPixmap(text))
+        else:
+            QApplication.clipboard().setText(text)
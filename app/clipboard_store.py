@@ -0,0 +1,254 @@
+import os
+import sqlite3
+import time
+import zlib
+
+CLIPBOARD_DB = "clipboard_history.db"
+CLIPBOARD_BLOB_DIR = "clipboard_blobs"
+SCHEMA_VERSION = 1
+MAX_ENTRIES = 20000
+MAX_BYTES = 256 * 2**20  # Inline text plus blob files on disk
+SPILL_THRESHOLD = 64 * 2**10  # Texts larger than this (UTF-8 bytes) are compressed to a blob file
+PREVIEW_CHARS = 16 * 2**10  # Leading characters of a spilled text kept inline for display and search
+EVICT_BATCH = 256
+TRIGRAM_MIN_SQLITE = (3, 34, 0)  # First SQLite release with FTS5's trigram tokenizer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    text TEXT NOT NULL,
+    blob_path TEXT,
+    size INTEGER NOT NULL,
+    original_size INTEGER NOT NULL,
+    first_copied REAL NOT NULL,
+    last_copied REAL NOT NULL,
+    copy_count INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS entries_last_copied ON entries (last_copied);
+"""
+
+# Only created where the SQLite library supports it; without it every search scans the inline text
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    text, content='entries', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def entry_columns(preview_chars=None):
+    text = "text" if preview_chars is None else f"substr(text, 1, {int(preview_chars)})"
+    return f"id, kind, {text}, original_size, last_copied, copy_count"
+
+
+class ClipboardStore:
+    """SQLite-backed clipboard history, deduplicated by content digest.
+
+    Copying something already in the history only bumps its timestamp and count. The history is
+    a ring buffer bounded by both ``max_entries`` and ``max_bytes``; the least recently copied
+    entries are evicted first. Texts above SPILL_THRESHOLD are zlib-compressed into
+    ``blob_dir`` and only their first PREVIEW_CHARS characters stay in the database, so large
+    pastes are never held in memory. Images are files owned by the store once recorded.
+    A trigram FTS5 index over the inline text answers substring searches where SQLite has
+    one (3.34 and later, built with FTS5); otherwise searches scan the inline text.
+    Like IndexStore, a store must stay on the thread that opened it.
+    """
+
+    def __init__(self, db_path=CLIPBOARD_DB, blob_dir=CLIPBOARD_BLOB_DIR, max_entries=MAX_ENTRIES,
+                 max_bytes=MAX_BYTES):
+        self.db_path = db_path
+        self.blob_dir = blob_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(db_path)
+        # SQLite's lower() only folds ASCII, so case-insensitive scans fold in Python instead
+        self.conn.create_function("casefold", 1, str.casefold, deterministic=True)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        schema_version = self._get_meta("schema_version")
+        if schema_version != str(SCHEMA_VERSION):
+            if schema_version is not None:
+                self._drop_tables()
+            self.conn.executescript(SCHEMA)
+            self._set_meta("schema_version", SCHEMA_VERSION)
+            self.conn.commit()
+        self.has_fts = self._create_fts()
+        self.entry_count, self.total_bytes = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _get_meta(self, key):
+        try:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        except sqlite3.OperationalError:  # Fresh database without tables yet
+            return None
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _create_fts(self):
+        """Create the trigram index if this SQLite supports it, filling it from the entries
+        when it is new; False if searches have to scan instead."""
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'entries_fts'").fetchone():
+            return True
+        if sqlite3.sqlite_version_info < TRIGRAM_MIN_SQLITE:
+            return False
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError:  # Built without FTS5
+            return False
+        self.conn.execute("INSERT INTO entries_fts (entries_fts) VALUES ('rebuild')")
+        self.conn.commit()
+        return True
+
+    def _drop_tables(self):
+        for name in ("entries_ai", "entries_ad"):
+            self.conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for table in ("entries_fts", "entries", "meta"):
+            self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+    # ---- writing --------------------------------------------------------------------------
+
+    def add(self, entry):
+        """Record a ClipboardEntry and return its id, or None if it alone exceeds the byte budget."""
+        now = entry.timestamp or time.time()
+        row = self.conn.execute("SELECT id FROM entries WHERE digest = ?", (entry.digest,)).fetchone()
+        if row:
+            self.conn.execute("UPDATE entries SET last_copied = ?, copy_count = copy_count + 1 WHERE id = ?",
+                              (now, row[0]))
+            self.conn.commit()
+            return row[0]
+
+        text, blob_path, size, original_size = self._stored_form(entry)
+        if size > self.max_bytes:
+            self._remove_blob(blob_path)
+            return None
+        entry_id = self.conn.execute(
+            "INSERT INTO entries (digest, kind, text, blob_path, size, original_size, first_copied, last_copied)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (entry.digest, entry.kind, text, blob_path, size, original_size, now, now)).lastrowid
+        self.entry_count += 1
+        self.total_bytes += size
+        self._evict()
+        self.conn.commit()
+        return entry_id
+
+    def _stored_form(self, entry):
+        """Return (inline text, blob path, bytes used, original size in bytes) for an entry."""
+        if entry.kind == "image":
+            # entry.text is the PNG the clipboard manager wrote; the store now owns that file
+            size = os.path.getsize(entry.text) if os.path.exists(entry.text) else 0
+            return entry.text, entry.text, size, size
+        encoded = entry.text.encode("utf-8", "surrogatepass")
+        if len(encoded) <= SPILL_THRESHOLD:
+            return entry.text, None, len(encoded), len(encoded)
+        os.makedirs(self.blob_dir, exist_ok=True)
+        blob_path = os.path.abspath(os.path.join(self.blob_dir, f"{entry.digest}.z"))
+        temp_path = blob_path + ".tmp"
+        with open(temp_path, "wb") as blob_file:
+            blob_file.write(zlib.compress(encoded, 6))
+        os.replace(temp_path, blob_path)
+        preview = entry.text[:PREVIEW_CHARS]
+        size = os.path.getsize(blob_path) + len(preview.encode("utf-8", "surrogatepass"))
+        return preview, blob_path, size, len(encoded)
+
+    def _evict(self):
+        """Drop the least recently copied entries until both budgets hold."""
+        while self.entry_count > self.max_entries or self.total_bytes > self.max_bytes:
+            rows = self.conn.execute("SELECT id, blob_path, size FROM entries ORDER BY last_copied LIMIT ?",
+                                     (EVICT_BATCH,)).fetchall()
+            if not rows:
+                break
+            evicted = []
+            for entry_id, blob_path, size in rows:
+                if self.entry_count <= self.max_entries and self.total_bytes <= self.max_bytes:
+                    break
+                evicted.append((entry_id,))
+                self._remove_blob(blob_path)
+                self.entry_count -= 1
+                self.total_bytes -= size
+            self.conn.executemany("DELETE FROM entries WHERE id = ?", evicted)
+
+    @staticmethod
+    def _remove_blob(blob_path):
+        if blob_path:
+            try:
+                os.remove(blob_path)
+            except OSError:
+                pass
+
+    def remove(self, entry_id):
+        row = self.conn.execute("SELECT blob_path, size FROM entries WHERE id = ?", (entry_id,)).fetchone()
+        if row:
+            self._remove_blob(row[0])
+            self.conn.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+            self.conn.commit()
+            self.entry_count -= 1
+            self.total_bytes -= row[1]
+
+    def clear(self):
+        for (blob_path,) in self.conn.execute("SELECT blob_path FROM entries WHERE blob_path IS NOT NULL"):
+            self._remove_blob(blob_path)
+        self.conn.execute("DELETE FROM entries")
+        self.conn.commit()
+        self.entry_count = self.total_bytes = 0
+
+    # ---- reading --------------------------------------------------------------------------
+
+    def recent(self, limit, offset=0, preview_chars=None):
+        """Rows of (id, kind, text, original_size, last_copied, copy_count), newest first.
+
+        ``text`` is the inline text: the full text, a spilled text's leading characters, or an
+        image's file path. ``preview_chars`` truncates it in SQL for list views.
+        """
+        return self.conn.execute(
+            f"SELECT {entry_columns(preview_chars)} FROM entries ORDER BY last_copied DESC LIMIT ? OFFSET ?",
+            (limit, offset)).fetchall()
+
+    def search(self, term, limit=-1, offset=0, preview_chars=None):
+        """Entries whose inline text contains ``term`` (case-insensitive), newest first.
+
+        Terms of three or more characters go through the trigram index; shorter ones, and all
+        of them without the index, scan the inline text, which the byte budget keeps small.
+        """
+        columns = entry_columns(preview_chars)
+        if self.has_fts and len(term) >= 3:
+            phrase = '"' + term.replace('"', '""') + '"'
+            return self.conn.execute(
+                f"SELECT {columns} FROM entries WHERE id IN"
+                " (SELECT rowid FROM entries_fts WHERE entries_fts MATCH ?)"
+                " ORDER BY last_copied DESC LIMIT ? OFFSET ?", (phrase, limit, offset)).fetchall()
+        return self.conn.execute(
+            f"SELECT {columns} FROM entries WHERE instr(casefold(text), ?)"
+            " ORDER BY last_copied DESC LIMIT ? OFFSET ?", (term.casefold(), limit, offset)).fetchall()
+
+    def full_text(self, entry_id):
+        """The complete text of an entry, decompressing it from its blob file if it was spilled."""
+        row = self.conn.execute("SELECT kind, text, blob_path FROM entries WHERE id = ?", (entry_id,)).fetchone()
+        if row is None:
+            return None
+        kind, text, blob_path = row
+        if blob_path is None or kind == "image":
+            return text
+        try:
+            with open(blob_path, "rb") as blob_file:
+                return zlib.decompress(blob_file.read()).decode("utf-8", "surrogatepass")
+        except (OSError, zlib.error):
+            return text
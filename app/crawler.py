@@ -0,0 +1,180 @@
+import os
+import queue
+import threading
+from collections import deque
+
+
+def default_worker_count():
+    """Directory listing is I/O bound, so use more threads than cores."""
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def directory_signature(path):
+    """Return the (mtime, inode) signature of a directory, or None if it cannot be read."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_ino
+
+
+def scan_directory(dirpath, rules=None):
+    """List a single directory, returning ([(name, size, mtime), ...], [(subdir, signature), ...]).
+
+    The DirEntry objects already carry the file type, and their stat data is cached on the
+    entry (and comes with the listing itself on Windows), so each entry is stat'ed at most once.
+    Entries excluded by ``rules`` (an IndexRules) are dropped before they are stat'ed, so
+    pruned subtrees are never listed.
+    """
+    files, subdirs = [], []
+    relpath = rules.relative(dirpath) if rules is not None else None
+    prefix = relpath + "/" if relpath else ""
+    try:
+        with os.scandir(dirpath) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if relpath is not None:
+                    child = prefix + entry.name
+                    if rules.prune_dir(child, entry.name) if is_dir else rules.skip_file(child):
+                        continue
+                if not is_dir:
+                    try:
+                        stat = entry.stat()
+                        files.append((entry.name, stat.st_size, int(stat.st_mtime)))
+                    except OSError:  # Broken symlink or the file vanished meanwhile
+                        files.append((entry.name, 0, 0))
+                elif not entry.is_symlink():
+                    # Mirror os.walk(followlinks=False): never descend into symlinked dirs
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                        subdirs.append((entry.name, (stat.st_mtime_ns, stat.st_ino)))
+                    except OSError:
+                        subdirs.append((entry.name, None))
+    except OSError:
+        pass
+    return files, subdirs
+
+
+class ParallelCrawler:
+    """Walk directory trees on a bounded pool of threads with work stealing.
+
+    Every worker owns a deque: it pushes the subdirectories it discovers and pops them back
+    depth-first from the same end, while idle workers steal the oldest (shallowest, so
+    usually largest) pending directory from the other end of a busy worker's deque.
+    """
+
+    def __init__(self, workers=None, rules=None):
+        self.workers = max(1, workers or default_worker_count())
+        self.rules = rules
+
+    def walk(self, root_directories, previous_dirs=None):
+        """Crawl the roots and yield (dirpath, signature, files, subdirs) per directory.
+
+        ``files`` holds (name, size, mtime) tuples. ``previous_dirs`` maps dirpath ->
+        (signature, subdirs) from an earlier run; directories whose signature is unchanged are
+        not listed again and are yielded with files None.
+        Results are produced while the workers are still crawling. Closing the generator early
+        stops the workers once they finish the directory they are listing.
+        """
+        self._previous = previous_dirs or {}
+        self._queues = [deque() for _ in range(self.workers)]
+        self._output = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._work_available = threading.Condition(self._lock)
+        self._pending = 0
+        self._done = False
+        self._stopped = False
+
+        roots = list(dict.fromkeys(str(root_dir) for root_dir in root_directories))
+        if not roots:
+            return
+        for i, root in enumerate(roots):
+            self._queues[i % self.workers].append((root, None))
+        self._pending = len(roots)
+
+        threads = [threading.Thread(target=self._work, args=(i,), daemon=True) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        finished = 0
+        try:
+            while finished < self.workers:
+                result = self._output.get()
+                if result is None:
+                    finished += 1
+                else:
+                    yield result
+        finally:
+            if finished < self.workers:
+                with self._work_available:
+                    self._stopped = True
+                    self._work_available.notify_all()
+        for thread in threads:
+            thread.join()
+
+    def crawl(self, root_directories, previous_dirs=None):
+        """Crawl everything into a dict of dirpath -> (signature, files, subdirs).
+
+        Returns the dict together with the number of directories that were listed again.
+        """
+        dirs = {}
+        rescanned = 0
+        for dirpath, signature, files, subdirs in self.walk(root_directories, previous_dirs):
+            dirs[dirpath] = (signature, files, subdirs)
+            rescanned += files is not None
+        return dirs, rescanned
+
+    def _next_task(self, worker_id):
+        try:
+            return self._queues[worker_id].pop()
+        except IndexError:
+            pass
+        for offset in range(1, self.workers):
+            try:
+                return self._queues[(worker_id + offset) % self.workers].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def _work(self, worker_id):
+        own_queue = self._queues[worker_id]
+        while True:
+            task = None if self._stopped else self._next_task(worker_id)
+            if task is None:
+                with self._work_available:
+                    if self._done or self._stopped:
+                        self._output.put(None)
+                        return
+                    self._work_available.wait(0.01)
+                continue
+
+            dirpath, signature = task
+            children = self._visit(dirpath, signature)
+            with self._work_available:
+                # Count the children before they become stealable so pending never hits zero early
+                self._pending += len(children) - 1
+                own_queue.extend(children)
+                if self._pending == 0:
+                    self._done = True
+                    self._work_available.notify_all()
+                elif children:
+                    self._work_available.notify(len(children))
+
+    def _visit(self, dirpath, signature):
+        if signature is None:
+            signature = directory_signature(dirpath)
+            if signature is None:
+                return []
+        cached = self._previous.get(dirpath)
+        if cached is not None and cached[0] == signature:
+            files, subdirs = None, cached[1]
+            # Cached child signatures may be stale, so the children are stat'ed again
+            children = [(os.path.join(dirpath, name), None) for name, _ in reversed(subdirs)]
+        else:
+            files, subdirs = scan_directory(dirpath, self.rules)
+            children = [(os.path.join(dirpath, name), child_signature)
+                        for name, child_signature in reversed(subdirs)]
+        self._output.put((dirpath, signature, files, subdirs))
+        return children
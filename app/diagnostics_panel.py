@@ -0,0 +1,171 @@
+import time
+
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView, QPushButton, QLabel
+)
+from PyQt5.QtCore import Qt, QTimer
+
+from app import instrumentation
+from app.index_protocol import IndexClient, IndexServiceError, daemon_supported
+
+REFRESH_MS = 1000  # Snapshot refresh interval while the panel is visible
+DAEMON_TIMEOUT = 0.25  # Seconds the GUI thread waits for the index daemon's snapshot
+DAEMON_PREFIX = "daemon: "  # Marks the index daemon's metrics in the table
+COLUMNS = ["Metric", "Count", "Mean", "p50", "p90", "p99", "Max", "Total"]
+
+
+def format_value(value, unit):
+    if unit == "ms":
+        return f"{value / 1000:.2f} s" if value >= 10000 else f"{value:.1f} ms"
+    return f"{value:,.0f}" if value >= 100 or value == int(value) else f"{value:.2f}"
+
+
+def format_time(timestamp):
+    return time.strftime("%H:%M:%S", time.localtime(timestamp))
+
+
+def snapshot_rows(snapshot, prefix=""):
+    """Table rows (name, cells) for the counters and histograms of an instrumentation snapshot."""
+    rows = [(prefix + name, [f"{value:,}"] + [""] * 6) for name, value in snapshot["counters"].items()]
+    for name, histogram in snapshot["histograms"].items():
+        unit = histogram["unit"]
+        rows.append((prefix + name, [f"{histogram['count']:,}"] + [
+            format_value(histogram[key], unit) for key in ("mean", "p50", "p90", "p99", "max", "total")]))
+    return rows
+
+
+class DiagnosticsPanel(QWidget):
+    """Live view of app.instrumentation: timings, counters and histograms of the hot paths.
+
+    The snapshot is refreshed every REFRESH_MS while the panel is on screen and not at all
+    otherwise, together with the index daemon's, which holds the crawl, index and search
+    timings when the daemon serves them. The buttons export the snapshot to DIAGNOSTICS_DIR and capture a cProfile of
+    the GUI thread or a tracemalloc snapshot on demand.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.table = QTableWidget(0, len(COLUMNS), self)
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.summary_label = QLabel(self)
+        self.status_label = QLabel(self)
+        self.status_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+
+        refresh_button = QPushButton("Refresh")
+        refresh_button.clicked.connect(self.refresh)
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        export_button = QPushButton("Export...")
+        export_button.clicked.connect(self.export)
+        self.profile_button = QPushButton(self)
+        self.profile_button.clicked.connect(self.toggle_cpu_profile)
+        self.memory_button = QPushButton(self)
+        self.memory_button.clicked.connect(self.toggle_memory_trace)
+
+        button_layout = QHBoxLayout()
+        for button in (refresh_button, reset_button, export_button, self.profile_button, self.memory_button):
+            button_layout.addWidget(button)
+        button_layout.addStretch()
+
+        layout = QVBoxLayout()
+        layout.addLayout(button_layout)
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.table)
+        layout.addWidget(self.status_label)
+        self.setLayout(layout)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.daemon_client = None
+        self.update_buttons()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        self.close_daemon_client()
+        super().hideEvent(event)
+
+    # ---- snapshot ---------------------------------------------------------------------------
+
+    def refresh(self):
+        snapshot = instrumentation.snapshot()
+        rows = snapshot_rows(snapshot)
+        daemon_snapshot = self.daemon_snapshot()
+        if daemon_snapshot is not None:
+            rows.extend(snapshot_rows(daemon_snapshot, DAEMON_PREFIX))
+        rows.sort()
+        self.table.setRowCount(len(rows))
+        for row, (name, cells) in enumerate(rows):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            for column, text in enumerate(cells, start=1):
+                item = QTableWidgetItem(text)
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        summary = f"{len(rows)} metrics recorded since {format_time(snapshot['since'])}"
+        if daemon_snapshot is not None:
+            summary += f", by the index daemon since {format_time(daemon_snapshot['since'])}"
+        self.summary_label.setText(summary)
+
+    def daemon_snapshot(self):
+        """The index daemon's snapshot, or None when there is no daemon or it does not answer in time.
+
+        The connection stays open while the panel is shown; a running daemon never needs to be
+        started for it.
+        """
+        if not daemon_supported():
+            return None
+        if self.daemon_client is None:
+            self.daemon_client = IndexClient(timeout=DAEMON_TIMEOUT)
+        try:
+            return self.daemon_client.metrics()
+        except (OSError, IndexServiceError):
+            self.close_daemon_client()
+            return None
+
+    def close_daemon_client(self):
+        if self.daemon_client is not None:
+            self.daemon_client.close()
+            self.daemon_client = None
+
+    def reset(self):
+        instrumentation.reset()
+        self.refresh()
+
+    def export(self):
+        self.show_written(instrumentation.export_snapshot(), "Metrics exported to")
+
+    # ---- profiling ----------------------------------------------------------------------------
+
+    def toggle_cpu_profile(self):
+        if instrumentation.cpu_profile_running():
+            self.show_written(instrumentation.stop_cpu_profile(), "CPU profile written to")
+        else:
+            instrumentation.start_cpu_profile()
+            self.status_label.setText("Profiling the GUI thread...")
+        self.update_buttons()
+
+    def toggle_memory_trace(self):
+        if instrumentation.memory_trace_running():
+            self.show_written(instrumentation.take_memory_snapshot(), "Memory snapshot written to")
+        else:
+            instrumentation.start_memory_trace()
+            self.status_label.setText("Tracing memory allocations...")
+        self.update_buttons()
+
+    def update_buttons(self):
+        self.profile_button.setText(
+            "Stop CPU profile" if instrumentation.cpu_profile_running() else "Start CPU profile")
+        self.memory_button.setText(
+            "Take memory snapshot" if instrumentation.memory_trace_running() else "Trace memory")
+
+    def show_written(self, path, message):
+        if path is not None:
+            self.status_label.setText(f"{message} {path}")
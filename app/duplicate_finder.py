@@ -0,0 +1,235 @@
+import hashlib
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app import instrumentation
+
+HASH_CACHE_DB = "file_hashes.db"
+SCHEMA_VERSION = 1
+MIN_DUPLICATE_SIZE = 1024  # Smaller files waste little space and would dominate the candidates
+PARTIAL_BLOCK = 64 * 2**10  # Bytes hashed from each end of a file in the partial stage
+HASH_CHUNK = 2**20  # Read size when streaming a file through the full hash
+HASH_WORKERS = 4  # Hashing threads; reading is I/O bound, more mostly makes a disk seek
+CACHE_MAX_AGE_DAYS = 30  # Cached hashes not used for this long are dropped
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS hashes (
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    partial TEXT,
+    full TEXT,
+    last_used INTEGER NOT NULL,
+    PRIMARY KEY (device, inode, size, mtime_ns)
+) WITHOUT ROWID;
+"""
+
+
+def partial_hash(path, size):
+    """Digest of the first and last PARTIAL_BLOCK bytes; the whole file when it is that small."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        digest.update(file.read(PARTIAL_BLOCK))
+        if size > 2 * PARTIAL_BLOCK:
+            file.seek(size - PARTIAL_BLOCK)
+        digest.update(file.read(PARTIAL_BLOCK))
+    return digest.hexdigest()
+
+
+def full_hash(path):
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as file:
+        while True:
+            chunk = file.read(HASH_CHUNK)
+            if not chunk:
+                return digest.hexdigest()
+            digest.update(chunk)
+
+
+class HashCache:
+    """Partial and full digests of files, keyed on (device, inode, size, mtime).
+
+    A file keeps its key while its content cannot have changed, so a repeat scan only hashes
+    files that are new or were modified since. Renames and moves keep the inode and hit the
+    cache too. Like the other stores, a cache must stay on the thread that opened it.
+    """
+
+    def __init__(self, db_path=HASH_CACHE_DB):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        schema_version = self._get_meta("schema_version")
+        if schema_version != str(SCHEMA_VERSION):
+            if schema_version is not None:
+                self.conn.execute("DROP TABLE IF EXISTS hashes")
+            self.conn.executescript(SCHEMA)
+            self._set_meta("schema_version", SCHEMA_VERSION)
+            self.conn.commit()
+        self.now = int(time.time())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def _get_meta(self, key):
+        try:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        except sqlite3.OperationalError:  # No schema yet
+            return None
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def get(self, key):
+        """(partial, full) digests cached for ``key``; either may be None."""
+        row = self.conn.execute(
+            "SELECT partial, full FROM hashes WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ?",
+            key).fetchone()
+        if row is None:
+            return None, None
+        self.conn.execute(
+            "UPDATE hashes SET last_used = ? WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ?",
+            (self.now, *key))
+        return row
+
+    def put(self, key, partial=None, full=None):
+        self.conn.execute(
+            "INSERT INTO hashes (device, inode, size, mtime_ns, partial, full, last_used) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(device, inode, size, mtime_ns) DO UPDATE SET partial = COALESCE(excluded.partial, partial), "
+            "full = COALESCE(excluded.full, full), last_used = excluded.last_used",
+            (*key, partial, full, self.now))
+
+    def prune(self):
+        """Forget files not seen by a scan for CACHE_MAX_AGE_DAYS; returns how many."""
+        removed = self.conn.execute("DELETE FROM hashes WHERE last_used < ?",
+                                    (self.now - CACHE_MAX_AGE_DAYS * 86400,)).rowcount
+        self.conn.commit()
+        return removed
+
+
+class DuplicateGroup:
+    """Files with identical content: ``size`` bytes each, found at every path in ``paths``."""
+
+    def __init__(self, size, digest, paths):
+        self.size = size
+        self.digest = digest
+        self.paths = sorted(paths)
+
+    @property
+    def wasted(self):
+        """Bytes that deleting all but one copy would free."""
+        return self.size * (len(self.paths) - 1)
+
+
+class DuplicateFinder:
+    """Find duplicate files among the indexed ones, reading as little of them as possible.
+
+    Candidates come from the index: only files that share their size with another file can
+    be duplicates, so nothing else is opened. Each candidate is stat'ed once; hard links to
+    one inode count as a single file, since they take no extra space. Survivors are then
+    narrowed by a partial hash of their first and last PARTIAL_BLOCK bytes, and only files
+    whose size and partial hash still collide are read in full. Hashing runs on a pool of
+    ``workers`` threads while this thread owns the index and the HashCache, which answers
+    for every file unchanged since an earlier scan.
+
+    ``progress(stage, done, total)`` is called between files; ``cancelled()`` is polled at
+    the same points and makes ``find`` return what it has confirmed so far.
+    """
+
+    def __init__(self, store, cache, min_size=MIN_DUPLICATE_SIZE, workers=HASH_WORKERS,
+                 progress=lambda stage, done, total: None, cancelled=lambda: False):
+        self.store = store
+        self.cache = cache
+        self.min_size = min_size
+        self.workers = workers
+        self.progress = progress
+        self.cancelled = cancelled
+        self.stats = {"candidates": 0, "partial_hashed": 0, "full_hashed": 0, "cache_hits": 0, "bytes_read": 0}
+
+    def find(self):
+        """Return DuplicateGroups, the most wasted space first."""
+        with instrumentation.timed("duplicates.scan"), ThreadPoolExecutor(self.workers) as pool:
+            candidates = self.stat_candidates()
+            by_partial = self.hash_stage(pool, "partial", candidates)
+            # Files no larger than both partial blocks were hashed whole already
+            small = {group: files for group, files in by_partial.items() if group[0] <= 2 * PARTIAL_BLOCK}
+            large = [(size, path, key) for (size, _), files in by_partial.items() if size > 2 * PARTIAL_BLOCK
+                     for path, key in files]
+            by_full = self.hash_stage(pool, "full", large) if not self.cancelled() else {}
+        self.cache.conn.commit()
+        for name, value in self.stats.items():
+            instrumentation.count(f"duplicates.{name}", value)
+        groups = [DuplicateGroup(size, digest, [path for path, _ in files])
+                  for (size, digest), files in [*small.items(), *by_full.items()]]
+        groups.sort(key=lambda group: (-group.wasted, group.paths[0]))
+        return groups
+
+    def stat_candidates(self):
+        """(size, path, cache key) of files sharing their current size with another file."""
+        by_size = {}
+        seen_inodes = set()
+        for _, paths in self.store.iter_same_size_files(self.min_size):
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # Deleted since it was indexed
+                inode = (stat.st_dev, stat.st_ino)
+                if inode in seen_inodes or stat.st_size < self.min_size:
+                    continue
+                seen_inodes.add(inode)
+                # Grouped by the size the file has now, which may differ from the indexed one
+                key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+                by_size.setdefault(stat.st_size, []).append((path, key))
+            if self.cancelled():
+                break
+        candidates = [(size, path, key) for size, files in by_size.items() if len(files) > 1 for path, key in files]
+        self.stats["candidates"] = len(candidates)
+        return candidates
+
+    def hash_stage(self, pool, stage, files):
+        """Hash ``files`` ((size, path, key) tuples) with the stage's digest; returns
+        (size, digest) -> [(path, key)] for the digests shared by two or more files."""
+        groups = {}
+        pending = {}
+        done = 0
+        for size, path, key in files:
+            cached = self.cache.get(key)[0 if stage == "partial" else 1]
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                groups.setdefault((size, cached), []).append((path, key))
+                done += 1
+            elif stage == "partial":
+                pending[pool.submit(partial_hash, path, size)] = (size, path, key)
+            else:
+                pending[pool.submit(full_hash, path)] = (size, path, key)
+        self.progress(stage, done, len(files))
+        for future in as_completed(pending):
+            size, path, key = pending[future]
+            done += 1
+            try:
+                digest = future.result()
+            except OSError:
+                continue  # Unreadable or deleted meanwhile
+            self.stats[f"{stage}_hashed"] += 1
+            self.stats["bytes_read"] += min(size, 2 * PARTIAL_BLOCK) if stage == "partial" else size
+            self.cache.put(key, **{stage: digest})
+            groups.setdefault((size, digest), []).append((path, key))
+            self.progress(stage, done, len(files))
+            if self.cancelled():
+                for other in pending:
+                    other.cancel()
+                break
+        return {group: files for group, files in groups.items() if len(files) > 1}
@@ -0,0 +1,151 @@
+import os
+
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QTreeWidget, QTreeWidgetItem, QHeaderView, QPushButton, QLabel,
+    QProgressBar
+)
+from PyQt5.QtCore import Qt, QThread, QUrl, pyqtSignal
+from PyQt5.QtGui import QDesktopServices
+
+from app.duplicate_finder import DuplicateFinder, HashCache
+from app.index_store import IndexStore
+
+COLUMNS = ["File", "Size", "Wasted"]
+STAGE_LABELS = {"partial": "Comparing file ends", "full": "Comparing contents"}
+
+
+def format_size(size):
+    for unit in ("bytes", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:,} {unit}" if unit == "bytes" else f"{size:,.1f} {unit}"
+        size /= 1024
+
+
+class DuplicateScanWorker(QThread):
+    """Run a DuplicateFinder over the file index.
+
+    The index and the hash cache are opened on this thread, which is the only one using
+    them; the finder's own hashing threads only read files.
+    """
+    progress = pyqtSignal(str, int, int)
+    scan_finished = pyqtSignal(list, dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        with IndexStore() as store, HashCache() as cache:
+            if store.file_count() == 0:
+                self.scan_finished.emit([], {"empty_index": True})
+                return
+            finder = DuplicateFinder(store, cache, progress=self.progress.emit, cancelled=lambda: self.cancelled)
+            groups = finder.find()
+            if not self.cancelled:
+                cache.prune()
+        self.scan_finished.emit(groups, finder.stats)
+
+
+class DuplicatesPanel(QWidget):
+    """Groups of identical files among the indexed ones, largest waste of space first.
+
+    Double-clicking a file opens the folder that holds it.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.worker = None
+
+        self.scan_button = QPushButton("Scan for duplicates")
+        self.scan_button.clicked.connect(self.scan)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel)
+        self.cancel_button.setEnabled(False)
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.hide()
+        self.status_label = QLabel("Finds files with identical content among the indexed files.", self)
+
+        self.tree = QTreeWidget(self)
+        self.tree.setHeaderLabels(COLUMNS)
+        self.tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.tree.itemDoubleClicked.connect(self.open_folder)
+
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(self.scan_button)
+        button_layout.addWidget(self.cancel_button)
+        button_layout.addWidget(self.progress_bar)
+        button_layout.addStretch()
+
+        layout = QVBoxLayout()
+        layout.addLayout(button_layout)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.tree)
+        self.setLayout(layout)
+
+    def scan(self):
+        if self.worker is not None:
+            return
+        self.tree.clear()
+        self.status_label.setText("Looking for files of the same size...")
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
+        self.scan_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.worker = DuplicateScanWorker(self)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.scan_finished.connect(self.on_scan_finished)
+        self.worker.start()
+
+    def cancel(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancel_button.setEnabled(False)
+
+    def stop(self):
+        """Cancel a running scan and wait for it; called when the window closes."""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+
+    def on_progress(self, stage, done, total):
+        self.status_label.setText(f"{STAGE_LABELS[stage]}: {done:,} of {total:,} files")
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(done)
+
+    def on_scan_finished(self, groups, stats):
+        cancelled = self.worker.cancelled
+        self.worker.wait()
+        self.worker = None
+        self.progress_bar.hide()
+        self.scan_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        if stats.get("empty_index"):
+            self.status_label.setText("The file index is empty: build it from the taskbar's file search first.")
+            return
+
+        self.tree.setUpdatesEnabled(False)
+        for group in groups:
+            item = QTreeWidgetItem([f"{len(group.paths)} copies", format_size(group.size), format_size(group.wasted)])
+            for column in (1, 2):
+                item.setTextAlignment(column, Qt.AlignRight | Qt.AlignVCenter)
+            for path in group.paths:
+                child = QTreeWidgetItem([path])
+                child.setData(0, Qt.UserRole, path)
+                item.addChild(child)
+            self.tree.addTopLevelItem(item)
+        self.tree.setUpdatesEnabled(True)
+
+        wasted = sum(group.wasted for group in groups)
+        summary = (f"{len(groups):,} groups of duplicates, {format_size(wasted)} wasted. "
+                   f"{stats['candidates']:,} files of shared size; hashed {stats['partial_hashed']:,} ends and "
+                   f"{stats['full_hashed']:,} whole files ({format_size(stats['bytes_read'])} read), "
+                   f"{stats['cache_hits']:,} hashes from the cache.")
+        self.status_label.setText(("Cancelled. " if cancelled else "") + summary)
+
+    def open_folder(self, item, column):
+        path = item.data(0, Qt.UserRole)
+        if path:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.dirname(path)))
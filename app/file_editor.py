@@ -1,12 +1,197 @@
 from PyQt5.QtWidgets import QPlainTextEdit
+from PyQt5.QtCore import QFileSystemWatcher, QTimer, pyqtSignal
+from PyQt5.QtGui import QTextCursor
+
+from app.file_sync import ReloadWorker, SaveWorker, bytes_digest, decode_text, stat_signature
+from app.syntax_highlighter import SyntaxHighlighter, language_for_path
+
+WATCH_DEBOUNCE_MS = 100  # Quiet period after a change notification before the file is re-read
 
 class FileEditor(QPlainTextEdit):
+    saved = pyqtSignal(str, bool)  # path, whether anything had to be written
+    save_failed = pyqtSignal(str, str)
+    changed_on_disk = pyqtSignal(str, bool)  # path, whether the buffer was reloaded
+
     def __init__(self):
         super().__init__()
         self.setReadOnly(False)
+        self.highlighter = SyntaxHighlighter()
+        self.file_path = None
+        self.encoding = "utf-8"
+        self.newline = "\n"
+        self.disk_digest = None  # Digest and signature of the file as last loaded or saved
+        self.disk_signature = None
+        self.save_worker = None
+        self.save_pending = False
+        self.save_revision = None
+        self.reload_worker = None
+        self.reload_revision = None
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setSingleShot(True)
+        self.watch_timer.setInterval(WATCH_DEBOUNCE_MS)
+        self.watch_timer.timeout.connect(self.check_disk)
+
+    def load_file(self, file_path, encoding="utf-8"):
+        """Load a text file for editing; large and binary files go to LargeFileViewer instead.
+
+        Raises UnicodeDecodeError, leaving the editor as it was, if the file does not decode
+        as ``encoding`` beyond the chunk it was sniffed from.
+        """
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        content, newline = decode_text(data, encoding)
+        self.close_file()
+        self.file_path = file_path
+        self.encoding = encoding
+        self.newline = newline
+        self.disk_digest = bytes_digest(data)
+        self.disk_signature = stat_signature(file_path)
+        # Detached while the text is replaced, so loading never highlights synchronously
+        self.highlighter.set_document(None, None)
+        self.setPlainText(content)
+        self.highlighter.set_document(self.document(), language_for_path(file_path))
+        self.watcher.addPath(file_path)
+
+    def close_file(self):
+        """Stop watching the current file; the buffer itself is left as it is."""
+        if self.watcher.files():
+            self.watcher.removePaths(self.watcher.files())
+        self.watch_timer.stop()
+        self.reload_worker = None
+        self.file_path = None
+
+    # ---- saving ---------------------------------------------------------------------------
+
+    def save(self):
+        """Write the buffer back on a worker thread; saves requested meanwhile are coalesced."""
+        if self.file_path is None:
+            return
+        if self.save_worker is not None:
+            self.save_pending = True
+            return
+        self.save_revision = self.document().revision()
+        self.save_worker = SaveWorker(self.file_path, self.toPlainText(), self.encoding, self.newline,
+                                      self.disk_digest, self.disk_signature, self)
+        self.save_worker.saved.connect(self.on_saved)
+        self.save_worker.failed.connect(self.save_failed)
+        self.save_worker.finished.connect(self.on_save_finished)
+        self.save_worker.finished.connect(self.save_worker.deleteLater)
+        self.save_worker.start()
+
+    def save_now(self):
+        """Write the buffer before returning, for when it is about to be replaced or closed;
+        False if the write failed, which save_failed has reported."""
+        if self.file_path is None:
+            return True
+        if self.save_worker is not None:
+            self.save_worker.wait()  # Its older text must not land on top of this one
+        self.save_pending = False
+        self.save_revision = self.document().revision()
+        worker = SaveWorker(self.file_path, self.toPlainText(), self.encoding, self.newline,
+                            self.disk_digest, self.disk_signature)
+        failures = []
+        worker.saved.connect(self.on_saved)
+        worker.failed.connect(lambda path, message: failures.append(message))
+        worker.failed.connect(self.save_failed)
+        worker.run()  # On this thread, so the signals are delivered before it returns
+        return not failures
+
+    def on_saved(self, path, digest, signature, written):
+        if path != self.file_path:
+            return
+        self.disk_digest = digest
+        self.disk_signature = signature
+        if self.document().revision() == self.save_revision:
+            self.document().setModified(False)
+        self.saved.emit(path, written)
+
+    def on_save_finished(self):
+        self.save_worker = None
+        if self.save_pending:
+            self.save_pending = False
+            self.save()
+
+    # ---- external changes -----------------------------------------------------------------
+
+    def on_file_changed(self, path):
+        if path == self.file_path:
+            self.watch_timer.start()
+
+    def check_disk(self):
+        """Reload the file if it really changed since it was loaded or saved, or report the
+        change if the buffer has unsaved edits."""
+        if self.file_path is None:
+            return
+        if self.file_path not in self.watcher.files():
+            # Replaced by a rename (as atomic saves do, ours included): the watch went with the old file
+            self.watcher.addPath(self.file_path)
+        if self.save_worker is not None or self.reload_worker is not None:
+            self.watch_timer.start()
+            return
+        signature = stat_signature(self.file_path)
+        if signature is None or signature == self.disk_signature:
+            return
+        if self.document().isModified():
+            self.changed_on_disk.emit(self.file_path, False)
+        else:
+            self.reload()
+
+    def reload(self):
+        """Bring the buffer in line with the file on disk, replacing only the lines that differ."""
+        if self.file_path is None or self.reload_worker is not None:
+            return
+        self.reload_revision = self.document().revision()
+        self.reload_worker = ReloadWorker(self.file_path, self.encoding, self.toPlainText().split("\n"), self)
+        self.reload_worker.reloaded.connect(self.on_reloaded)
+        self.reload_worker.failed.connect(self.on_reload_failed)
+        self.reload_worker.finished.connect(self.reload_worker.deleteLater)
+        self.reload_worker.start()
+
+    def on_reloaded(self, result):
+        if self.sender() is not self.reload_worker:
+            return
+        self.reload_worker = None
+        if self.document().revision() != self.reload_revision:
+            # Typed into while the diff was computed, so it no longer applies
+            self.changed_on_disk.emit(self.file_path, False)
+            return
+        digest, signature, self.newline, changes = result
+        self.disk_digest = digest
+        self.disk_signature = signature
+        if changes:
+            self.apply_line_changes(changes)
+            self.changed_on_disk.emit(self.file_path, True)
+        self.document().setModified(False)
+
+    def on_reload_failed(self, path, message):
+        if self.sender() is self.reload_worker:
+            self.reload_worker = None
+            print(f"Error reloading {path}: {message}")
 
-    def load_file(self, file_path):
-        with open(file_path, 'r') as file:
-            content = file.read()
-            self.setPlainText(content)
-        # Add syntax highlighting logic here for Python, batch, and shell scripts
+    def apply_line_changes(self, changes):
+        """Replace line ranges as one undoable edit; the cursor and scroll position stay put and
+        only the replaced lines are re-highlighted."""
+        document = self.document()
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        # Back to front, so the line numbers of the remaining changes stay valid
+        for old_start, old_end, lines in reversed(changes):
+            block_count = document.blockCount()
+            if old_start == block_count:
+                cursor.movePosition(QTextCursor.End)
+                cursor.insertText("\n" + "\n".join(lines))
+                continue
+            cursor.setPosition(document.findBlockByNumber(old_start).position())
+            if old_end < block_count:
+                cursor.setPosition(document.findBlockByNumber(old_end).position(), QTextCursor.KeepAnchor)
+                replacement = "".join(line + "\n" for line in lines)
+            else:
+                if not lines and old_start > 0:
+                    # Dropping the last lines also drops the line break before them
+                    cursor.setPosition(cursor.position() - 1)
+                cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+                replacement = "\n".join(lines)
+            cursor.insertText(replacement)
+        cursor.endEditBlock()
@@ -1,30 +1,55 @@
-import os
-import pickle
-from pathlib import Path
+from contextlib import closing
 
-INDEX_FILE = "files_index.pkl"
+from app import instrumentation
+from app.crawler import ParallelCrawler
+from app.index_config import IndexConfig, load_index_config
+from app.index_store import IndexStore
 
 
-def index_files(root_directories=None):
-    """Index files in specified directories and save to a pickle file."""
-    if root_directories is None:
-        root_directories = [Path.home()]  # Default to user home directory
+def index_files(root_directories=None, incremental=True, workers=None, config=None, cancelled=lambda: False):
+    """Index files in specified directories into the on-disk index store.
 
-    file_index = {}
-    for root_dir in root_directories:
-        for dirpath, _, filenames in os.walk(root_dir):
-            for filename in filenames:
-                file_path = os.path.join(dirpath, filename)
-                file_index[filename] = file_index.get(filename, []) + [file_path]
+    Without explicit roots the scope and ignore rules come from index_config.json (see
+    app.index_config); explicitly passed roots are indexed without any rules.
+    In incremental mode only directories whose signature changed since the previous run are
+    listed again; unchanged directories keep their rows and only have their generation bumped.
+    Files edited in place leave their directory's signature alone, so their size and mtime
+    are only brought up to date by the watcher (see app.fs_watcher).
+    ``workers`` bounds the crawler's thread pool (defaults to a multiple of the CPU count).
+    ``cancelled`` is polled between directories; a cancelled pass keeps what it recorded but
+    purges nothing, and the next pass completes it.
+    Returns the generation number of this indexing pass, or None if it was cancelled.
+    """
+    if config is None:
+        config = load_index_config() if root_directories is None else IndexConfig(root_directories)
 
-    # Save the file index
-    with open(INDEX_FILE, 'wb') as index_file:
-        pickle.dump(file_index, index_file)
+    with instrumentation.timed("index.run"), IndexStore() as store:
+        with instrumentation.timed("index.load_signatures"):
+            if not incremental or store.scope != config.fingerprint():
+                store.reset(config.fingerprint())
+            previous = store.load_directory_signatures()
+            generation = store.begin_generation()
+        listed = unchanged = files_recorded = 0
+        with instrumentation.timed("index.crawl"):
+            crawler = ParallelCrawler(workers, rules=config.rules())
+            with closing(crawler.walk(config.start_paths, previous)) as walk:
+                for dirpath, signature, files, _ in walk:
+                    if cancelled():
+                        break
+                    store.record_directory(dirpath, signature, files)
+                    if files is None:
+                        unchanged += 1
+                    else:
+                        listed += 1
+                        files_recorded += len(files)
+        if cancelled():
+            store.commit()
+            instrumentation.count("index.cancelled")
+            return None
+        with instrumentation.timed("index.finish_generation"):
+            store.finish_generation()
+    instrumentation.count("index.directories_listed", listed)
+    instrumentation.count("index.directories_unchanged", unchanged)
+    instrumentation.count("index.files_recorded", files_recorded)
+    return generation
 
-
-def load_file_index():
-    """Load the file index from the pickle file."""
-    if not os.path.exists(INDEX_FILE):
-        index_files()
-    with open(INDEX_FILE, 'rb') as index_file:
-        return pickle.load(index_file)
@@ -0,0 +1,320 @@
+import sqlite3
+import threading
+import time
+
+from PyQt5.QtWidgets import (
+    QApplication, QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QLabel, QListView, QPushButton, QFileDialog, QComboBox
+)
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QThread, QTimer, QUrl, pyqtSignal
+from PyQt5.QtGui import QDesktopServices
+
+from app import instrumentation
+from app.file_indexer import index_files
+from app.fuzzy_match import fuzzy_search
+from app.index_protocol import (
+    DAEMON_START_TIMEOUT, SEARCH_MODES, IndexClient, IndexServiceError, daemon_supported, start_daemon
+)
+from app.index_store import IndexStore
+
+SEARCH_DEBOUNCE_MS = 150  # Wait for a pause in typing before querying
+FIRST_PAGE_SIZE = 200  # Small first page so the first results show up almost immediately
+PAGE_SIZE = 2000  # Rows fetched from the index / revealed in the view per step
+FUZZY_RESULT_LIMIT = 200  # Fuzzy mode only returns the best matches, ranked
+
+
+def record_launch(path, timestamp):
+    """Count a file opened from search, through the index daemon when there is one.
+
+    Only writes the launch: the index is never built here, even when it is missing.
+    """
+    if daemon_supported():
+        try:
+            with IndexClient() as client:
+                client.record_launch(path)
+            return
+        except (OSError, IndexServiceError):
+            pass
+    try:
+        with IndexStore() as store:
+            store.record_launch(path, timestamp)
+    except sqlite3.Error as e:
+        print(f"Error recording the launch of {path}: {e}")
+
+
+class SearchResultsModel(QAbstractListModel):
+    """List model that receives results in pages and only exposes rows as the view scrolls."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.paths = []
+        self.visible_rows = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.visible_rows
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self.paths[index.row()]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.visible_rows < len(self.paths)
+
+    def fetchMore(self, parent=QModelIndex()):
+        self.reveal(min(len(self.paths), self.visible_rows + PAGE_SIZE))
+
+    def reveal(self, rows):
+        if rows > self.visible_rows:
+            self.beginInsertRows(QModelIndex(), self.visible_rows, rows - 1)
+            self.visible_rows = rows
+            self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.paths = []
+        self.visible_rows = 0
+        self.endResetModel()
+
+    def append_paths(self, paths):
+        self.paths.extend(paths)
+        if self.visible_rows < PAGE_SIZE:
+            self.reveal(min(len(self.paths), PAGE_SIZE))
+
+
+class SearchWorker(QThread):
+    """Run one query and stream its results page by page.
+
+    The query goes to the index daemon (started on demand), so the GUI process never opens
+    the index. Where Unix sockets are unavailable, or the daemon cannot be reached, it runs
+    against the index store in this thread instead, building the index first if it was never
+    built; cancelling stops the build between directories.
+    """
+    results_ready = pyqtSignal(int, list)
+    search_finished = pyqtSignal(int, int)
+
+    def __init__(self, query_id, search_term, mode="Substring", parent=None):
+        super().__init__(parent)
+        self.query_id = query_id
+        self.search_term = search_term
+        self.mode = mode
+        self.store = None
+        self.client = None
+        self.started = None
+        self.cancelled = False
+        self.index_building = False  # The daemon was still building the index, so results may be missing
+
+    def cancel(self):
+        """Stop streaming; also aborts a running SQLite statement from the GUI thread."""
+        self.cancelled = True
+        client = self.client
+        if client is not None:
+            client.abort()
+        store = self.store
+        if store is not None:
+            try:
+                store.interrupt()
+            except sqlite3.ProgrammingError:  # The worker closed the store meanwhile
+                pass
+
+    def run(self):
+        self.started = time.perf_counter()
+        total = self.search_daemon() if daemon_supported() else None
+        if total is None and not self.cancelled:
+            total = self.search_store()
+        if self.cancelled:
+            instrumentation.count("search.cancelled")
+        elif total is not None:
+            instrumentation.record_time(f"search.{self.mode.lower()}", time.perf_counter() - self.started)
+            instrumentation.observe("search.results", total)
+            self.search_finished.emit(self.query_id, total)
+
+    def search_daemon(self):
+        """Stream the results from the index daemon; None if it could not answer."""
+        if not start_daemon(wait=DAEMON_START_TIMEOUT):
+            return None
+        self.client = IndexClient()
+        total = 0
+        try:
+            limit = FUZZY_RESULT_LIMIT if self.mode == "Fuzzy" else None
+            for paths in self.client.search(self.search_term, self.mode, limit, FIRST_PAGE_SIZE, PAGE_SIZE):
+                if self.cancelled:
+                    break
+                if total == 0:
+                    instrumentation.record_time("search.first_page", time.perf_counter() - self.started)
+                total += len(paths)
+                self.results_ready.emit(self.query_id, paths)
+            self.index_building = bool(self.client.last_reply and self.client.last_reply.get("indexing"))
+        except (OSError, IndexServiceError):
+            if total == 0:
+                return None
+            instrumentation.count("search.daemon_errors")
+        finally:
+            client, self.client = self.client, None
+            client.close()
+        return total
+
+    def open_store(self):
+        """Open the index store, building the index first if it has never been created;
+        None if the search was cancelled before it could be opened."""
+        with instrumentation.timed("index.open"):
+            store = IndexStore()
+            if not store.is_empty():
+                return store
+            store.close()
+            if self.cancelled or index_files(cancelled=lambda: self.cancelled) is None:
+                return None
+            return IndexStore()
+
+    def search_store(self):
+        try:
+            self.store = self.open_store()
+            if self.store is None:
+                return None
+            return self.rank_fuzzy() if self.mode == "Fuzzy" else self.stream_substring()
+        except sqlite3.OperationalError:
+            if not self.cancelled:
+                raise
+            return None
+        finally:
+            store, self.store = self.store, None
+            if store is not None:
+                store.close()
+
+    def stream_substring(self):
+        total = 0
+        page = []
+        for paths in self.store.iter_substring(self.search_term, batch_size=FIRST_PAGE_SIZE):
+            if self.cancelled:
+                return total
+            page.extend(paths)
+            # The first small page goes out on its own so it is shown without delay
+            if total == 0 or len(page) >= PAGE_SIZE:
+                if total == 0:
+                    instrumentation.record_time("search.first_page", time.perf_counter() - self.started)
+                total += len(page)
+                self.results_ready.emit(self.query_id, page)
+                page = []
+        if page:
+            total += len(page)
+            self.results_ready.emit(self.query_id, page)
+        return total
+
+    def rank_fuzzy(self):
+        ranked = fuzzy_search(self.store, self.search_term, FUZZY_RESULT_LIMIT, cancelled=lambda: self.cancelled)
+        if ranked and not self.cancelled:
+            self.results_ready.emit(self.query_id, [path for _, path in ranked])
+        return len(ranked)
+
+
+class FileSearchDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("File Search")
+        self.setMinimumSize(400, 300)
+        self.query_id = 0
+        self.worker = None
+
+        layout = QVBoxLayout()
+        self.search_input = QLineEdit(self)
+        self.search_input.setPlaceholderText("Enter file name or extension (e.g., '.txt')")
+        self.mode_dropdown = QComboBox(self)
+        self.mode_dropdown.addItems(SEARCH_MODES)
+        self.mode_dropdown.currentTextChanged.connect(self.perform_search)
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.mode_dropdown)
+        layout.addWidget(QLabel("Search Files:"))
+        layout.addLayout(search_layout)
+
+        self.results_model = SearchResultsModel(self)
+        self.results_view = QListView(self)
+        self.results_view.setUniformItemSizes(True)  # Lets the view lay out only visible rows
+        self.results_view.setModel(self.results_model)
+        self.results_view.doubleClicked.connect(self.open_result)
+        layout.addWidget(self.results_view)
+
+        self.status_label = QLabel(self)
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        search_button = QPushButton("Search")
+        search_button.clicked.connect(self.perform_search)
+        save_button = QPushButton("Save Results")
+        save_button.clicked.connect(self.save_results)
+        button_layout.addWidget(search_button)
+        button_layout.addWidget(save_button)
+
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.debounce_timer.timeout.connect(self.perform_search)
+        self.search_input.textChanged.connect(self.debounce_timer.start)
+        self.search_input.returnPressed.connect(self.perform_search)
+
+    def perform_search(self):
+        self.debounce_timer.stop()
+        self.cancel_search()
+        self.results_model.clear()
+
+        search_term = self.search_input.text().strip().lower()
+        if not search_term:
+            self.status_label.setText("Please enter a search term.")
+            return
+
+        self.query_id += 1
+        self.status_label.setText("Searching...")
+        self.worker = SearchWorker(self.query_id, search_term, self.mode_dropdown.currentText(), self)
+        self.worker.results_ready.connect(self.on_results_ready)
+        self.worker.search_finished.connect(self.on_search_finished)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker.start()
+
+    def cancel_search(self):
+        # Superseded workers finish on their own; their late results fail the query_id check
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+
+    def on_results_ready(self, query_id, paths):
+        if query_id == self.query_id:
+            self.results_model.append_paths(paths)
+            self.status_label.setText(f"{len(self.results_model.paths)} files found so far...")
+
+    def on_search_finished(self, query_id, total):
+        if query_id == self.query_id:
+            message = f"{total} files found." if total else "No files found."
+            if self.sender().index_building:
+                message += " The index is still being built."
+            self.status_label.setText(message)
+
+    def open_result(self, index):
+        path = self.results_model.paths[index.row()]
+        QDesktopServices.openUrl(QUrl.fromLocalFile(path))
+        # Off the GUI thread: the daemon may be busy, or the store locked by the indexer
+        threading.Thread(target=record_launch, args=(path, time.time()), daemon=True).start()
+
+    def save_results(self):
+        if not self.results_model.paths:
+            return
+
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Search Results", "", "Text Files (*.txt)")
+        if file_path:
+            with open(file_path, "w") as file:
+                file.write("\n".join(self.results_model.paths))
+
+    def done(self, result):
+        self.cancel_search()
+        # Cancelled workers are not waited for: a worker building the missing index only stops
+        # at its next directory. They are handed to the application, which keeps them until
+        # they finish and delete themselves, so this dialog can be deleted right away
+        for worker in self.findChildren(SearchWorker):
+            worker.results_ready.disconnect()
+            worker.search_finished.disconnect()
+            worker.setParent(QApplication.instance())
+            if worker.isFinished():
+                worker.deleteLater()
+        super().done(result)
+        self.deleteLater()
@@ -0,0 +1,138 @@
+import difflib
+import hashlib
+import os
+import stat
+import tempfile
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+MAX_DIFF_LINES = 20000  # Changed middles longer than this are replaced wholesale instead of diffed
+
+
+def bytes_digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def stat_signature(path):
+    """(mtime, size) of a file, or None if it does not exist."""
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+
+def decode_text(data, encoding):
+    """Decode file contents for the editor; returns (text with \\n line breaks, original newline).
+
+    Decoding is strict: the encoding is sniffed from the first chunk only, and a buffer with
+    U+FFFD in place of undecodable bytes would corrupt them, or fail to encode, on save.
+    Raises UnicodeDecodeError when the rest of the file does not match.
+    """
+    text = data.decode(encoding)
+    newline = "\r\n" if "\r\n" in text else "\n"
+    return text.replace("\r\n", "\n").replace("\r", "\n"), newline
+
+
+def atomic_write(path, data):
+    """Replace ``path`` with ``data`` so that readers only ever see the old or the new file.
+
+    The data goes to a temporary file in the same directory, which is fsynced and then renamed
+    over the target; a symlink is followed so the link itself survives. Permission bits of an
+    existing file are kept.
+    """
+    path = os.path.realpath(path)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp",
+                                     dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        try:
+            os.chmod(temp_path, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def line_changes(old_lines, new_lines):
+    """Return (old_start, old_end, replacement lines) for every changed range, in order.
+
+    The common head and tail are trimmed first, so appends and local edits are found without
+    diffing the whole file; a huge changed middle is returned as a single replacement.
+    """
+    head = 0
+    limit = min(len(old_lines), len(new_lines))
+    while head < limit and old_lines[head] == new_lines[head]:
+        head += 1
+    tail = 0
+    while tail < limit - head and old_lines[-1 - tail] == new_lines[-1 - tail]:
+        tail += 1
+    old_middle = old_lines[head:len(old_lines) - tail]
+    new_middle = new_lines[head:len(new_lines) - tail]
+    if not old_middle and not new_middle:
+        return []
+    if max(len(old_middle), len(new_middle)) > MAX_DIFF_LINES:
+        return [(head, head + len(old_middle), new_middle)]
+    matcher = difflib.SequenceMatcher(None, old_middle, new_middle, autojunk=False)
+    return [(head + old_start, head + old_end, new_middle[new_start:new_end])
+            for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes() if tag != "equal"]
+
+
+class SaveWorker(QThread):
+    """Encode the editor's text and write it atomically, unless the file already holds exactly
+    those bytes."""
+    saved = pyqtSignal(str, str, object, bool)  # path, digest, signature, whether anything was written
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, path, text, encoding, newline, disk_digest, disk_signature, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.text = text
+        self.encoding = encoding
+        self.newline = newline
+        self.disk_digest = disk_digest
+        self.disk_signature = disk_signature
+
+    def run(self):
+        try:
+            data = self.text.replace("\n", self.newline).encode(self.encoding)
+            digest = bytes_digest(data)
+            # The digest of what was loaded (or last saved) only stands for the disk contents
+            # while the file is untouched since, so a changed signature forces the write
+            written = digest != self.disk_digest or stat_signature(self.path) != self.disk_signature
+            if written:
+                atomic_write(self.path, data)
+            self.saved.emit(self.path, digest, stat_signature(self.path), written)
+        except (OSError, UnicodeError) as e:
+            self.failed.emit(self.path, str(e))
+
+
+class ReloadWorker(QThread):
+    """Read a file that changed on disk and diff it against the editor's lines."""
+    reloaded = pyqtSignal(object)  # (digest, signature, newline, line changes)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, path, encoding, old_lines, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.encoding = encoding
+        self.old_lines = old_lines
+
+    def run(self):
+        try:
+            with open(self.path, "rb") as file:
+                signature = stat_signature(self.path)
+                data = file.read()
+            text, newline = decode_text(data, self.encoding)
+        except (OSError, UnicodeDecodeError) as e:
+            self.failed.emit(self.path, str(e))
+            return
+        self.reloaded.emit((bytes_digest(data), signature, newline, line_changes(self.old_lines, text.split("\n"))))
@@ -0,0 +1,341 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sqlite3
+import struct
+import sys
+import threading
+import time
+
+from app.crawler import ParallelCrawler, directory_signature, scan_directory
+from app.file_indexer import index_files
+from app.index_store import IndexStore
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+# IN_CLOSE_WRITE catches files edited in place, which leave their directory's mtime alone;
+# only the written file is stat'ed again, its directory is not relisted
+WATCH_MASK = (IN_CLOSE_WRITE | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF
+              | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+EVENT_HEADER = struct.Struct("iIII")
+
+DEFAULT_MAX_WATCHES = 8192  # Stay well below fs.inotify.max_user_watches, which other apps share
+DEBOUNCE_SECONDS = 0.5  # Quiet period after the last event before a batch is applied
+MAX_BATCH_DELAY_SECONDS = 5.0  # Apply a batch at the latest this long after its first event
+RESCAN_INTERVAL_SECONDS = 300  # Periodic incremental rescan of unwatched subtrees / polling
+LOCKED_RETRY_SECONDS = 1.0  # First back-off after another writer kept the index locked
+MAX_LOCKED_RETRY_SECONDS = 60.0  # The back-off doubles up to this
+
+
+def next_backoff(backoff):
+    return min(MAX_LOCKED_RETRY_SECONDS, backoff * 2 or LOCKED_RETRY_SECONDS)
+
+
+class PendingChanges:
+    """Filesystem events coalesced per directory until the batch is applied."""
+
+    def __init__(self):
+        self.dirty_dirs = set()
+        self.written_files = set()
+        self.created_dirs = set()
+        self.removed_dirs = set()
+        self.first_event = None
+        self.last_event = None
+
+    def __bool__(self):
+        return bool(self.dirty_dirs or self.written_files or self.created_dirs or self.removed_dirs)
+
+    def note(self, now):
+        if self.first_event is None:
+            self.first_event = now
+        self.last_event = now
+
+    def is_due(self, now):
+        return bool(self) and (now - self.last_event >= DEBOUNCE_SECONDS
+                               or now - self.first_event >= MAX_BATCH_DELAY_SECONDS)
+
+
+class PollingWatcher:
+    """Fallback watcher that keeps the index fresh with periodic incremental rescans.
+
+    ``lock`` is shared with whoever else runs full indexing passes; a rescan that finds it
+    held is skipped until the next interval.
+    """
+
+    def __init__(self, config, workers=None, interval=RESCAN_INTERVAL_SECONDS, lock=None):
+        self.config = config
+        self.workers = workers
+        self.interval = interval
+        self.lock = lock or threading.Lock()
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        backoff = 0.0
+        while not self._stop.wait(backoff or self.interval):
+            if not self.lock.acquire(blocking=False):
+                continue  # A full pass is running already
+            try:
+                index_files(workers=self.workers, config=self.config, cancelled=self._stop.is_set)
+                backoff = 0.0
+            except sqlite3.OperationalError as e:  # Another writer held the lock too long
+                backoff = next_backoff(backoff)
+                print(f"Index rescan failed ({e}), retrying in {backoff:g} s", flush=True)
+            finally:
+                self.lock.release()
+
+
+class InotifyWatcher:
+    """Apply inotify events to the index store in debounced, per-directory batches.
+
+    At most ``max_watches`` directories are watched, shallowest first. Subtrees that do not
+    fit into that budget are refreshed by periodic incremental rescans instead. Directories
+    excluded by the config's ignore rules are neither watched nor indexed. Those rescans and
+    the recrawl after an event overflow wait for ``lock`` to be free, so they never run next
+    to a full indexing pass that holds it.
+    """
+
+    def __init__(self, config, workers=None, max_watches=DEFAULT_MAX_WATCHES,
+                 rescan_interval=RESCAN_INTERVAL_SECONDS, lock=None):
+        self.roots = config.start_paths
+        self.rules = config.rules()
+        self.workers = workers
+        self.max_watches = max_watches
+        self.rescan_interval = rescan_interval
+        self.lock = lock or threading.Lock()
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watch_paths = {}  # wd -> directory path
+        self.path_watches = {}  # directory path -> wd
+        self.rescan_roots = set()  # Unwatched subtrees covered by periodic rescans
+        self.pending = PendingChanges()
+        self.overflowed = False
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def add_watch(self, path):
+        """Watch one directory, or mark it for periodic rescans when the budget is used up."""
+        if path in self.path_watches:
+            return True
+        if len(self.path_watches) >= self.max_watches:
+            self.rescan_roots.add(path)
+            return False
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            # ENOSPC (system-wide limit), EACCES or the directory vanished meanwhile
+            if os.path.isdir(path):
+                self.rescan_roots.add(path)
+            return False
+        self.watch_paths[wd] = path
+        self.path_watches[path] = wd
+        return True
+
+    def forget_tree(self, path):
+        prefix = path.rstrip(os.sep) + os.sep
+        for watched in [p for p in self.path_watches if p == path or p.startswith(prefix)]:
+            wd = self.path_watches.pop(watched)
+            self.watch_paths.pop(wd, None)
+            self.libc.inotify_rm_watch(self.fd, wd)
+        self.rescan_roots = {p for p in self.rescan_roots if p != path and not p.startswith(prefix)}
+
+    def watch_indexed_directories(self, store):
+        watched = set()
+        for path in store.directory_paths():
+            parent = os.path.dirname(path)
+            if path in self.roots or parent in watched:
+                if self.add_watch(path):
+                    watched.add(path)
+
+    def run(self):
+        with IndexStore() as store:
+            self.watch_indexed_directories(store)
+            next_rescan = time.monotonic() + self.rescan_interval
+            backoff = retry_at = 0.0
+            try:
+                while not self._stop.is_set():
+                    now = time.monotonic()
+                    timeout = min(DEBOUNCE_SECONDS, max(0.0, next_rescan - now))
+                    readable, _, _ = select.select([self.fd], [], [], timeout)
+                    if readable:
+                        self.read_events(time.monotonic())
+                    now = time.monotonic()
+                    if now < retry_at:
+                        continue  # Events keep being collected meanwhile
+                    try:
+                        if self.overflowed and self.lock.acquire(blocking=False):
+                            try:
+                                self.recover_from_overflow(store)
+                            finally:
+                                self.lock.release()
+                        if self.pending.is_due(now):
+                            self.apply_pending(store)
+                        if now >= next_rescan and self.lock.acquire(blocking=False):
+                            try:
+                                self.rescan_unwatched(store)
+                            finally:
+                                self.lock.release()
+                            next_rescan = now + self.rescan_interval
+                        backoff = 0.0
+                    except sqlite3.OperationalError as e:
+                        # The indexer or another writer held the lock for longer than the busy
+                        # timeout; the batch is kept and applied again once the lock is free
+                        store.rollback()
+                        backoff = next_backoff(backoff)
+                        retry_at = time.monotonic() + backoff
+                        print(f"Applying file system changes failed ({e}), retrying in {backoff:g} s", flush=True)
+            finally:
+                self.close()
+
+    def read_events(self, now):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_len].rstrip(b"\0"))
+            offset += name_len
+            self.handle_event(wd, mask, name)
+        self.pending.note(now)
+
+    def handle_event(self, wd, mask, name):
+        if mask & IN_Q_OVERFLOW:
+            self.overflowed = True
+            return
+        directory = self.watch_paths.get(wd)
+        if directory is None:
+            return
+        if mask & IN_IGNORED:
+            self.watch_paths.pop(wd, None)
+            if self.path_watches.get(directory) == wd:
+                del self.path_watches[directory]
+            return
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            self.pending.removed_dirs.add(directory)
+            return
+        if mask & IN_CLOSE_WRITE:
+            self.pending.written_files.add(os.path.join(directory, name))
+            return
+        self.pending.dirty_dirs.add(directory)
+        if mask & IN_ISDIR:
+            path = os.path.join(directory, name)
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                self.pending.created_dirs.add(path)
+                self.pending.removed_dirs.discard(path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self.pending.removed_dirs.add(path)
+                self.pending.created_dirs.discard(path)
+
+    def apply_pending(self, store):
+        """Apply one coalesced batch: drop removed subtrees, crawl new ones, relist the rest and
+        refresh the stats of files written in directories that are not relisted anyway."""
+        pending = self.pending
+        for path in pending.removed_dirs:
+            if not os.path.isdir(path):
+                self.forget_tree(path)
+                store.remove_directory_tree(path)
+        for path in pending.created_dirs:
+            if os.path.isdir(path) and not self.rules.prunes_path(path):
+                self.watch_new_subtree(store, path)
+        for path in pending.dirty_dirs - pending.removed_dirs:
+            signature = directory_signature(path)
+            if signature is not None:
+                files, _ = scan_directory(path, self.rules)
+                store.record_directory(path, signature, files)
+        relisted = pending.dirty_dirs | pending.removed_dirs
+        for path in pending.written_files:
+            if os.path.dirname(path) not in relisted:
+                try:
+                    stat = os.stat(path)
+                except OSError:  # Deleted meanwhile; the IN_DELETE event relists its directory
+                    continue
+                store.update_file_stats(path, stat.st_size, int(stat.st_mtime))
+        store.commit()
+        self.pending = PendingChanges()  # Only once committed, so a failed batch is retried
+
+    def watch_new_subtree(self, store, path):
+        """Index a newly created or moved-in subtree, watching each directory before listing it
+        so files created while it is being filled still raise events."""
+        pending = [path]
+        while pending:
+            dirpath = pending.pop()
+            self.add_watch(dirpath)
+            signature = directory_signature(dirpath)
+            if signature is None:
+                continue
+            files, subdirs = scan_directory(dirpath, self.rules)
+            store.record_directory(dirpath, signature, files)
+            pending.extend(os.path.join(dirpath, name) for name, _ in subdirs)
+
+    def index_subtree(self, store, path):
+        """Incrementally recrawl a subtree, dropping directories that no longer exist below it."""
+        prefix = path.rstrip(os.sep) + os.sep
+        previous = {p: entry for p, entry in store.load_directory_signatures().items()
+                    if p == path or p.startswith(prefix)}
+        seen = set()
+        for dirpath, signature, files, _ in ParallelCrawler(self.workers, self.rules).walk([path], previous):
+            store.record_directory(dirpath, signature, files)
+            seen.add(dirpath)
+        for stale in set(store.subtree_paths(path)) - seen:
+            store.remove_directory_tree(stale)
+
+    def rescan_unwatched(self, store):
+        rescanned = []
+        for path in sorted(self.rescan_roots, key=len):
+            if any(path.startswith(done.rstrip(os.sep) + os.sep) for done in rescanned):
+                continue  # Already covered by the rescan of an unwatched ancestor
+            if os.path.isdir(path):
+                self.index_subtree(store, path)
+                rescanned.append(path)
+            else:
+                self.rescan_roots.discard(path)
+                store.remove_directory_tree(path)
+        store.commit()
+
+    def recover_from_overflow(self, store):
+        """The kernel dropped events: recrawl the roots incrementally and re-establish watches."""
+        self.pending = PendingChanges()
+        for root in self.roots:
+            self.index_subtree(store, root)
+        store.commit()
+        self.overflowed = False
+        self.watch_indexed_directories(store)
+
+
+def create_watcher(config, workers=None, lock=None):
+    """Return an inotify watcher for an IndexConfig on Linux, falling back to periodic polling.
+
+    ``lock`` (a threading.Lock) is held by full indexing passes; the watcher's own crawls
+    take it too, so the two never run at the same time.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(config, workers=workers, lock=lock)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(config, workers=workers, lock=lock)
@@ -0,0 +1,114 @@
+import heapq
+import math
+import time
+
+from app.index_store import char_mask
+
+MATCH_SCORE = 16
+BOUNDARY_BONUS = 8  # Match right after a separator or at the start of the name
+CONSECUTIVE_BONUS = 4
+GAP_START_PENALTY = 3
+GAP_EXTENSION_PENALTY = 1
+MAX_START_CANDIDATES = 8  # Alignments tried per name, starting at different first-character hits
+NAME_BATCH_SIZE = 500  # Names whose files are fetched per query
+
+DEPTH_PENALTY = 0.5  # Per directory level, so shallower paths win ties
+MAX_DEPTH_PENALTY = 8
+RECENCY_BONUS = 8  # For a file modified just now, decaying with RECENCY_HALF_LIFE_DAYS
+RECENCY_HALF_LIFE_DAYS = 14
+LAUNCH_BONUS = 4  # Per doubling of the number of times the file was opened from search
+MAX_LAUNCH_BONUS = 12
+MAX_BONUS = RECENCY_BONUS + MAX_LAUNCH_BONUS
+
+SEPARATORS = frozenset("._- /\\")
+
+
+def subsequence_score(query, name_lower):
+    """fzf-style score of ``query`` as a subsequence of ``name_lower``, or None if absent.
+
+    Each alignment is matched greedily from one occurrence of the first query character;
+    the best of the first few alignments is kept, which in practice finds the tightest match.
+    """
+    best = None
+    start = name_lower.find(query[0])
+    tries = 0
+    while start != -1 and tries < MAX_START_CANDIDATES:
+        score = _score_from(query, name_lower, start)
+        if score is None:
+            break  # If the query doesn't fit from here it won't fit from a later start either
+        if best is None or score > best:
+            best = score
+        start = name_lower.find(query[0], start + 1)
+        tries += 1
+    return best
+
+
+def _score_from(query, name_lower, start):
+    score = 0
+    position = start
+    previous = None
+    for char in query:
+        position = name_lower.find(char, position)
+        if position == -1:
+            return None
+        score += MATCH_SCORE
+        if position == 0 or name_lower[position - 1] in SEPARATORS:
+            score += BOUNDARY_BONUS
+        if previous is not None:
+            gap = position - previous - 1
+            if gap == 0:
+                score += CONSECUTIVE_BONUS
+            else:
+                score -= GAP_START_PENALTY + GAP_EXTENSION_PENALTY * (gap - 1)
+        previous = position
+        position += 1
+    return score
+
+
+def entry_bonus(depth, mtime, launches, now):
+    """Ranking adjustment from the data captured at index time, at most MAX_BONUS."""
+    bonus = -min(MAX_DEPTH_PENALTY, DEPTH_PENALTY * depth)
+    if mtime > 0:
+        age_days = max(0.0, (now - mtime) / 86400)
+        bonus += RECENCY_BONUS * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+    if launches:
+        bonus += min(MAX_LAUNCH_BONUS, LAUNCH_BONUS * math.log2(1 + launches))
+    return bonus
+
+
+def fuzzy_search(store, query, limit=100, cancelled=lambda: False):
+    """Return up to ``limit`` (score, path) pairs ranked best first.
+
+    Names are prefiltered in SQL by character mask and scored once per distinct name. Files
+    are then visited from the best name down, keeping a top-K heap, and the walk stops as soon
+    as no remaining name could beat the heap even with the maximum bonus.
+    """
+    query = "".join(query.lower().split())
+    if not query:
+        return []
+    scored_names = []
+    for name_id, name_lower in store.names_with_chars(char_mask(query)):
+        score = subsequence_score(query, name_lower)
+        if score is not None:
+            scored_names.append((score, name_id))
+    if cancelled():
+        return []
+    scored_names.sort(reverse=True)
+
+    launches = store.launch_counts()
+    now = time.time()
+    top = []  # Min-heap of (score, path)
+    for start in range(0, len(scored_names), NAME_BATCH_SIZE):
+        batch = scored_names[start:start + NAME_BATCH_SIZE]
+        if len(top) >= limit and batch[0][0] + MAX_BONUS <= top[0][0]:
+            break
+        if cancelled():
+            return []
+        name_scores = {name_id: name_score for name_score, name_id in batch}
+        for name_id, path, depth, mtime in store.files_for_names(list(name_scores)):
+            entry = (name_scores[name_id] + entry_bonus(depth, mtime, launches.get(path, 0), now), path)
+            if len(top) < limit:
+                heapq.heappush(top, entry)
+            elif entry > top[0]:
+                heapq.heapreplace(top, entry)
+    return sorted(top, reverse=True)
@@ -0,0 +1,190 @@
+import json
+import os
+import re
+from pathlib import Path
+
+INDEX_CONFIG_FILE = "index_config.json"
+
+DEFAULT_EXCLUDES = [
+    ".git/", ".hg/", ".svn/", "node_modules/", "__pycache__/", "*.pyc", ".venv/", "venv/", ".tox/",
+    ".mypy_cache/", ".pytest_cache/", ".cache/", "/AppData/Local/", "/Library/Caches/",
+    "/.mozilla/firefox/*/cache2/", "/.config/google-chrome/", "/.config/chromium/",
+]
+HIDDEN_DIR_POLICIES = ("include", "exclude")
+CASE_INSENSITIVE = os.name == "nt"
+
+
+def glob_to_regex(pattern):
+    """Translate a gitignore-style glob to a regex body matched against '/'-separated paths."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+class IgnorePattern:
+    """One compiled gitignore-style line: '!' negates, a trailing '/' only matches directories,
+    and a '/' anywhere else anchors the pattern to the index root."""
+
+    def __init__(self, line):
+        self.negated = line.startswith("!")
+        line = line[1:] if self.negated else line
+        self.dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        anchored = "/" in line
+        body = glob_to_regex(line.lstrip("/"))
+        self.source = ("^" if anchored else "(?:^|/)") + body + "$"
+        self.regex = re.compile(self.source, re.IGNORECASE if CASE_INSENSITIVE else 0)
+
+    def matches(self, relpath, is_dir):
+        return (is_dir or not self.dir_only) and self.regex.search(relpath) is not None
+
+
+class IndexRules:
+    """Exclude patterns, depth limit and hidden-directory policy, compiled once per crawl.
+
+    Paths are matched relative to the index root they live under. Without negated patterns all
+    patterns are merged into one regex for directories and one for files.
+    """
+
+    def __init__(self, roots, exclude=(), max_depth=None, hidden_dirs="include", hidden_allow=()):
+        self.roots = sorted((os.path.normpath(str(root)) for root in roots), key=len, reverse=True)
+        self.patterns = [IgnorePattern(line.strip()) for line in exclude
+                         if line.strip() and not line.lstrip().startswith("#")]
+        self.max_depth = max_depth
+        self.exclude_hidden = hidden_dirs == "exclude"
+        self.hidden_allow = frozenset(hidden_allow)
+        self._dir_regex = self._file_regex = None
+        if self.patterns and not any(pattern.negated for pattern in self.patterns):
+            flags = re.IGNORECASE if CASE_INSENSITIVE else 0
+            self._dir_regex = re.compile("|".join(p.source for p in self.patterns), flags)
+            file_patterns = [p.source for p in self.patterns if not p.dir_only]
+            self._file_regex = re.compile("|".join(file_patterns), flags) if file_patterns else None
+
+    def relative(self, path):
+        """Path relative to its index root with '/' separators ('' for a root), or None."""
+        path = os.path.normpath(path)
+        for root in self.roots:
+            if path == root:
+                return ""
+            prefix = root if root.endswith(os.sep) else root + os.sep
+            if path.startswith(prefix):
+                return path[len(prefix):].replace(os.sep, "/")
+        return None
+
+    def excluded(self, relpath, is_dir):
+        if self._dir_regex is not None or not self.patterns:
+            regex = self._dir_regex if is_dir else self._file_regex
+            return regex is not None and regex.search(relpath) is not None
+        for pattern in reversed(self.patterns):  # Last matching line wins, as in .gitignore
+            if pattern.matches(relpath, is_dir):
+                return not pattern.negated
+        return False
+
+    def prune_dir(self, relpath, name):
+        """True if the directory at ``relpath`` (relative to its root) must not be crawled."""
+        if self.max_depth is not None and relpath.count("/") + 1 > self.max_depth:
+            return True
+        if self.exclude_hidden and name.startswith(".") and name not in self.hidden_allow:
+            return True
+        return self.excluded(relpath, True)
+
+    def skip_file(self, relpath):
+        return self.excluded(relpath, False)
+
+    def prunes_path(self, path):
+        """Like prune_dir for an absolute path, also checking every ancestor below the root."""
+        relpath = self.relative(path)
+        if not relpath:
+            return relpath is None
+        parts = relpath.split("/")
+        return any(self.prune_dir("/".join(parts[:i]), parts[i - 1]) for i in range(1, len(parts) + 1))
+
+
+class IndexConfig:
+    """What to index: roots, optional per-root include lists and the ignore rules."""
+
+    def __init__(self, roots, includes=None, exclude=(), max_depth=None, hidden_dirs="include",
+                 hidden_allow=()):
+        if hidden_dirs not in HIDDEN_DIR_POLICIES:
+            raise ValueError(f"hidden_dirs must be one of {HIDDEN_DIR_POLICIES}, not {hidden_dirs!r}")
+        self.roots = [str(root) for root in roots]
+        self.includes = includes or {}
+        self.exclude = list(exclude)
+        self.max_depth = max_depth
+        self.hidden_dirs = hidden_dirs
+        self.hidden_allow = list(hidden_allow)
+
+    @property
+    def start_paths(self):
+        """Directories the crawler starts from: each root, or only its include list if it has one."""
+        paths = []
+        for root in self.roots:
+            include = self.includes.get(root)
+            if include:
+                paths.extend(os.path.join(root, sub) for sub in include)
+            else:
+                paths.append(root)
+        return paths
+
+    def rules(self):
+        return IndexRules(self.roots, self.exclude, self.max_depth, self.hidden_dirs, self.hidden_allow)
+
+    def fingerprint(self):
+        """Stable description of the scope; the index is rebuilt whenever it changes."""
+        return json.dumps({"roots": self.roots, "includes": self.includes, "exclude": self.exclude,
+                           "max_depth": self.max_depth, "hidden_dirs": self.hidden_dirs,
+                           "hidden_allow": sorted(self.hidden_allow)}, sort_keys=True)
+
+
+def load_index_config(config_path=INDEX_CONFIG_FILE):
+    """Load the crawl scope from JSON, falling back to the home directory with default excludes.
+
+    Roots are strings or {"path": ..., "include": [subdirectories]} objects; '~' is expanded.
+    """
+    try:
+        with open(config_path, "r") as config_file:
+            data = json.load(config_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        data = {}
+
+    roots, includes = [], {}
+    for root in data.get("roots") or [str(Path.home())]:
+        if isinstance(root, dict):
+            path = os.path.expanduser(root["path"])
+            if root.get("include"):
+                includes[path] = list(root["include"])
+        else:
+            path = os.path.expanduser(root)
+        roots.append(path)
+    return IndexConfig(roots, includes,
+                       exclude=data.get("exclude", DEFAULT_EXCLUDES),
+                       max_depth=data.get("max_depth"),
+                       hidden_dirs=data.get("hidden_dirs", "include"),
+                       hidden_allow=data.get("hidden_allow", ()))
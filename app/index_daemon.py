@@ -0,0 +1,293 @@
+"""Headless index service: owns the file index and answers searches over a Unix socket.
+
+Usage:
+    python -m app.index_daemon [--directory DIR] [--config FILE] [--workers N] [--no-watch]
+                               [--idle-timeout SECONDS]
+    python -m app.index_daemon --status | --reindex | --stop
+
+One daemon runs per index (files_index.db in --directory, by default the working
+directory); taskbars start it on demand through app.index_protocol.start_daemon, passing
+the index_config.json they see, and share it. It builds the index incrementally, keeps it
+current with the file system watcher and serves every client from its own thread. Once no
+client has been connected for --idle-timeout seconds it exits, and the next search starts
+it again; running taskbars hold a keep-alive connection (app.index_protocol.DaemonKeepAlive)
+so that only happens once none is left. No Qt is imported.
+"""
+import argparse
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+
+from app import instrumentation
+from app.file_indexer import index_files
+from app.fs_watcher import create_watcher
+from app.fuzzy_match import fuzzy_search
+from app.index_config import INDEX_CONFIG_FILE, load_index_config
+from app.index_protocol import (
+    DONE, ERROR, PATHS, REQUEST, SEARCH_MODES, IndexClient, IndexServiceError, daemon_supported, encode_paths, recv_frame,
+    send_frame, socket_path
+)
+from app.index_store import INDEX_DB, IndexStore
+
+FIRST_PAGE_SIZE = 200  # Default size of a search's first page, sent as soon as it is found
+PAGE_SIZE = 2000  # Default size of the following pages
+FUZZY_RESULT_LIMIT = 200  # Default number of ranked fuzzy results
+IDLE_TIMEOUT = 15 * 60  # Default seconds without any connected client before the daemon exits
+
+
+def log(message):
+    print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} [index daemon {os.getpid()}] {message}", flush=True)
+
+
+class RequestHandler(socketserver.BaseRequestHandler):
+    """Serve one client connection: requests one after another, each on this thread's store."""
+
+    def handle(self):
+        service = self.server.service
+        service.client_connected()
+        store = None
+        try:
+            while True:
+                frame = recv_frame(self.request)
+                if frame is None:
+                    return
+                kind, payload = frame
+                if kind != REQUEST:
+                    send_frame(self.request, ERROR, b"Expected a request frame")
+                    return
+                if store is None:
+                    store = IndexStore()
+                try:
+                    service.dispatch(self.request, store, json.loads(payload))
+                except (BrokenPipeError, ConnectionResetError):
+                    return  # The client went away, e.g. a search was superseded
+                except Exception as e:
+                    send_frame(self.request, ERROR, f"{type(e).__name__}: {e}".encode())
+        except (OSError, IndexServiceError):
+            pass
+        finally:
+            if store is not None:
+                store.close()
+            service.client_disconnected()
+
+
+class IndexServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def service_actions(self):
+        # Called by serve_forever between polls, about twice a second
+        super().service_actions()
+        self.service.stop_if_idle()
+
+
+class IndexDaemon:
+    """The index service: one indexing thread, plus one thread per connected client."""
+
+    def __init__(self, path, workers=None, watch=True, config_path=INDEX_CONFIG_FILE, idle_timeout=IDLE_TIMEOUT):
+        self.path = path
+        self.workers = workers
+        self.watch = watch
+        self.config = load_index_config(config_path)
+        self.idle_timeout = idle_timeout  # None or 0 keeps the daemon running until it is stopped
+        self.server = None
+        self.watcher = None
+        self.indexing = threading.Lock()  # Held while a full pass or a watcher rescan runs
+        self.started = time.time()
+        self.clients_lock = threading.Lock()
+        self.clients = 0
+        self.last_active = time.monotonic()
+        self.stopping = False
+
+    # ---- lifetime -----------------------------------------------------------------------
+
+    def acquire_lock(self):
+        """Take the per-index lock; False if another daemon already holds it."""
+        import fcntl
+        self.lock_file = open(self.path + ".lock", "w")
+        try:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.lock_file.close()
+            return False
+        return True
+
+    def serve(self):
+        if not self.acquire_lock():
+            log(f"another daemon already serves {self.path}")
+            return
+        if os.path.exists(self.path):
+            os.remove(self.path)  # Left behind by a daemon that was killed; we hold the lock now
+        self.server = IndexServer(self.path, RequestHandler)
+        self.server.service = self
+        os.chmod(self.path, 0o600)
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        signal.signal(signal.SIGINT, lambda *_: self.stop())
+        threading.Thread(target=self.index_and_watch, daemon=True).start()
+        log(f"serving {os.path.abspath(INDEX_DB)} on {self.path}")
+        try:
+            self.server.serve_forever()
+        finally:
+            if self.watcher is not None:
+                self.watcher.stop()
+            self.server.server_close()
+            os.remove(self.path)
+            self.lock_file.close()
+            log("stopped")
+
+    def stop(self):
+        # shutdown() waits for serve_forever to return, so it must not run on the serving thread
+        self.stopping = True
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+    def client_connected(self):
+        with self.clients_lock:
+            self.clients += 1
+
+    def client_disconnected(self):
+        with self.clients_lock:
+            self.clients -= 1
+            self.last_active = time.monotonic()
+
+    def stop_if_idle(self):
+        """Stop once no client has been connected for idle_timeout seconds and no pass is running."""
+        if not self.idle_timeout or self.stopping or self.indexing.locked():
+            return
+        with self.clients_lock:
+            idle = self.clients == 0 and time.monotonic() - self.last_active > self.idle_timeout
+        if idle:
+            log(f"no clients for {self.idle_timeout:g} s")
+            self.stop()
+
+    # ---- indexing -----------------------------------------------------------------------
+
+    def index_and_watch(self):
+        self.reindex()
+        if self.watch:
+            self.watcher = create_watcher(self.config, workers=self.workers, lock=self.indexing)
+            self.watcher.run()
+
+    def reindex(self):
+        """Run an incremental indexing pass unless one is already running."""
+        if not self.indexing.acquire(blocking=False):
+            return False
+        self.run_locked_pass()
+        return True
+
+    def run_locked_pass(self):
+        """Run an incremental indexing pass; the caller acquired the indexing lock for it."""
+        try:
+            started = time.perf_counter()
+            generation = index_files(workers=self.workers, config=self.config)
+            log(f"File indexing completed: generation {generation} in {time.perf_counter() - started:.1f} s")
+        finally:
+            self.indexing.release()
+
+    # ---- requests -----------------------------------------------------------------------
+
+    def dispatch(self, sock, store, request):
+        op = request.get("op")
+        instrumentation.count(f"daemon.requests.{op}")
+        if op == "search":
+            self.search(sock, store, request)
+            return
+        if op == "status":
+            with IndexStore() as current:  # A long-lived connection's generation is the one it opened with
+                generation = current.generation
+            reply = {"pid": os.getpid(), "index": os.path.abspath(store.db_path), "files": store.file_count(),
+                     "generation": generation, "indexing": self.indexing.locked(),
+                     "uptime": round(time.time() - self.started, 1)}
+        elif op == "launch":
+            store.record_launch(request["path"], request.get("timestamp", time.time()))
+            reply = {}
+        elif op == "ping":
+            reply = {"pid": os.getpid()}
+        elif op == "reindex":
+            acquired = self.indexing.acquire(blocking=False)
+            reply = {"already_running": not acquired}
+            if acquired:
+                threading.Thread(target=self.run_locked_pass, daemon=True).start()
+        elif op == "metrics":
+            reply = instrumentation.snapshot()
+        elif op == "shutdown":
+            reply = {}
+            self.stop()
+        else:
+            raise ValueError(f"Unknown request {op!r}")
+        send_frame(sock, DONE, json.dumps(reply).encode())
+
+    def search(self, sock, store, request):
+        """Stream the results of one query; a client that disconnects ends it at the next page."""
+        term = request["term"].strip().lower()
+        mode = request.get("mode") or "Substring"
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode {mode!r}")
+        total = 0
+        with instrumentation.timed(f"daemon.search.{mode.lower()}"):
+            if mode == "Fuzzy":
+                ranked = fuzzy_search(store, term, request.get("limit") or FUZZY_RESULT_LIMIT)
+                total = len(ranked)
+                if ranked:
+                    send_frame(sock, PATHS, encode_paths(path for _, path in ranked))
+            elif term:
+                page_size = request.get("page_size") or PAGE_SIZE
+                page = []
+                limit = request.get("limit")
+                for paths in store.iter_substring(term, batch_size=request.get("first_page") or FIRST_PAGE_SIZE):
+                    if limit is not None:
+                        paths = paths[:limit - total - len(page)]
+                    page.extend(paths)
+                    # The first small page goes out on its own so it is shown without delay
+                    if total == 0 or len(page) >= page_size:
+                        send_frame(sock, PATHS, encode_paths(page))
+                        total += len(page)
+                        page = []
+                    if limit is not None and total + len(page) >= limit:
+                        break
+                if page:
+                    send_frame(sock, PATHS, encode_paths(page))
+                    total += len(page)
+        send_frame(sock, DONE, json.dumps({"total": total, "indexing": self.indexing.locked()}).encode())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--directory", default=None, help="directory holding files_index.db")
+    parser.add_argument("--config", default=INDEX_CONFIG_FILE,
+                        help="index scope, relative to the working directory the daemon is started from "
+                             "rather than to --directory (default: index_config.json)")
+    parser.add_argument("--workers", type=int, default=None, help="crawler threads (default: from the CPU count)")
+    parser.add_argument("--no-watch", action="store_true", help="index once, then only serve queries")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help=f"exit after this many seconds without clients, 0 for never (default: {IDLE_TIMEOUT})")
+    parser.add_argument("--status", action="store_true", help="print the running daemon's status")
+    parser.add_argument("--reindex", action="store_true", help="ask the running daemon for an indexing pass")
+    parser.add_argument("--stop", action="store_true", help="stop the running daemon")
+    args = parser.parse_args(argv)
+
+    if not daemon_supported():
+        print("Unix domain sockets are not available on this platform", file=sys.stderr)
+        return 1
+    config_path = os.path.abspath(args.config)  # Relative to the caller, not to --directory
+    if args.directory:
+        os.chdir(args.directory)  # The index and the daemon log are relative paths
+    path = socket_path()
+    for requested, op in ((args.status, "status"), (args.reindex, "reindex"), (args.stop, "shutdown")):
+        if requested:
+            try:
+                with IndexClient(path) as client:
+                    print(json.dumps(client.request(op), indent=2))
+            except OSError:
+                print("No index daemon is running for this directory", file=sys.stderr)
+                return 1
+            return 0
+    IndexDaemon(path, workers=args.workers, watch=not args.no_watch, config_path=config_path,
+                idle_timeout=args.idle_timeout).serve()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.index_config import INDEX_CONFIG_FILE
+from app.index_store import INDEX_DB
+
+# Every frame is a kind byte and a payload length, followed by the payload
+HEADER = struct.Struct("!BI")
+REQUEST = 1  # JSON object with an "op" and its arguments
+PATHS = 2  # A page of results: file system paths joined by NUL bytes
+DONE = 3  # JSON object ending a reply
+ERROR = 4  # UTF-8 message ending a reply
+
+MAX_FRAME_BYTES = 64 * 2**20  # Larger frames mean a corrupt stream
+CONNECT_TIMEOUT = 2.0  # Default seconds for connecting and for each reply frame but search pages
+DAEMON_START_TIMEOUT = 5.0  # Seconds to wait for a spawned daemon to accept connections
+DAEMON_LOG = "index_daemon.log"  # Output of a spawned daemon, next to the index
+KEEPALIVE_TIMEOUT = 0.25  # Seconds a keep-alive ping may block its (GUI) thread
+
+SEARCH_MODES = ["Substring", "Fuzzy"]  # Modes a search request may ask for
+
+
+class IndexServiceError(Exception):
+    """The index daemon answered a request with an error."""
+
+
+def daemon_supported():
+    return hasattr(socket, "AF_UNIX")
+
+
+def socket_path(directory=None):
+    """Socket of the daemon that owns ``directory``'s index (default: the working directory).
+
+    The socket lives in the per-user runtime directory, named after the index database's
+    absolute path, so every taskbar working on the same index finds the same daemon.
+    """
+    db_path = os.path.abspath(os.path.join(directory or os.getcwd(), INDEX_DB))
+    digest = hashlib.blake2b(db_path.encode("utf-8", "surrogateescape"), digest_size=8).hexdigest()
+    user = os.getuid() if hasattr(os, "getuid") else os.getenv("USERNAME", "user")
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"wsm_index_{user}_{digest}.sock")
+
+
+# ---- framing ------------------------------------------------------------------------------
+
+def send_frame(sock, kind, payload):
+    sock.sendall(HEADER.pack(kind, len(payload)) + payload)
+
+
+def recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 2**20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock):
+    """Return (kind, payload), or None once the peer has closed the connection."""
+    header = recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    kind, size = HEADER.unpack(header)
+    if size > MAX_FRAME_BYTES:
+        raise IndexServiceError(f"Frame of {size} bytes is too large")
+    payload = recv_exact(sock, size) if size else b""
+    if payload is None:
+        return None
+    return kind, payload
+
+
+def encode_paths(paths):
+    return b"\0".join(os.fsencode(path) for path in paths)
+
+
+def decode_paths(payload):
+    return [os.fsdecode(path) for path in payload.split(b"\0")] if payload else []
+
+
+# ---- client -------------------------------------------------------------------------------
+
+class IndexClient:
+    """Connection to the index daemon; one request at a time, from one thread.
+
+    ``abort`` may be called from any other thread to end a search that is being streamed.
+    """
+
+    def __init__(self, path=None, timeout=CONNECT_TIMEOUT):
+        self.path = path or socket_path()
+        self.timeout = timeout  # Seconds for connecting and for each reply frame but search pages
+        self.sock = None
+        self.last_reply = None  # DONE object of the last search
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def connect(self):
+        if self.sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self.sock = sock
+        return self.sock
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def abort(self):
+        sock = self.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def send(self, op, **arguments):
+        send_frame(self.connect(), REQUEST, json.dumps({"op": op, **arguments}).encode())
+
+    def frames(self):
+        """Yield (kind, payload) up to the end of a reply; PATHS frames may precede its end."""
+        while True:
+            frame = recv_frame(self.sock)
+            if frame is None:
+                self.close()
+                raise ConnectionError("The index daemon closed the connection")
+            kind, payload = frame
+            if kind == ERROR:
+                raise IndexServiceError(payload.decode("utf-8", "replace"))
+            yield kind, payload
+            if kind == DONE:
+                return
+
+    def request(self, op, **arguments):
+        """Send a request and return the DONE object ending its reply."""
+        self.send(op, **arguments)
+        for kind, payload in self.frames():
+            if kind == DONE:
+                return json.loads(payload)
+
+    def search(self, term, mode="Substring", limit=None, first_page=None, page_size=None):
+        """Yield pages of matching paths as the daemon streams them; returns the DONE object.
+
+        Substring results come in pages of ``page_size`` after a first page of ``first_page``;
+        fuzzy results come ranked, best first, in one page of at most ``limit``.
+        """
+        self.send("search", term=term, mode=mode, limit=limit, first_page=first_page, page_size=page_size)
+        self.sock.settimeout(None)  # A page may take as long as the query does
+        try:
+            for kind, payload in self.frames():
+                if kind == PATHS:
+                    yield decode_paths(payload)
+                elif kind == DONE:
+                    self.last_reply = json.loads(payload)
+                    return self.last_reply
+        finally:
+            if self.sock is not None:
+                self.sock.settimeout(self.timeout)
+
+    def ping(self):
+        return self.request("ping")
+
+    def status(self):
+        return self.request("status")
+
+    def record_launch(self, path):
+        return self.request("launch", path=path, timestamp=time.time())
+
+    def reindex(self):
+        return self.request("reindex")
+
+    def metrics(self):
+        return self.request("metrics")
+
+    def shutdown(self):
+        return self.request("shutdown")
+
+
+# ---- starting the daemon ------------------------------------------------------------------
+
+def daemon_running(path=None):
+    try:
+        with IndexClient(path) as client:
+            client.connect()
+        return True
+    except OSError:
+        return False
+
+
+def daemon_command():
+    """Command line that starts the daemon, from a PyInstaller bundle as well as from source."""
+    if getattr(sys, "frozen", False):
+        return [sys.executable, "--index-daemon"]
+    return [sys.executable, "-m", "app.index_daemon"]
+
+
+def start_daemon(directory=None, wait=0.0, config_path=INDEX_CONFIG_FILE):
+    """Start the daemon for ``directory``'s index unless one is running already.
+
+    Returns whether it accepts connections within ``wait`` seconds; with the default of 0 the
+    daemon is only spawned. It crawls the scope of ``config_path`` as resolved here, in the
+    caller's working directory, rather than one found in ``directory``. It runs in its own
+    session, so it outlives the taskbar that started it and serves the next one; it exits once
+    no client has been connected for app.index_daemon.IDLE_TIMEOUT. Two taskbars racing here
+    is harmless: the second daemon finds the first one's lock and exits.
+    """
+    directory = os.path.abspath(directory or os.getcwd())
+    path = socket_path(directory)
+    if daemon_running(path):
+        return True
+    environment = dict(os.environ)
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, environment.get("PYTHONPATH")]))
+    with open(os.path.join(directory, DAEMON_LOG), "ab") as log:
+        command = daemon_command() + ["--directory", directory, "--config", os.path.abspath(config_path)]
+        subprocess.Popen(command, cwd=directory, env=environment, stdin=subprocess.DEVNULL, stdout=log,
+                         stderr=subprocess.STDOUT, start_new_session=True)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if daemon_running(path):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class DaemonKeepAlive:
+    """Connection a running app holds to the daemon, so the daemon never exits as idle while
+    the app is open.
+
+    ``check`` is meant to be called periodically, well within the daemon's idle timeout: it
+    pings the daemon over the held connection and, once the daemon has gone away, starts a new
+    one and connects to it on a later call.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = os.path.abspath(directory or os.getcwd())
+        self.client = None
+
+    def check(self):
+        """Return whether the daemon answered; never waits for a spawned daemon to come up."""
+        if self.client is not None:
+            try:
+                self.client.ping()
+                return True
+            except (OSError, IndexServiceError):
+                self.close()
+        if not start_daemon(self.directory):
+            return False
+        client = IndexClient(socket_path(self.directory), timeout=KEEPALIVE_TIMEOUT)
+        try:
+            client.ping()
+        except (OSError, IndexServiceError):
+            client.close()
+            return False
+        self.client = client
+        return True
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
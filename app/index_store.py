@@ -0,0 +1,371 @@
+import os
+import sqlite3
+
+INDEX_DB = "files_index.db"
+SCHEMA_VERSION = 3
+COMMIT_EVERY = 1000  # Directories written per transaction while crawling
+RARITY_SAMPLE = 10000  # Posting list length beyond which trigrams count as equally common
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS dirs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER,
+    inode INTEGER,
+    depth INTEGER NOT NULL DEFAULT 0,
+    generation INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS names (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    name_lower TEXT NOT NULL,
+    ext TEXT NOT NULL,
+    char_mask INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS files (
+    dir_id INTEGER NOT NULL,
+    name_id INTEGER NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    mtime INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS launches (
+    path TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    last_launch INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS name_trigrams (
+    trigram TEXT NOT NULL,
+    name_id INTEGER NOT NULL,
+    PRIMARY KEY (trigram, name_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS dirs_generation ON dirs (generation);
+CREATE INDEX IF NOT EXISTS names_name_lower ON names (name_lower);
+CREATE INDEX IF NOT EXISTS names_ext ON names (ext);
+CREATE INDEX IF NOT EXISTS files_name_id ON files (name_id);
+CREATE INDEX IF NOT EXISTS files_dir_id ON files (dir_id);
+"""
+
+
+def split_extension(name_lower):
+    """Return the lowercase extension including the dot ('' for none, dotfiles have none)."""
+    return os.path.splitext(name_lower)[1]
+
+
+def char_mask(text):
+    """Bitmask of the characters in ``text``, so names lacking a query character can be skipped
+    with one integer test. Letters and digits get their own bit, everything else shares bits."""
+    mask = 0
+    for char in text:
+        if "a" <= char <= "z":
+            mask |= 1 << (ord(char) - 97)
+        elif "0" <= char <= "9":
+            mask |= 1 << (ord(char) - 22)
+        elif not char.isspace():
+            mask |= 1 << (36 + ord(char) % 26)
+    return mask
+
+
+def trigrams(text):
+    """Distinct three-character substrings of ``text``, in order of first appearance."""
+    return list(dict.fromkeys(text[i:i + 3] for i in range(len(text) - 2)))
+
+
+class IndexStore:
+    """SQLite-backed file index that is queried on disk instead of being loaded into memory.
+
+    Directory paths and file names are each stored once; a file row only links the two.
+    Lowercased names are split into trigrams at insert time, so substring searches intersect
+    trigram posting lists instead of scanning every name.
+    Each connection must stay on the thread that opened it, so readers and the indexer
+    open their own store.
+    """
+
+    def __init__(self, db_path=INDEX_DB):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")  # Searches keep working while the indexer writes
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        schema_version = self._get_meta("schema_version")
+        if schema_version != str(SCHEMA_VERSION):
+            # Only touch the schema when needed, so readers never contend for the write lock
+            if schema_version is not None:
+                self._drop_tables()
+            self.conn.executescript(SCHEMA)
+            self._set_meta("schema_version", SCHEMA_VERSION)
+            self.conn.commit()
+        self._name_ids = {}
+        self._pending_writes = 0
+        self._changed = 0
+        self.generation = int(self._get_meta("generation") or 0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    # ---- metadata -------------------------------------------------------------------------
+
+    def _get_meta(self, key):
+        try:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        except sqlite3.OperationalError:  # Fresh database without tables yet
+            return None
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _drop_tables(self):
+        for table in ("name_trigrams", "files", "names", "dirs", "meta", "launches"):
+            self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+    @property
+    def scope(self):
+        """Fingerprint of the IndexConfig this index was built for."""
+        return self._get_meta("scope")
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM dirs LIMIT 1").fetchone() is None
+
+    def reset(self, scope):
+        """Forget everything indexed so far and start over for a new scope."""
+        self.conn.execute("DELETE FROM files")
+        self.conn.execute("DELETE FROM name_trigrams")
+        self.conn.execute("DELETE FROM names")
+        self.conn.execute("DELETE FROM dirs")
+        self._set_meta("scope", scope)
+        self.conn.commit()
+        self._name_ids.clear()
+
+    # ---- writing --------------------------------------------------------------------------
+
+    def load_directory_signatures(self):
+        """Return dirpath -> (signature, subdirs) for the crawler's incremental mode."""
+        previous = {}
+        for path, mtime_ns, inode in self.conn.execute("SELECT path, mtime_ns, inode FROM dirs"):
+            previous[path] = ((mtime_ns, inode), [])
+        for path, (signature, _) in previous.items():
+            parent = previous.get(os.path.dirname(path))
+            if parent is not None and parent is not previous[path]:
+                parent[1].append((os.path.basename(path), signature))
+        return previous
+
+    def begin_generation(self):
+        """Start a new indexing pass; directories not recorded during it are purged at the end."""
+        self.generation += 1
+        self._set_meta("generation", self.generation)
+        self.conn.commit()
+        self._changed = 0
+        return self.generation
+
+    def record_directory(self, dirpath, signature, files):
+        """Record a crawled directory. ``files`` holds (name, size, mtime) tuples, or is None
+        when the directory's listing is unchanged and its rows are kept."""
+        mtime_ns, inode = signature
+        cursor = self.conn.execute(
+            "UPDATE dirs SET mtime_ns = ?, inode = ?, generation = ? WHERE path = ?",
+            (mtime_ns, inode, self.generation, dirpath))
+        if cursor.rowcount:
+            dir_id = self.conn.execute("SELECT id FROM dirs WHERE path = ?", (dirpath,)).fetchone()[0]
+        else:
+            dir_id = self.conn.execute(
+                "INSERT INTO dirs (path, mtime_ns, inode, depth, generation) VALUES (?, ?, ?, ?, ?)",
+                (dirpath, mtime_ns, inode, dirpath.count(os.sep), self.generation)).lastrowid
+            if files is None:
+                files = []
+
+        if files is not None:
+            self._changed += 1
+            self.conn.execute("DELETE FROM files WHERE dir_id = ?", (dir_id,))
+            self.conn.executemany("INSERT INTO files (dir_id, name_id, size, mtime) VALUES (?, ?, ?, ?)",
+                                  [(dir_id, self._name_id(name), size, mtime) for name, size, mtime in files])
+
+        self._pending_writes += 1
+        if self._pending_writes >= COMMIT_EVERY:
+            self.conn.commit()
+            self._pending_writes = 0
+
+    def update_file_stats(self, path, size, mtime):
+        """Set the size and mtime of one indexed file, e.g. after it was written in place, which
+        leaves its directory's signature alone. Returns False if the file is not indexed."""
+        dirpath, name = os.path.split(path)
+        return self.conn.execute(
+            "UPDATE files SET size = ?, mtime = ? WHERE dir_id = (SELECT id FROM dirs WHERE path = ?) "
+            "AND name_id = (SELECT id FROM names WHERE name = ?)", (size, mtime, dirpath, name)).rowcount > 0
+
+    def _name_id(self, name):
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            row = self.conn.execute("SELECT id FROM names WHERE name = ?", (name,)).fetchone()
+            if row:
+                name_id = row[0]
+            else:
+                name_lower = name.lower()
+                name_id = self.conn.execute(
+                    "INSERT INTO names (name, name_lower, ext, char_mask) VALUES (?, ?, ?, ?)",
+                    (name, name_lower, split_extension(name_lower), char_mask(name_lower))).lastrowid
+                self.conn.executemany("INSERT INTO name_trigrams (trigram, name_id) VALUES (?, ?)",
+                                      [(trigram, name_id) for trigram in trigrams(name_lower)])
+            self._name_ids[name] = name_id
+        return name_id
+
+    def finish_generation(self):
+        """Purge directories that were not seen in this pass. Returns True if anything changed."""
+        stale = "SELECT id FROM dirs WHERE generation < ?"
+        self.conn.execute(f"DELETE FROM files WHERE dir_id IN ({stale})", (self.generation,))
+        removed = self.conn.execute("DELETE FROM dirs WHERE generation < ?", (self.generation,)).rowcount
+        if self._changed or removed:
+            self.conn.execute("DELETE FROM names WHERE id NOT IN (SELECT name_id FROM files)")
+            self.conn.execute("DELETE FROM name_trigrams WHERE name_id NOT IN (SELECT id FROM names)")
+            self._name_ids.clear()
+        self.conn.commit()
+        self._pending_writes = 0
+        return bool(self._changed or removed)
+
+    def commit(self):
+        self.conn.commit()
+        self._pending_writes = 0
+
+    def rollback(self):
+        """Discard the uncommitted writes, e.g. after the database was locked by another writer."""
+        self.conn.rollback()
+        self._pending_writes = 0
+        self._name_ids.clear()  # Names inserted by the discarded transaction are gone again
+
+    def _subtree_condition(self, path):
+        """WHERE clause matching ``path`` and every directory below it, using the path index."""
+        prefix = path.rstrip(os.sep) + os.sep
+        return "path = ? OR (path >= ? AND path < ?)", (path, prefix, prefix[:-1] + chr(ord(os.sep) + 1))
+
+    def subtree_paths(self, path):
+        where, params = self._subtree_condition(path)
+        return [row[0] for row in self.conn.execute(f"SELECT path FROM dirs WHERE {where}", params)]
+
+    def remove_directory_tree(self, path):
+        """Drop a directory and everything indexed below it, e.g. after it was deleted or moved."""
+        where, params = self._subtree_condition(path)
+        self.conn.execute(f"DELETE FROM files WHERE dir_id IN (SELECT id FROM dirs WHERE {where})", params)
+        removed = self.conn.execute(f"DELETE FROM dirs WHERE {where}", params).rowcount
+        self._changed += removed
+        return removed
+
+    def directory_paths(self):
+        """Indexed directory paths, shallowest first, so parents come before their children and
+        a limited watch budget goes to the top levels of the tree rather than to short names."""
+        return [row[0] for row in self.conn.execute("SELECT path FROM dirs ORDER BY depth, path")]
+
+    # ---- queries --------------------------------------------------------------------------
+
+    def _paths(self, query, params, limit):
+        if limit is not None:
+            query += " LIMIT ?"
+            params = (*params, limit)
+        return [os.path.join(dirpath, name) for dirpath, name in self.conn.execute(query, params)]
+
+    def _iter_paths(self, query, params, batch_size):
+        cursor = self.conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [os.path.join(dirpath, name) for dirpath, name in rows]
+
+    @staticmethod
+    def _names_query(where):
+        return ("SELECT d.path, n.name FROM names n JOIN files f ON f.name_id = n.id "
+                "JOIN dirs d ON d.id = f.dir_id WHERE " + where)
+
+    def _substring_query(self, term):
+        """Terms of three or more characters only visit names in the posting list of their
+        rarest trigram; shorter terms fall back to scanning the precomputed lowercase names."""
+        term = term.lower()
+        term_trigrams = trigrams(term)
+        if not term_trigrams:
+            return self._names_query("instr(n.name_lower, ?) > 0"), (term,)
+        rarest = min(term_trigrams, key=self._trigram_frequency)
+        # The rest of the term is verified on the candidates' precomputed lowercase names
+        query = ("SELECT d.path, n.name FROM name_trigrams t JOIN names n ON n.id = t.name_id "
+                 "JOIN files f ON f.name_id = n.id JOIN dirs d ON d.id = f.dir_id "
+                 "WHERE t.trigram = ? AND instr(n.name_lower, ?) > 0")
+        return query, (rarest, term)
+
+    def search_substring(self, term, limit=None):
+        """Paths of files whose name contains ``term`` (case-insensitive)."""
+        return self._paths(*self._substring_query(term), limit)
+
+    def iter_substring(self, term, batch_size=1000):
+        """Like search_substring, but yields the paths in lists of up to ``batch_size``."""
+        return self._iter_paths(*self._substring_query(term), batch_size)
+
+    def interrupt(self):
+        """Abort the query running on this store; safe to call from any thread."""
+        self.conn.interrupt()
+
+    def _trigram_frequency(self, trigram):
+        """Length of a trigram's posting list, counted only up to RARITY_SAMPLE entries."""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM name_trigrams WHERE trigram = ? LIMIT ?)",
+            (trigram, RARITY_SAMPLE)).fetchone()[0]
+
+    def search_prefix(self, prefix, limit=None):
+        """Paths of files whose name starts with ``prefix`` (case-insensitive), using the index."""
+        prefix = prefix.lower()
+        return self._paths(self._names_query("n.name_lower >= ? AND n.name_lower < ?"),
+                           (prefix, prefix + "\U0010ffff"), limit)
+
+    def search_extension(self, extension, limit=None):
+        """Paths of files with the given extension, e.g. '.txt'."""
+        extension = extension.lower()
+        if not extension.startswith("."):
+            extension = "." + extension
+        return self._paths(self._names_query("n.ext = ?"), (extension,), limit)
+
+    def names_with_chars(self, mask):
+        """(name_id, name_lower) of every name containing all characters of ``mask``."""
+        return self.conn.execute("SELECT id, name_lower FROM names WHERE (char_mask & ?) = ?", (mask, mask))
+
+    def files_for_names(self, name_ids):
+        """(name_id, path, depth, mtime) of every file carrying one of the given names."""
+        placeholders = ", ".join("?" * len(name_ids))
+        return [(name_id, os.path.join(dirpath, name), depth, mtime)
+                for name_id, dirpath, name, depth, mtime in self.conn.execute(
+                    "SELECT f.name_id, d.path, n.name, d.depth, f.mtime FROM files f "
+                    "JOIN dirs d ON d.id = f.dir_id JOIN names n ON n.id = f.name_id "
+                    f"WHERE f.name_id IN ({placeholders})", name_ids)]
+
+    def record_launch(self, path, timestamp):
+        """Count a file being opened from search; launch frequency feeds the fuzzy ranking."""
+        self.conn.execute(
+            "INSERT INTO launches (path, count, last_launch) VALUES (?, 1, ?) "
+            "ON CONFLICT(path) DO UPDATE SET count = count + 1, last_launch = excluded.last_launch",
+            (path, int(timestamp)))
+        self.conn.commit()
+
+    def launch_counts(self):
+        return dict(self.conn.execute("SELECT path, count FROM launches"))
+
+    def file_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def iter_same_size_files(self, min_size=1):
+        """Yield (size, paths) for every file size of at least ``min_size`` shared by two or more
+        indexed files, largest first: the duplicate candidates the crawler's stat data gives."""
+        cursor = self.conn.execute(
+            "SELECT f.size, d.path, n.name FROM files f "
+            "JOIN dirs d ON d.id = f.dir_id JOIN names n ON n.id = f.name_id "
+            "WHERE f.size IN (SELECT size FROM files WHERE size >= ? GROUP BY size HAVING COUNT(*) > 1) "
+            "ORDER BY f.size DESC", (min_size,))
+        group_size, paths = None, []
+        for size, dirpath, name in cursor:
+            if size != group_size:
+                if len(paths) > 1:
+                    yield group_size, paths
+                group_size, paths = size, []
+            paths.append(os.path.join(dirpath, name))
+        if len(paths) > 1:
+            yield group_size, paths
@@ -0,0 +1,195 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DIAGNOSTICS_DIR = "diagnostics"  # Exports, CPU profiles and memory snapshots are written here
+BUCKETS_PER_DOUBLING = 4  # Histogram resolution: percentiles are within ~19% of the true value
+PROFILE_TOP_FUNCTIONS = 40  # Functions listed in a CPU profile's text summary
+MEMORY_TOP_LINES = 50  # Allocation sites listed in a memory snapshot
+MEMORY_TRACE_FRAMES = 5  # Stack depth tracemalloc records per allocation
+
+_lock = threading.Lock()
+_counters = {}  # name -> int
+_histograms = {}  # name -> Histogram
+_started = time.time()
+_profiler = None  # Running cProfile.Profile
+
+
+class Histogram:
+    """Log-bucketed distribution of one measurement: count, total, min, max and percentiles.
+
+    Values land in buckets BUCKETS_PER_DOUBLING per power of two, so recording is O(1) and the
+    memory use does not grow with the number of samples.
+    """
+
+    def __init__(self, unit):
+        self.unit = unit
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.last = 0.0
+        self.buckets = {}  # bucket index -> samples
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.last = value
+        index = math.floor(math.log2(value) * BUCKETS_PER_DOUBLING) if value > 0 else None
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the ``fraction`` quantile, clamped to [min, max]."""
+        rank = fraction * self.count
+        seen = 0
+        for index in sorted(self.buckets, key=lambda i: -math.inf if i is None else i):
+            seen += self.buckets[index]
+            if seen >= rank:
+                upper = 0.0 if index is None else 2 ** ((index + 1) / BUCKETS_PER_DOUBLING)
+                return min(max(upper, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        return {"unit": self.unit, "count": self.count, "total": self.total, "mean": self.total / self.count,
+                "min": self.min, "p50": self.percentile(0.5), "p90": self.percentile(0.9),
+                "p99": self.percentile(0.99), "max": self.max, "last": self.last}
+
+
+# ---- recording ----------------------------------------------------------------------------
+
+def count(name, amount=1):
+    """Add ``amount`` to the counter ``name``."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def observe(name, value, unit=""):
+    """Record one sample of ``name`` (a size, a result count...) in its histogram."""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram(unit)
+        histogram.add(value)
+
+
+def record_time(name, seconds):
+    observe(name, seconds * 1000, "ms")
+
+
+@contextmanager
+def timed(name):
+    """Time the enclosed block into the ``name`` histogram, in milliseconds.
+
+    The block is recorded even when it raises, so slow failures show up too.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_time(name, time.perf_counter() - start)
+
+
+def snapshot():
+    """Counters and histogram summaries recorded so far, safe to read from any thread."""
+    with _lock:
+        return {
+            "since": _started,
+            "taken": time.time(),
+            "counters": dict(_counters),
+            "histograms": {name: histogram.summary() for name, histogram in _histograms.items()},
+        }
+
+
+def reset():
+    global _started
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _started = time.time()
+
+
+# ---- export and on-demand profiling -------------------------------------------------------
+
+def _output_path(prefix, extension, directory):
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}.{extension}")
+
+
+def export_snapshot(directory=DIAGNOSTICS_DIR):
+    """Write the current snapshot as JSON for offline analysis; returns the file's path."""
+    path = _output_path("metrics", "json", directory)
+    with open(path, "w") as export_file:
+        json.dump(snapshot(), export_file, indent=2)
+    return path
+
+
+def cpu_profile_running():
+    return _profiler is not None
+
+
+def start_cpu_profile():
+    """Start profiling the calling thread (the GUI thread, where the taskbar spends its time).
+
+    Worker threads are not covered: cProfile only hooks the thread that enables it.
+    """
+    global _profiler
+    if _profiler is not None:
+        return
+    import cProfile
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+
+
+def stop_cpu_profile(directory=DIAGNOSTICS_DIR):
+    """Stop profiling and save the raw .prof (for pstats or snakeviz) next to a text summary
+    of the top PROFILE_TOP_FUNCTIONS functions by cumulative time; returns the summary's path."""
+    global _profiler
+    if _profiler is None:
+        return None
+    profiler, _profiler = _profiler, None
+    profiler.disable()
+    import io
+    import pstats
+    path = _output_path("cpu_profile", "prof", directory)
+    profiler.dump_stats(path)
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+    summary_path = path[:-len(".prof")] + ".txt"
+    with open(summary_path, "w") as summary_file:
+        summary_file.write(summary.getvalue())
+    return summary_path
+
+
+def memory_trace_running():
+    import tracemalloc
+    return tracemalloc.is_tracing()
+
+
+def start_memory_trace():
+    """Start tracing allocations; until a snapshot is taken they cost some speed and memory."""
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(MEMORY_TRACE_FRAMES)
+
+
+def take_memory_snapshot(directory=DIAGNOSTICS_DIR, stop=True):
+    """Write the MEMORY_TOP_LINES largest allocation sites since tracing started; returns the
+    file's path. Tracing is stopped afterwards unless ``stop`` is False."""
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    statistics = tracemalloc.take_snapshot().statistics("lineno")
+    if stop:
+        tracemalloc.stop()
+    path = _output_path("memory", "txt", directory)
+    with open(path, "w") as snapshot_file:
+        snapshot_file.write(f"Traced memory: {current / 2**20:.1f} MB now, {peak / 2**20:.1f} MB peak\n\n")
+        for statistic in statistics[:MEMORY_TOP_LINES]:
+            snapshot_file.write(f"{statistic}\n")
+    return path
@@ -0,0 +1,237 @@
+import codecs
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+
+from PyQt5.QtWidgets import QAbstractScrollArea
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtGui import QFontDatabase, QFontMetrics, QPainter, QPalette
+
+LARGE_FILE_THRESHOLD = 4 * 2**20  # Bytes; larger files open in the read-only viewer
+SNIFF_BYTES = 64 * 2**10  # First chunk used for encoding and binary detection
+BLOCK_SIZE = 64 * 2**10  # Granularity of the line index
+PROGRESS_EVERY = 256  # Blocks indexed between progress signals (16 MiB)
+MAX_LINE_BYTES = 8 * 2**10  # Bytes of a line that get decoded and painted
+HEX_WIDTH = 16  # Bytes per row in hex mode
+BINARY_CONTROL_RATIO = 0.3
+TEXT_CONTROL_BYTES = frozenset(b"\t\n\r\f\b\x1b")
+
+
+def sniff_encoding(chunk):
+    """Guess a file's encoding from its first chunk; None means it should be treated as binary."""
+    if chunk.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if chunk.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    if b"\0" in chunk:
+        return None
+    try:
+        # Incremental so a multi-byte character cut off at the end of the chunk is not an error
+        codecs.getincrementaldecoder("utf-8")().decode(chunk, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    control = sum(1 for byte in chunk if byte < 32 and byte not in TEXT_CONTROL_BYTES)
+    if chunk and control / len(chunk) > BINARY_CONTROL_RATIO:
+        return None
+    return "cp1252"
+
+
+def sniff_file(file_path):
+    """Return (size, encoding) for a file, reading only its first chunk."""
+    with open(file_path, "rb") as file:
+        chunk = file.read(SNIFF_BYTES)
+        size = os.fstat(file.fileno()).st_size
+    return size, sniff_encoding(chunk)
+
+
+def is_ascii_compatible(encoding):
+    """Whether b"\\n" is a line break in this encoding, so the line index applies."""
+    return encoding is not None and "\n".encode(encoding).endswith(b"\n") and len("\n".encode(encoding)) == 1
+
+
+class LineIndexer(QThread):
+    """Count the newlines of a mapped file block by block in the background.
+
+    ``newlines_before[i]`` is the number of newlines in the first ``i`` blocks, which is all
+    the viewer needs to find any line: it bisects to the block and scans at most one block.
+    """
+    progress = pyqtSignal(int)
+
+    def __init__(self, mapped, parent=None):
+        super().__init__(parent)
+        self.mapped = mapped
+        self.newlines_before = array("Q", [0])
+        self.done = False
+
+    def run(self):
+        mapped = self.mapped
+        size = len(mapped)
+        count = 0
+        for block, start in enumerate(range(0, size, BLOCK_SIZE), 1):
+            if self.isInterruptionRequested():
+                return
+            count += mapped[start:start + BLOCK_SIZE].count(b"\n")
+            self.newlines_before.append(count)
+            if block % PROGRESS_EVERY == 0:
+                self.progress.emit(count)
+        self.done = True
+        self.progress.emit(count)
+
+
+class LargeFileViewer(QAbstractScrollArea):
+    """Read-only viewer that memory-maps a file and paints only the lines on screen.
+
+    Text files are shown line by line once the first blocks are indexed, so even multi-GB files
+    are scrollable immediately while the LineIndexer finishes in the background. Binary files
+    (and encodings where a newline is not a single byte) are shown as a hex dump, which needs
+    no index at all.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.viewport().setBackgroundRole(QPalette.Base)
+        self.file_path = None
+        self.file = None
+        self.mapped = None
+        self.encoding = None
+        self.indexer = None
+        self.line_count = 0
+        self.widest_line = 0
+
+    # ---- opening --------------------------------------------------------------------------
+
+    def open_file(self, file_path, encoding):
+        """Map ``file_path`` for viewing; ``encoding`` None shows it as a hex dump."""
+        self.close_file()
+        self.file = open(file_path, "rb")
+        self.file_path = file_path
+        self.encoding = encoding if is_ascii_compatible(encoding) else None
+        size = os.fstat(self.file.fileno()).st_size
+        if size:
+            self.mapped = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mapped is None:
+            self.line_count = 0
+        elif self.encoding is None:
+            self.line_count = -(-size // HEX_WIDTH)
+        else:
+            self.indexer = LineIndexer(self.mapped, self)
+            self.indexer.progress.connect(self.on_index_progress)
+            self.indexer.start()
+            self.line_count = 1
+        self.widest_line = 0
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self.update_scrollbars()
+        self.viewport().update()
+
+    def close_file(self):
+        if self.indexer is not None:
+            self.indexer.requestInterruption()
+            self.indexer.wait()
+            self.indexer = None
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.file_path = None
+        self.line_count = 0
+
+    def on_index_progress(self, newline_count):
+        if self.sender() is not self.indexer:
+            return
+        size = len(self.mapped)
+        ends_with_newline = self.indexer.done and self.mapped[size - 1:size] == b"\n"
+        self.line_count = newline_count + (0 if ends_with_newline else 1)
+        self.update_scrollbars()
+        self.viewport().update()
+
+    # ---- locating lines -------------------------------------------------------------------
+
+    def line_start(self, line):
+        """Byte offset where ``line`` (0-based) starts, using the block index."""
+        if line == 0:
+            return 0
+        newlines_before = self.indexer.newlines_before
+        # The line starts right after the line-th newline, which lies in this block
+        block = bisect_left(newlines_before, line) - 1
+        position = block * BLOCK_SIZE - 1
+        for _ in range(line - newlines_before[block]):
+            position = self.mapped.find(b"\n", position + 1)
+        return position + 1
+
+    def visible_lines(self, first, count):
+        """Decoded text of up to ``count`` lines starting at ``first``."""
+        if self.mapped is None:
+            return []
+        if self.encoding is None:
+            return [self.hex_row(row) for row in range(first, min(first + count, self.line_count))]
+        size = len(self.mapped)
+        position = self.line_start(first)
+        lines = []
+        while len(lines) < count and position < size:
+            end = self.mapped.find(b"\n", position, position + MAX_LINE_BYTES)
+            if end == -1:
+                raw = self.mapped[position:position + MAX_LINE_BYTES]
+                next_line = self.mapped.find(b"\n", position + MAX_LINE_BYTES)
+                position = size if next_line == -1 else next_line + 1
+            else:
+                raw = self.mapped[position:end]
+                position = end + 1
+            lines.append(raw.rstrip(b"\r").decode(self.encoding, "replace").expandtabs(4))
+        return lines
+
+    def hex_row(self, row):
+        data = self.mapped[row * HEX_WIDTH:(row + 1) * HEX_WIDTH]
+        hex_part = " ".join(f"{byte:02x}" for byte in data)
+        text_part = "".join(chr(byte) if 32 <= byte < 127 else "." for byte in data)
+        return f"{row * HEX_WIDTH:010x}  {hex_part:<{HEX_WIDTH * 3 - 1}}  {text_part}"
+
+    # ---- painting and scrolling -----------------------------------------------------------
+
+    def lines_per_page(self):
+        return max(1, self.viewport().height() // QFontMetrics(self.font()).lineSpacing())
+
+    def update_scrollbars(self):
+        page = self.lines_per_page()
+        vertical = self.verticalScrollBar()
+        vertical.setPageStep(page)
+        vertical.setRange(0, min(max(0, self.line_count - page), 2**31 - 1))
+        horizontal = self.horizontalScrollBar()
+        horizontal.setPageStep(self.viewport().width())
+        horizontal.setRange(0, max(0, self.widest_line - self.viewport().width()))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        if self.mapped is None:
+            return
+        if os.fstat(self.file.fileno()).st_size < len(self.mapped):
+            # Truncated underneath us (e.g. a rotated log): touching the lost pages would crash
+            self.open_file(self.file_path, self.encoding)
+            if self.mapped is None:
+                return
+        painter = QPainter(self.viewport())
+        painter.setPen(self.palette().color(QPalette.Text))
+        metrics = QFontMetrics(self.font())
+        line_height = metrics.lineSpacing()
+        x = 4 - self.horizontalScrollBar().value()
+        y = metrics.ascent()
+        widest = self.widest_line
+        for text in self.visible_lines(self.verticalScrollBar().value(), self.lines_per_page() + 1):
+            painter.drawText(x, y, text)
+            widest = max(widest, metrics.horizontalAdvance(text) + 8)
+            y += line_height
+        painter.end()
+        if widest != self.widest_line:
+            self.widest_line = widest
+            self.update_scrollbars()
@@ -0,0 +1,299 @@
+import codecs
+import json
+import locale
+import os
+import re
+import shlex
+import threading
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, QProcess, QTimer, pyqtSignal
+
+OUTPUT_LINES = 2000  # Lines of stdout and of stderr kept per process
+MAX_LINE_CHARS = 4096  # Longer lines are cut, so one runaway line cannot grow a buffer
+DEDUP_SECONDS = 2.0  # A repeat launch of a command still starting or started this recently is a double-click
+USAGE_POLL_MS = 1000  # CPU/RSS sampling interval while children run
+MAX_FINISHED = 50  # Finished processes kept for inspection
+STANDBY_REFILL_MS = 1000  # Delay before a used standby interpreter is replaced, to stay out of the launch's way
+WARM_READ_CHUNK = 2**20  # Read size when paging an executable into the cache without fadvise
+
+PYTHON_INTERPRETER = re.compile(r"pythonw?(\d+(\.\d+)*)?(\.exe)?$", re.IGNORECASE)
+
+# Run by a standby interpreter: wait for one launch request, then run it as `python script`
+# or `python -m module` would, minus the interpreter start-up that already happened
+STANDBY_BOOTSTRAP = """\
+import json, os, runpy, sys
+request = json.loads(sys.stdin.readline())
+os.chdir(request["cwd"])
+sys.argv = request["argv"]
+if request["module"]:
+    runpy.run_module(sys.argv[0], run_name="__main__", alter_sys=True)
+else:
+    sys.path[0] = os.path.dirname(os.path.abspath(sys.argv[0]))
+    runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def split_parameters(parameters):
+    """Split a launcher entry's parameters like a shell would, keeping quoted arguments whole.
+
+    Windows paths are split without POSIX escapes, so their backslashes survive.
+    """
+    if not parameters:
+        return []
+    if os.name == "nt":
+        return [argument[1:-1] if len(argument) > 1 and argument[0] == argument[-1] == '"' else argument
+                for argument in shlex.split(parameters, posix=False)]
+    return shlex.split(parameters)
+
+
+def process_usage(pid):
+    """(CPU seconds, RSS bytes) of a running process from /proc, or None where it is unavailable.
+
+    CPU time includes children the process has already waited for.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as stat_file:
+            # Fields after the parenthesised command name: utime, stime, cutime, cstime are 14-17
+            fields = stat_file.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as statm_file:
+            rss_pages = int(statm_file.read().split()[1])
+        ticks = sum(int(field) for field in fields[11:15])
+        return ticks / os.sysconf("SC_CLK_TCK"), rss_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def warm_file_cache(path):
+    """Ask the OS to page a file in (or read it) so a later cold start does not wait on disk."""
+    try:
+        with open(path, "rb") as file:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            else:
+                while file.read(WARM_READ_CHUNK):
+                    pass
+    except OSError:
+        pass
+
+
+class OutputBuffer:
+    """Ring buffer of the last lines a process wrote to one stream."""
+
+    def __init__(self, max_lines=OUTPUT_LINES):
+        self.lines = deque(maxlen=max_lines)
+        self.partial = ""
+        self.total_bytes = 0
+        self.decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))("replace")
+
+    def feed(self, data):
+        self.total_bytes += len(data)
+        *complete, partial = (self.partial + self.decoder.decode(data)).split("\n")
+        self.lines.extend(line.rstrip("\r")[:MAX_LINE_CHARS] for line in complete)
+        self.partial = partial[:MAX_LINE_CHARS]
+
+    def text(self):
+        return "\n".join([*self.lines, self.partial] if self.partial else self.lines)
+
+
+class LaunchedProcess:
+    """One launch of a launcher entry: its QProcess, captured output and resource use."""
+
+    def __init__(self, name, program, arguments):
+        self.name = name
+        self.program = program
+        self.arguments = arguments
+        self.key = (program, tuple(arguments))
+        self.process = None
+        self.pid = None
+        self.requested = time.perf_counter()
+        self.latency = None  # Seconds from the click until the process was running
+        self.prewarmed = False
+        self.stdout = OutputBuffer()
+        self.stderr = OutputBuffer()
+        self.cpu_seconds = None  # Sampled every USAGE_POLL_MS while running; None without /proc
+        self.rss = None
+        self.peak_rss = None
+        self.exit_code = None
+        self.crashed = False
+        self.error = None
+        self.ended = None
+
+    @property
+    def running(self):
+        return self.ended is None
+
+    def summary(self):
+        if self.error is not None:
+            state = f"failed: {self.error}"
+        elif self.running:
+            state = f"running {time.perf_counter() - self.requested:.0f} s"
+        else:
+            state = "crashed" if self.crashed else f"exit {self.exit_code}"
+        parts = [state]
+        if self.latency is not None:
+            parts.append(f"started in {self.latency * 1000:.0f} ms" + (" (pre-warmed)" if self.prewarmed else ""))
+        if self.cpu_seconds is not None:
+            parts.append(f"CPU {self.cpu_seconds:.1f} s, peak RSS {self.peak_rss / 2**20:.0f} MB")
+        return f"{self.name}: " + ", ".join(parts)
+
+
+class LauncherEngine(QObject):
+    """Launch and supervise the taskbar's launcher entries.
+
+    Every child is tracked from the click until it exits: launch latency, stdout and stderr in
+    OutputBuffers, and CPU time and RSS sampled from /proc on Linux. Launching a command that
+    is still starting, or was started less than DEDUP_SECONDS ago, returns the existing launch
+    instead of spawning a second copy. Entries marked "prewarm" are prepared ahead of time: a
+    Python interpreter gets a standby process that has already started up and only waits for
+    its script, any other program has its executable paged into the OS cache.
+    """
+    launched = pyqtSignal(object)
+    failed = pyqtSignal(object)
+    finished = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.processes = []  # Running LaunchedProcess records
+        self.finished_processes = deque(maxlen=MAX_FINISHED)
+        self.standby = {}  # Interpreter path -> QProcess running STANDBY_BOOTSTRAP
+        self.usage_timer = QTimer(self)
+        self.usage_timer.setInterval(USAGE_POLL_MS)
+        self.usage_timer.timeout.connect(self.sample_usage)
+
+    # ---- launching ------------------------------------------------------------------------
+
+    def launch(self, entry):
+        """Start a launcher entry ({"name", "path", "parameters"}) and return its record."""
+        program = entry["path"]
+        arguments = split_parameters(entry.get("parameters", ""))
+        now = time.perf_counter()
+        for record in self.processes:
+            if record.key == (program, tuple(arguments)) and (record.pid is None
+                                                               or now - record.requested < DEDUP_SECONDS):
+                return record
+        record = LaunchedProcess(entry["name"], program, arguments)
+        standby = self.take_standby(program, arguments)
+        record.process = standby if standby is not None else QProcess(self)
+        self.connect_process(record)
+        self.processes.append(record)
+        if standby is not None:
+            record.prewarmed = True
+            self.on_started(record)
+        else:
+            record.process.start(program, arguments)
+        self.usage_timer.start()
+        return record
+
+    def connect_process(self, record):
+        process = record.process
+        process.started.connect(lambda: self.on_started(record))
+        process.readyReadStandardOutput.connect(
+            lambda: record.stdout.feed(bytes(process.readAllStandardOutput())))
+        process.readyReadStandardError.connect(
+            lambda: record.stderr.feed(bytes(process.readAllStandardError())))
+        process.errorOccurred.connect(lambda error: self.on_error(record, error))
+        process.finished.connect(lambda exit_code, exit_status: self.on_finished(record, exit_code, exit_status))
+
+    def on_started(self, record):
+        record.pid = int(record.process.processId())
+        record.latency = time.perf_counter() - record.requested
+        self.launched.emit(record)
+
+    def on_error(self, record, error):
+        if error == QProcess.FailedToStart and record.running:
+            record.error = record.process.errorString()
+            self.end(record)
+            self.failed.emit(record)
+
+    def on_finished(self, record, exit_code, exit_status):
+        if not record.running:
+            return
+        record.crashed = exit_status == QProcess.CrashExit
+        record.exit_code = None if record.crashed else exit_code
+        self.end(record)
+        self.finished.emit(record)
+
+    def end(self, record):
+        """Move a record to the finished list and let its QProcess go."""
+        record.ended = time.perf_counter()
+        self.processes.remove(record)
+        self.finished_processes.append(record)
+        record.process.deleteLater()
+        record.process = None
+        if not self.processes:
+            self.usage_timer.stop()
+
+    def sample_usage(self):
+        for record in self.processes:
+            usage = process_usage(record.pid) if record.pid else None
+            if usage is not None:
+                record.cpu_seconds, record.rss = usage
+                record.peak_rss = max(record.peak_rss or 0, record.rss)
+
+    # ---- pre-warming ----------------------------------------------------------------------
+
+    def prewarm(self, entries):
+        """Prepare every entry marked "prewarm" so its next launch starts faster."""
+        for entry in entries:
+            if not entry.get("prewarm"):
+                continue
+            program = entry["path"]
+            if PYTHON_INTERPRETER.match(os.path.basename(program)):
+                self.start_standby(program)
+            else:
+                threading.Thread(target=warm_file_cache, args=(program,), daemon=True).start()
+
+    def start_standby(self, program):
+        if program in self.standby:
+            return
+        process = QProcess(self)
+        process.finished.connect(lambda *_: self.drop_standby(program, process))
+        process.errorOccurred.connect(lambda *_: self.drop_standby(program, process))
+        process.start(program, ["-c", STANDBY_BOOTSTRAP])
+        self.standby[program] = process
+
+    def drop_standby(self, program, process):
+        if self.standby.get(program) is process:
+            del self.standby[program]
+            process.deleteLater()
+
+    def take_standby(self, program, arguments):
+        """Hand a launch to the interpreter's standby process, if it has one that can run it."""
+        process = self.standby.get(program)
+        if process is None or process.state() != QProcess.Running:
+            return None
+        if arguments[:1] == ["-m"] and len(arguments) > 1:
+            argv, module = arguments[1:], True
+        elif arguments and not arguments[0].startswith("-"):
+            argv, module = arguments, False
+        else:
+            return None  # Interpreter options or an interactive session need a fresh process
+        del self.standby[program]
+        process.finished.disconnect()
+        process.errorOccurred.disconnect()
+        request = {"argv": argv, "module": module, "cwd": os.getcwd()}
+        process.write((json.dumps(request) + "\n").encode())
+        QTimer.singleShot(STANDBY_REFILL_MS, lambda: self.start_standby(program))
+        return process
+
+    def shutdown(self):
+        """Stop the standby interpreters and the launched children before the application exits.
+
+        The children's QProcesses would be destroyed with the application anyway; ending them
+        here lets them exit on SIGTERM and keeps their finished signals from firing mid-teardown.
+        """
+        for process in list(self.standby.values()):
+            process.finished.disconnect()
+            process.errorOccurred.disconnect()
+            process.kill()
+            process.waitForFinished(1000)
+        self.standby.clear()
+        self.usage_timer.stop()
+        for record in self.processes:
+            record.process.disconnect()
+            record.process.terminate()
+            if not record.process.waitForFinished(1000):
+                record.process.kill()
+                record.process.waitForFinished(1000)
@@ -0,0 +1,260 @@
+import os
+from array import array
+
+from PyQt5.QtWidgets import QPlainTextEdit
+from PyQt5.QtCore import QFileSystemWatcher, QTimer
+from PyQt5.QtGui import QFontDatabase, QTextCursor
+
+TAIL_LINES = 1000  # Lines shown when a log is opened
+PAGE_LINES = 1000  # Lines loaded when scrolling past either edge of the view
+MAX_VIEW_LINES = 5000  # Lines kept in the view; the far end is dropped beyond this
+READ_CHUNK = 64 * 2**10  # Bytes read per step when scanning backwards for line starts
+MAX_FOLLOW_BYTES = 4 * 2**20  # Appended bytes taken per follow step; the rest comes on the next one
+FOLLOW_DEBOUNCE_MS = 100  # Quiet period after a change notification before reading the new lines
+FOLLOW_POLL_MS = 1000  # Fallback poll for appends the watcher misses and for logs that do not exist yet
+
+
+def line_starts_before(file, offset, count):
+    """Byte offsets of the starts of up to ``count`` lines ending at ``offset``, oldest first.
+
+    ``offset`` must be a line start. The file is read backwards in READ_CHUNK steps, so only
+    the bytes of those lines are touched however large the file is.
+    """
+    starts = []
+    end = offset - 1  # The newline ending the line before offset does not start a line
+    while end > 0 and len(starts) < count:
+        start = max(0, end - READ_CHUNK)
+        file.seek(start)
+        chunk = file.read(end - start)
+        newline = len(chunk)
+        while len(starts) < count:
+            newline = chunk.rfind(b"\n", 0, newline)
+            if newline == -1:
+                break
+            starts.append(start + newline + 1)
+        end = start
+    if len(starts) < count and offset > 0 and end <= 0:
+        starts.append(0)
+    starts.reverse()
+    return starts
+
+
+def split_lines(data, base):
+    """Split complete lines; returns (texts, start offsets, offset after the last newline)."""
+    texts = []
+    starts = array("Q")
+    position = 0
+    while True:
+        newline = data.find(b"\n", position)
+        if newline == -1:
+            return texts, starts, base + position
+        texts.append(data[position:newline].rstrip(b"\r").decode("utf-8", "replace"))
+        starts.append(base + position)
+        position = newline + 1
+
+
+class LogViewer(QPlainTextEdit):
+    """Read-only, tail-following view of a log file that may grow to hundreds of MB.
+
+    Opening shows the last TAIL_LINES lines, found by reading backwards from the end of the
+    file. Appended lines are read from an offset cursor when the file watcher (or the fallback
+    poll) reports a change, and the view scrolls along while it is at the bottom. At most
+    MAX_VIEW_LINES lines are held: ``line_offsets`` records where each of them starts in the
+    file, so scrolling to the top loads the previous PAGE_LINES lines from the first offset
+    backwards, and scrolling back down pages forward again from where the view ends. A
+    truncated or rotated log is reopened at its tail.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setLineWrapMode(QPlainTextEdit.NoWrap)  # One block per line keeps the scrollbar in lines
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.log_path = None
+        self.file = None
+        self.line_offsets = array("Q")  # File offset of every line in the view
+        self.view_end = 0  # Offset just past the last line in the view
+        self.following = True  # The view ends at the end of the log, so appends are shown
+        self.paging = False
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(lambda _: self.follow_timer.start())
+        self.follow_timer = QTimer(self)
+        self.follow_timer.setSingleShot(True)
+        self.follow_timer.setInterval(FOLLOW_DEBOUNCE_MS)
+        self.follow_timer.timeout.connect(self.follow)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(FOLLOW_POLL_MS)
+        self.poll_timer.timeout.connect(self.follow)
+        self.verticalScrollBar().valueChanged.connect(self.on_scrolled)
+
+    # ---- opening --------------------------------------------------------------------------
+
+    def open_log(self, log_path):
+        """Show the tail of ``log_path`` and follow it; a missing log is shown once it appears."""
+        self.close_log()
+        self.log_path = log_path
+        self.poll_timer.start()
+        self.open_tail()
+
+    def close_log(self):
+        if self.watcher.files():
+            self.watcher.removePaths(self.watcher.files())
+        self.poll_timer.stop()
+        self.follow_timer.stop()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.log_path = None
+        self.line_offsets = array("Q")
+        self.view_end = 0
+        self.clear()
+
+    def open_tail(self):
+        try:
+            self.file = open(self.log_path, "rb")
+        except OSError:
+            return  # Not created yet: the poll retries
+        self.watcher.addPath(self.log_path)
+        self.show_tail()
+
+    def show_tail(self):
+        """Replace the view with the last TAIL_LINES complete lines of the file."""
+        size = os.fstat(self.file.fileno()).st_size
+        # A partly written last line is left out until its newline arrives
+        self.file.seek(max(0, size - READ_CHUNK))
+        tail = self.file.read()
+        last_newline = tail.rfind(b"\n")
+        if last_newline != -1:
+            end = size - len(tail) + last_newline + 1
+        else:
+            end = (line_starts_before(self.file, size, 1) or [0])[0]
+        starts = line_starts_before(self.file, end, TAIL_LINES)
+        self.paging = True
+        if starts:
+            self.file.seek(starts[0])
+            texts, self.line_offsets, self.view_end = split_lines(self.file.read(end - starts[0]), starts[0])
+            self.setPlainText("\n".join(texts))
+        else:
+            self.clear()
+            self.line_offsets, self.view_end = array("Q"), end
+        self.following = True
+        self.paging = False
+        self.scroll_to_bottom()
+
+    # ---- following ------------------------------------------------------------------------
+
+    def follow(self):
+        """Append lines written since the last read, or reopen a truncated or rotated log."""
+        if self.log_path is None:
+            return
+        if self.file is None:
+            self.open_tail()
+            return
+        try:
+            path_stat = os.stat(self.log_path)
+        except OSError:
+            return  # Being rotated: the new file is picked up by a later poll
+        file_stat = os.fstat(self.file.fileno())
+        if (path_stat.st_ino, path_stat.st_dev) != (file_stat.st_ino, file_stat.st_dev) \
+                or path_stat.st_size < self.view_end:
+            if self.watcher.files():
+                self.watcher.removePaths(self.watcher.files())
+            self.file.close()
+            self.file = None
+            self.open_tail()
+            return
+        if self.log_path not in self.watcher.files():
+            # Some writers replace the file in place of appending, which drops the watch
+            self.watcher.addPath(self.log_path)
+        if not self.following or path_stat.st_size == self.view_end:
+            return  # Paged back through the log; scrolling down catches up
+        scroll_bar = self.verticalScrollBar()
+        if path_stat.st_size - self.view_end > MAX_FOLLOW_BYTES and scroll_bar.value() == scroll_bar.maximum():
+            self.show_tail()  # A burst too large to stream: skip straight to its end
+        else:
+            self.load_newer()
+
+    # ---- paging ---------------------------------------------------------------------------
+
+    def on_scrolled(self, value):
+        if self.paging or self.file is None:
+            return
+        scroll_bar = self.verticalScrollBar()
+        if value == scroll_bar.minimum() and self.line_offsets and self.line_offsets[0] > 0:
+            self.load_older()
+        elif value == scroll_bar.maximum() and not self.following:
+            self.load_newer(PAGE_LINES)
+
+    def load_older(self):
+        """Prepend the PAGE_LINES lines before the view, dropping lines at the bottom if needed."""
+        first = self.line_offsets[0]
+        starts = line_starts_before(self.file, first, PAGE_LINES)
+        if not starts:
+            return
+        self.file.seek(starts[0])
+        texts, offsets, _ = split_lines(self.file.read(first - starts[0]), starts[0])
+        self.paging = True
+        scroll_bar = self.verticalScrollBar()
+        position = scroll_bar.value()
+        cursor = QTextCursor(self.document())
+        cursor.insertText("\n".join(texts) + "\n")
+        self.line_offsets = offsets + self.line_offsets
+        if self.drop_lines(len(self.line_offsets) - MAX_VIEW_LINES, from_top=False):
+            self.following = False
+        scroll_bar.setValue(position + len(texts))  # Keep the same lines on screen
+        self.paging = False
+
+    def load_newer(self, max_lines=None):
+        """Append the complete lines after the view (at most ``max_lines``), dropping lines at
+        the top if needed. Without a limit the view keeps scrolling along with the log."""
+        self.file.seek(self.view_end)
+        data = self.file.read(MAX_FOLLOW_BYTES)
+        texts, offsets, end = split_lines(data, self.view_end)
+        if max_lines is not None and len(texts) > max_lines:
+            end = offsets[max_lines]
+            del texts[max_lines:]
+            del offsets[max_lines:]
+        elif len(data) < MAX_FOLLOW_BYTES:
+            self.following = True  # Caught up with the end of the log
+        if not texts:
+            return
+        self.paging = True
+        scroll_bar = self.verticalScrollBar()
+        stick_to_bottom = max_lines is None and scroll_bar.value() == scroll_bar.maximum()
+        position = scroll_bar.value()
+        if self.line_offsets:
+            self.appendPlainText("\n".join(texts))
+        else:
+            self.setPlainText("\n".join(texts))
+        self.line_offsets.extend(offsets)
+        self.view_end = end
+        dropped = self.drop_lines(len(self.line_offsets) - MAX_VIEW_LINES, from_top=True)
+        if stick_to_bottom:
+            self.scroll_to_bottom()
+        else:
+            scroll_bar.setValue(max(0, position - dropped))
+        self.paging = False
+        if max_lines is None and len(data) == MAX_FOLLOW_BYTES:
+            self.follow_timer.start()  # More was written than one step takes
+
+    def drop_lines(self, count, from_top):
+        """Remove ``count`` lines from one end of the view; returns how many were removed."""
+        if count <= 0:
+            return 0
+        document = self.document()
+        cursor = QTextCursor(document)
+        if from_top:
+            cursor.setPosition(document.findBlockByNumber(count).position(), QTextCursor.KeepAnchor)
+            del self.line_offsets[:count]
+        else:
+            # From the line break before the first dropped line to the end
+            cursor.setPosition(document.findBlockByNumber(document.blockCount() - count).position() - 1)
+            cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+            self.view_end = self.line_offsets[-count]
+            del self.line_offsets[-count:]
+        cursor.removeSelectedText()
+        return count
+
+    def scroll_to_bottom(self):
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
@@ -1,10 +1,15 @@
 from PyQt5.QtWidgets import (
     QMainWindow, QTabWidget, QFileDialog, QWidget, QVBoxLayout,
-    QComboBox, QTextEdit, QMenuBar, QAction, QSplitter
+    QComboBox, QMenuBar, QAction, QSplitter, QStackedWidget, QMessageBox
 )
 from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QKeySequence
 from .file_tree import FileTree
 from .file_editor import FileEditor
+from .large_file_viewer import LargeFileViewer, LARGE_FILE_THRESHOLD, sniff_file
+from .log_viewer import LogViewer
+from .diagnostics_panel import DiagnosticsPanel
+from .duplicates_panel import DuplicatesPanel
 import os
 
 
@@ -18,6 +23,8 @@ class MainWindow(QMainWindow):
         self.tabs = QTabWidget()
         self.tabs.addTab(self.create_file_manager_tab(), "File Manager")
         self.tabs.addTab(self.create_activity_history_tab(), "Activity History")
+        self.tabs.addTab(self.create_duplicates_tab(), "Duplicates")
+        self.tabs.addTab(self.create_diagnostics_tab(), "Diagnostics")
 
         # Menu bar with options
         self.create_menu_bar()
@@ -43,6 +50,12 @@ class MainWindow(QMainWindow):
         select_directory_action.triggered.connect(self.select_directory)
         file_menu.addAction(select_directory_action)
 
+        # Add "Save" action
+        save_action = QAction("Save", self)
+        save_action.setShortcut(QKeySequence.Save)
+        save_action.triggered.connect(self.file_editor.save)
+        file_menu.addAction(save_action)
+
         # Theme menu
         theme_menu = menu_bar.addMenu("Theme")
 
@@ -60,13 +73,20 @@ class MainWindow(QMainWindow):
     def create_file_manager_tab(self):
         self.file_tree = FileTree()
         self.file_editor = FileEditor()
+        self.large_file_viewer = LargeFileViewer()
+        self.file_view = QStackedWidget()
+        self.file_view.addWidget(self.file_editor)
+        self.file_view.addWidget(self.large_file_viewer)
 
         splitter = QSplitter(Qt.Horizontal)
         splitter.addWidget(self.file_tree)
-        splitter.addWidget(self.file_editor)
+        splitter.addWidget(self.file_view)
 
         # Connect file tree to editor
-        self.file_tree.file_selected.connect(self.file_editor.load_file)
+        self.file_tree.file_selected.connect(self.open_file)
+        self.file_editor.saved.connect(self.on_file_saved)
+        self.file_editor.save_failed.connect(self.on_save_failed)
+        self.file_editor.changed_on_disk.connect(self.on_file_changed_on_disk)
 
         file_manager_widget = QWidget()
         file_manager_layout = QVBoxLayout()
@@ -75,9 +95,64 @@ class MainWindow(QMainWindow):
 
         return file_manager_widget
 
+    def open_file(self, file_path):
+        """Edit small text files; map large or binary ones into the read-only viewer."""
+        if file_path == self.file_editor.file_path and self.file_editor.document().isModified():
+            return  # Already being edited; reloading it would drop the edits
+        if not self.confirm_unsaved_changes():
+            return
+        try:
+            size, encoding = sniff_file(file_path)
+        except OSError as e:
+            print(f"Error opening {file_path}: {e}")
+            return
+        if encoding is not None and size <= LARGE_FILE_THRESHOLD:
+            try:
+                self.file_editor.load_file(file_path, encoding)
+                self.large_file_viewer.close_file()
+                self.file_view.setCurrentWidget(self.file_editor)
+                return
+            except UnicodeDecodeError:
+                pass  # Text at the start only: show it read-only rather than corrupt it on save
+            except OSError as e:
+                print(f"Error opening {file_path}: {e}")
+                return
+        self.file_editor.close_file()
+        self.large_file_viewer.open_file(file_path, encoding)
+        self.file_view.setCurrentWidget(self.large_file_viewer)
+
+    def confirm_unsaved_changes(self):
+        """Offer to save the editor's unsaved edits before its file is replaced or the window
+        closes; False if the user cancelled or the save failed."""
+        editor = self.file_editor
+        if editor.file_path is None or not editor.document().isModified():
+            return True
+        answer = QMessageBox.question(
+            self, "Unsaved changes", f"{editor.file_path} has unsaved changes.\nSave them first?",
+            QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel, QMessageBox.Save)
+        if answer == QMessageBox.Save:
+            return editor.save_now()
+        return answer == QMessageBox.Discard
+
+    def on_file_saved(self, file_path, written):
+        message = "Saved" if written else "No changes to save in"
+        self.statusBar().showMessage(f"{message} {file_path}", 5000)
+
+    def on_save_failed(self, file_path, message):
+        QMessageBox.warning(self, "Save failed", f"Could not save {file_path}:\n{message}")
+
+    def on_file_changed_on_disk(self, file_path, reloaded):
+        if reloaded:
+            self.statusBar().showMessage(f"Reloaded {file_path}, which changed on disk", 5000)
+            return
+        answer = QMessageBox.question(
+            self, "File changed on disk",
+            f"{file_path} was changed by another program.\nReload it and discard your unsaved changes?")
+        if answer == QMessageBox.Yes:
+            self.file_editor.reload()
+
     def create_activity_history_tab(self):
-        self.activity_history = QTextEdit()
-        self.activity_history.setReadOnly(True)
+        self.activity_history = LogViewer()
         self.load_activity_history()
 
         history_widget = QWidget()
@@ -87,13 +162,28 @@ class MainWindow(QMainWindow):
 
         return history_widget
 
+    def create_duplicates_tab(self):
+        # Identical files among the indexed ones, found by size, then by partial and full hashes
+        self.duplicates_panel = DuplicatesPanel()
+        return self.duplicates_panel
+
+    def create_diagnostics_tab(self):
+        # Timings and counters collected by app.instrumentation, plus on-demand profiling
+        self.diagnostics_panel = DiagnosticsPanel()
+        return self.diagnostics_panel
+
+    def closeEvent(self, event):
+        if not self.confirm_unsaved_changes():
+            event.ignore()
+            return
+        self.duplicates_panel.stop()
+        super().closeEvent(event)
+
     def load_activity_history(self):
         # Load from a log file or list - replace "app.log" with your log file path
+        # Only the tail is read; appended lines follow as they are written
         log_path = "app.log"
-        if os.path.exists(log_path):
-            with open(log_path, "r") as log_file:
-                history = log_file.read()
-                self.activity_history.setPlainText(history)
+        self.activity_history.open_log(log_path)
 
     def select_directory(self):
         dir_path = QFileDialog.getExistingDirectory(self, "Select Working Directory")
@@ -0,0 +1,64 @@
+import json
+import os
+import time
+
+STARTUP_LOG = "startup_times.jsonl"  # One JSON line per start-up, newest last
+MAX_LOGGED_STARTS = 500  # Older lines are dropped so the log stays small
+
+
+def process_age():
+    """Seconds since this process was created, or None where /proc is not available."""
+    try:
+        with open("/proc/self/stat") as stat_file:
+            # The command name may contain spaces, so split after its closing parenthesis;
+            # starttime (field 22) is then the 20th field
+            start_ticks = int(stat_file.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as uptime_file:
+            uptime = float(uptime_file.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupTimer:
+    """Wall-clock phases of start-up, from process creation to the taskbar's first paint.
+
+    ``started`` is a time.perf_counter() value taken on the first line of main.py. Where the
+    process creation time is known (Linux), the time before that line, interpreter start-up
+    and site imports, is reported as the "interpreter" phase.
+    """
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.last = self.started
+        self.phases = []
+        age = process_age()
+        if age is not None:
+            self.phases.append(("interpreter", max(0.0, age - (time.perf_counter() - self.started))))
+
+    def mark(self, phase):
+        """End ``phase`` now; it lasted since the previous mark."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def summary(self, **details):
+        phases = {phase: round(seconds * 1000, 1) for phase, seconds in self.phases}
+        return {"timestamp": round(time.time(), 3), **details, "phases_ms": phases,
+                "total_ms": round(sum(phases.values()), 1)}
+
+    def save(self, path=STARTUP_LOG, **details):
+        """Append this start-up's summary to ``path`` and return it."""
+        summary = self.summary(**details)
+        try:
+            try:
+                with open(path, "r") as log_file:
+                    lines = log_file.readlines()[-(MAX_LOGGED_STARTS - 1):]
+            except FileNotFoundError:
+                lines = []
+            lines.append(json.dumps(summary) + "\n")
+            with open(path, "w") as log_file:
+                log_file.writelines(lines)
+        except OSError as e:
+            print(f"Could not record start-up timings: {e}")
+        return summary
@@ -0,0 +1,244 @@
+import keyword
+import os
+import re
+import time
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtGui import QColor, QFont, QTextCharFormat, QTextLayout
+
+SLICE_MS = 8  # Highlighting work done per event-loop turn before yielding back to typing
+NORMAL = 0  # Lexer state outside any multi-line string; Qt's default -1 means never highlighted
+
+
+def text_format(color, bold=False, italic=False):
+    char_format = QTextCharFormat()
+    char_format.setForeground(QColor(color))
+    if bold:
+        char_format.setFontWeight(QFont.Bold)
+    char_format.setFontItalic(italic)
+    return char_format
+
+
+FORMATS = {
+    "keyword": text_format("#0033b3", bold=True),
+    "builtin": text_format("#7a3e9d"),
+    "string": text_format("#067d17"),
+    "comment": text_format("#8c8c8c", italic=True),
+    "number": text_format("#1750eb"),
+    "variable": text_format("#871094"),
+    "decorator": text_format("#9e880d"),
+    "label": text_format("#b05800", bold=True),
+}
+
+
+def format_range(start, length, kind):
+    text_range = QTextLayout.FormatRange()
+    text_range.start = start
+    text_range.length = length
+    text_range.format = FORMATS[kind]
+    return text_range
+
+
+def words(names):
+    return r"\b(?:" + "|".join(sorted(names, key=len, reverse=True)) + r")\b"
+
+
+class Language:
+    """Token rules for one language: an alternation of named groups, one per format, plus the
+    strings that may continue onto following lines (delimiter -> block state)."""
+
+    def __init__(self, name, pattern, multiline=None, flags=0):
+        self.name = name
+        self.pattern = re.compile(pattern, flags)
+        self.multiline = multiline or {}  # Opening delimiter -> state while inside it
+        self.closers = {state: delimiter for delimiter, state in self.multiline.items()}
+
+
+PYTHON = Language("Python", "|".join([
+    r"(?P<comment>#.*)",
+    r"(?P<string>[rRbBuUfF]{0,2}(?:\"\"\"|'''|\"(?:\\.|[^\"\\])*\"?|'(?:\\.|[^'\\])*'?))",
+    r"(?P<decorator>^\s*@[\w.]+)",
+    r"(?P<keyword>" + words(keyword.kwlist) + ")",
+    r"(?P<builtin>" + words(["self", "cls", "print", "len", "range", "open", "isinstance", "super", "dict",
+                             "list", "set", "tuple", "str", "int", "float", "bool", "object", "Exception"]) + ")",
+    r"(?P<number>\b(?:0[xob][\da-fA-F_]+|\d[\d_]*(?:\.\d*)?(?:[eE][+-]?\d+)?j?)\b)",
+]), multiline={'"""': 1, "'''": 2})
+
+SHELL = Language("Shell", "|".join([
+    r"(?P<comment>(?<![\w$])#.*)",
+    r"(?P<string>\"(?:\\.|[^\"\\])*\"?|'[^']*'?)",
+    r"(?P<variable>\$\{[^}]*\}|\$\w+|\$[@#?$!*0-9-])",
+    r"(?P<keyword>" + words(["if", "then", "else", "elif", "fi", "for", "while", "until", "do", "done", "case",
+                             "esac", "function", "in", "select", "return", "local", "export", "readonly"]) + ")",
+    r"(?P<builtin>" + words(["echo", "printf", "cd", "test", "read", "exit", "source", "set", "unset", "shift",
+                             "trap", "exec", "eval"]) + ")",
+    r"(?P<number>\b\d+\b)",
+]), multiline={'"': 3, "'": 4})
+
+BATCH = Language("Batch", "|".join([
+    r"(?P<comment>^\s*(?:@?rem\b|::).*)",
+    r"(?P<label>^\s*:\w+)",
+    r"(?P<string>\"[^\"]*\"?)",
+    r"(?P<variable>%~?[\w$]*%|%%~?\w|!\w+!|%~?\d)",
+    r"(?P<keyword>" + words(["echo", "set", "if", "else", "for", "do", "goto", "call", "exit", "setlocal",
+                             "endlocal", "not", "exist", "defined", "errorlevel", "in", "shift", "pushd",
+                             "popd", "cd", "start", "pause", "off"]) + ")",
+    r"(?P<number>\b\d+\b)",
+]), flags=re.IGNORECASE)
+
+LANGUAGES_BY_EXTENSION = {
+    ".py": PYTHON, ".pyw": PYTHON,
+    ".sh": SHELL, ".bash": SHELL, ".zsh": SHELL,
+    ".bat": BATCH, ".cmd": BATCH,
+}
+
+
+def language_for_path(file_path):
+    return LANGUAGES_BY_EXTENSION.get(os.path.splitext(file_path)[1].lower())
+
+
+class SyntaxHighlighter(QObject):
+    """Incremental, time-sliced highlighter for Python, shell and batch scripts.
+
+    Each block (line) caches the lexer state it ends in, e.g. inside a triple-quoted string, as
+    its userState. An edit only marks the changed range dirty: those blocks are re-lexed, and
+    so are the blocks after them until one ends in the same state as before, from which point
+    the cached formats are known to be right. Work is done in SLICE_MS slices, the first one
+    straight away (so a typed line is normally coloured before it is painted) and the rest on
+    later event-loop turns, so loading a 50k-line script or opening a string near its top
+    never blocks typing.
+
+    Formats are applied to the block layouts like QSyntaxHighlighter does, which leaves the
+    document's text and undo stack untouched; QSyntaxHighlighter itself is not used because
+    it walks every inserted block synchronously.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.document = None
+        self.language = None
+        self.dirty_start = None  # Character range that must be re-lexed, None when up to date
+        self.dirty_end = 0
+        self.applying = False
+        self.slice_timer = QTimer(self)
+        self.slice_timer.setSingleShot(True)
+        self.slice_timer.setInterval(0)
+        self.slice_timer.timeout.connect(self.highlight_slice)
+
+    def set_document(self, document, language):
+        """Highlight ``document`` as ``language``; with no language the document is left plain
+        and not watched, so editing it costs nothing."""
+        if self.document is not None:
+            self.document.contentsChange.disconnect(self.on_contents_change)
+        self.slice_timer.stop()
+        self.dirty_start = None
+        self.language = language
+        self.document = document if language is not None else None
+        if self.document is not None:
+            self.document.contentsChange.connect(self.on_contents_change)
+            self.on_contents_change(0, 0, self.document.characterCount())
+
+    def is_idle(self):
+        """True once every block has been highlighted."""
+        return self.dirty_start is None
+
+    # ---- dirty tracking and time slicing --------------------------------------------------
+
+    def on_contents_change(self, position, removed, added):
+        if self.applying:
+            return
+        end = position + added
+        if self.dirty_start is None:
+            self.dirty_start, self.dirty_end = position, end
+        else:
+            # Earlier dirty positions past the edit moved with the text after it
+            if self.dirty_end > position:
+                self.dirty_end = max(self.dirty_end + added - removed, position)
+            self.dirty_start = min(self.dirty_start, position)
+            self.dirty_end = max(self.dirty_end, end)
+        self.highlight_slice()
+
+    def highlight_slice(self):
+        """Re-lex dirty blocks for up to SLICE_MS, then reschedule if work remains."""
+        if self.dirty_start is None:
+            return
+        deadline = time.perf_counter() + SLICE_MS / 1000
+        document = self.document
+        block = document.findBlock(min(self.dirty_start, document.characterCount() - 1))
+        state = max(NORMAL, block.previous().userState())
+        self.applying = True
+        try:
+            while block.isValid():
+                if time.perf_counter() > deadline:
+                    self.dirty_start = block.position()
+                    self.slice_timer.start()
+                    return
+                previous_state = block.userState()
+                state = self.highlight_block(block, state)
+                block.setUserState(state)
+                past_edit = block.position() + block.length() > self.dirty_end
+                block = block.next()
+                if past_edit and state == previous_state:
+                    break
+            self.dirty_start = None
+        finally:
+            self.applying = False
+
+    def highlight_block(self, block, state):
+        ranges = []
+        state = self.lex(block.text(), state, ranges)
+        block.layout().setFormats(ranges)
+        self.document.markContentsDirty(block.position(), block.length())
+        return state
+
+    # ---- lexing ---------------------------------------------------------------------------
+
+    def lex(self, text, state, ranges):
+        """Append the format ranges of one line and return the state the line ends in."""
+        language = self.language
+        position = 0
+        if state != NORMAL:
+            end = self.find_closer(text, language.closers[state], 0)
+            if end == -1:
+                ranges.append(format_range(0, len(text), "string"))
+                return state
+            ranges.append(format_range(0, end, "string"))
+            position = end
+        pattern = language.pattern
+        while position < len(text):
+            match = pattern.search(text, position)
+            if match is None:
+                break
+            kind = match.lastgroup
+            start, end = match.span()
+            if end == start:
+                position = start + 1
+                continue
+            if kind == "string":
+                # Strings that may span lines are closed by hand so an open one sets the state
+                body = end - len(match.group().lstrip("rRbBuUfF"))
+                for delimiter, string_state in language.multiline.items():
+                    if text.startswith(delimiter, body):
+                        end = self.find_closer(text, delimiter, body + len(delimiter))
+                        if end == -1:
+                            ranges.append(format_range(start, len(text) - start, "string"))
+                            return string_state
+                        break
+            ranges.append(format_range(start, end - start, kind))
+            position = end
+        return NORMAL
+
+    @staticmethod
+    def find_closer(text, delimiter, start):
+        """Index just past the unescaped ``delimiter`` closing a string, or -1."""
+        position = start
+        while True:
+            found = text.find(delimiter, position)
+            if found == -1:
+                return -1
+            escape = found
+            while escape > 0 and text[escape - 1] == "\\":
+                escape -= 1
+            if (found - escape) % 2 == 0:
+                return found + len(delimiter)
+            position = found + 1
@@ -1,19 +1,20 @@
-from pathlib import Path
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QPushButton, QApplication, QHBoxLayout, QSpacerItem, QSizePolicy,
-    QGraphicsDropShadowEffect, QMenu, QAction, QFileDialog, QDialog, QFormLayout, QLineEdit, QLabel, QTextEdit,
-    QComboBox,
+    QGraphicsDropShadowEffect, QMenu, QAction, QFileDialog, QDialog, QFormLayout, QLineEdit, QLabel, QPlainTextEdit,
+    QComboBox, QCheckBox, QMessageBox,
     QDialogButtonBox
 )
-from PyQt5.QtCore import Qt, QSize, QPoint, QProcess, pyqtSignal, QThread, QTimer
+from PyQt5.QtCore import Qt, QSize, QPoint, pyqtSignal, QThread, QTimer
 from PyQt5.QtGui import QGuiApplication, QIcon, QColor, QLinearGradient, QPainter, QBrush
 import json
 import os, sys
+import time
 
-from app.clipboard_manager import ClipboardManager
-from app.clipboard_notepad import ClipboardNotepad
-from app.url_access import get_chrome_open_urls, get_edge_open_urls, get_firefox_open_urls
-from app.file_indexer import index_files, load_file_index
+from app import instrumentation
+
+# Everything but Qt is imported where it is first used, so none of it delays the taskbar's
+# first paint: the clipboard, indexer and URL modules (and sqlite3) load once the taskbar is
+# on screen, the dialogs when they are opened
 
 
 def resource_path(relative_path):
@@ -25,24 +26,48 @@ def resource_path(relative_path):
 
 
 class FileIndexerThread(QThread):
-    """Thread to handle background file indexing."""
+    """Thread to handle background file indexing, then keep the index current with a watcher."""
     finished = pyqtSignal()
 
+    def __init__(self, workers=None, watch=True, parent=None):
+        super().__init__(parent)
+        self.workers = workers  # Crawler thread pool size, None picks a default from the CPU count
+        self.watch = watch
+        self.watcher = None
+
     def run(self):
-        index_files([Path.home()])
+        from app.file_indexer import index_files
+        from app.fs_watcher import create_watcher
+        from app.index_config import load_index_config
+
+        config = load_index_config()
+        # Cancelled between directories, so closing the taskbar never waits for a whole crawl
+        if index_files(workers=self.workers, config=config, cancelled=self.isInterruptionRequested) is None:
+            return
         self.finished.emit()
+        if self.watch:
+            self.watcher = create_watcher(config, workers=self.workers)
+            if not self.isInterruptionRequested():
+                self.watcher.run()
+
+    def stop(self):
+        self.requestInterruption()
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.wait()
 
 
 class AddLauncherEntryDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Add New Launcher Entry")
-        self.setFixedSize(400, 200)
+        self.setFixedSize(400, 230)
 
         layout = QFormLayout()
         self.name_field = QLineEdit(self)
         self.path_field = QLineEdit(self)
         self.parameters_field = QLineEdit(self)
+        self.prewarm_checkbox = QCheckBox("Pre-warm (standby interpreter or cached executable)", self)
 
         browse_button = QPushButton("Browse")
         browse_button.clicked.connect(self.browse_for_executable)
@@ -51,6 +76,7 @@ class AddLauncherEntryDialog(QDialog):
         layout.addRow("Executable Path:", self.path_field)
         layout.addRow("", browse_button)
         layout.addRow("Parameters:", self.parameters_field)
+        layout.addRow("", self.prewarm_checkbox)
 
         button_layout = QHBoxLayout()
         add_button = QPushButton("Add")
@@ -72,100 +98,175 @@ class AddLauncherEntryDialog(QDialog):
         return {
             "name": self.name_field.text(),
             "path": self.path_field.text(),
-            "parameters": self.parameters_field.text()
+            "parameters": self.parameters_field.text(),
+            "prewarm": self.prewarm_checkbox.isChecked()
         }
 
 
-class URLDialog(QDialog):
-    def __init__(self, urls, parent=None):
+class LaunchedProcessDialog(QDialog):
+    """Status and captured output of one launched entry."""
+
+    def __init__(self, record, parent=None):
         super().__init__(parent)
-        self.setWindowTitle("Open URLs")
-        self.setMinimumSize(400, 300)
+        self.setWindowTitle(f"Launched: {record.name}")
+        self.setMinimumSize(600, 400)
 
         layout = QVBoxLayout()
-        self.url_text = QTextEdit(self)
-        self.url_text.setReadOnly(True)
-        self.url_text.setPlainText("\n".join(urls))
-
-        button_box = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Close)
-        button_box.accepted.connect(self.save_urls)
+        command = " ".join([record.program, *record.arguments])
+        status_label = QLabel(f"{command}\n{record.summary()}", self)
+        status_label.setWordWrap(True)
+        output_text = QPlainTextEdit(self)
+        output_text.setReadOnly(True)
+        output_text.setPlainText(f"--- stdout ---\n{record.stdout.text()}\n\n--- stderr ---\n{record.stderr.text()}")
+        button_box = QDialogButtonBox(QDialogButtonBox.Close)
         button_box.rejected.connect(self.reject)
 
-        layout.addWidget(QLabel("Open URLs:"))
-        layout.addWidget(self.url_text)
+        layout.addWidget(status_label)
+        layout.addWidget(output_text)
         layout.addWidget(button_box)
         self.setLayout(layout)
 
-    def save_urls(self):
-        file_path, _ = QFileDialog.getSaveFileName(self, "Save URLs", "", "Text Files (*.txt)")
-        if file_path:
-            with open(file_path, "w") as file:
-                file.write(self.url_text.toPlainText())
-        self.accept()
+
+PREWARM_DELAY_MS = 3000  # Launcher entries are pre-warmed this long after the taskbar is shown
+DAEMON_KEEPALIVE_MS = 60 * 1000  # Ping interval of the index daemon, well below its idle timeout
+RECENT_URL_WINDOWS = [("Last 24 hours", 24), ("Last 7 days", 24 * 7), ("All history", None)]
+
+
+class URLReaderThread(QThread):
+    """Stream the recent URLs from the URL cache, then the ones a harvest of new browser history
+    adds, batch by batch as they are committed. Each URL is sent once; both the cache and the
+    history query only return URLs of the time window. Stopped with requestInterruption."""
+    urls_ready = pyqtSignal(list)
+    reading_finished = pyqtSignal(int)
+
+    def __init__(self, hours=None, parent=None):
+        super().__init__(parent)
+        self.hours = hours
+        self.shown = set()
+
+    def run(self):
+        from app.url_access import harvest_browser_histories
+        from app.url_cache import UrlCache
+
+        since = None if self.hours is None else time.time() - self.hours * 3600
+        with UrlCache() as cache:
+            started = time.perf_counter()
+            for rows in cache.iter_recent(since):
+                if self.isInterruptionRequested():
+                    return
+                self.send_new(rows)
+            instrumentation.record_time("urls.read_recent", time.perf_counter() - started)
+            harvest_browser_histories(cache, cancelled=self.isInterruptionRequested, on_batch=self.on_harvested,
+                                      since=since)
+        if not self.isInterruptionRequested():
+            self.reading_finished.emit(len(self.shown))
+
+    def on_harvested(self, browser, rows):
+        if not self.isInterruptionRequested():
+            self.send_new([(url, browser) for url, _ in rows])
+
+    def send_new(self, rows):
+        rows = [row for row in rows if row[0] not in self.shown]
+        if rows:
+            self.shown.update(url for url, _ in rows)
+            self.urls_ready.emit(rows)
 
 
-class FileSearchDialog(QDialog):
+class URLDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setWindowTitle("File Search")
+        self.setWindowTitle("Open URLs")
         self.setMinimumSize(400, 300)
+        self.reader = None
+        self.browser_counts = {}
 
         layout = QVBoxLayout()
-        self.search_input = QLineEdit(self)
-        self.search_input.setPlaceholderText("Enter file name or extension (e.g., '.txt')")
-        layout.addWidget(QLabel("Search Files:"))
-        layout.addWidget(self.search_input)
+        self.window_dropdown = QComboBox(self)
+        for label, hours in RECENT_URL_WINDOWS:
+            self.window_dropdown.addItem(label, hours)
+        self.window_dropdown.currentIndexChanged.connect(self.load_urls)
+        self.url_text = QPlainTextEdit(self)
+        self.url_text.setReadOnly(True)
+        self.status_label = QLabel(self)
 
-        self.results_text = QTextEdit(self)
-        self.results_text.setReadOnly(True)
-        layout.addWidget(self.results_text)
+        button_box = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Close)
+        button_box.accepted.connect(self.save_urls)
+        button_box.rejected.connect(self.reject)
 
-        button_layout = QHBoxLayout()
-        search_button = QPushButton("Search")
-        search_button.clicked.connect(self.perform_search)
-        save_button = QPushButton("Save Results")
-        save_button.clicked.connect(self.save_results)
-        button_layout.addWidget(search_button)
-        button_layout.addWidget(save_button)
-
-        layout.addLayout(button_layout)
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(QLabel("Open URLs:"))
+        header_layout.addStretch()
+        header_layout.addWidget(self.window_dropdown)
+        layout.addLayout(header_layout)
+        layout.addWidget(self.url_text)
+        layout.addWidget(self.status_label)
+        layout.addWidget(button_box)
         self.setLayout(layout)
-
-    def perform_search(self):
-        search_term = self.search_input.text().strip().lower()
-        if not search_term:
-            self.results_text.setText("Please enter a search term.")
+        self.load_urls()
+
+    def load_urls(self):
+        self.stop_reader()
+        self.url_text.clear()
+        self.browser_counts = {}
+        self.status_label.setText("Reading browser history...")
+        self.reader = URLReaderThread(self.window_dropdown.currentData(), self)
+        self.reader.urls_ready.connect(self.append_urls)
+        self.reader.reading_finished.connect(self.on_reading_finished)
+        self.reader.start()
+
+    def stop_reader(self):
+        """Stop the reader without waiting for it: it outlives the dialog, parented to the
+        application, until it notices and finishes, and then deletes itself."""
+        reader, self.reader = self.reader, None
+        if reader is not None:
+            reader.urls_ready.disconnect()
+            reader.reading_finished.disconnect()
+            reader.requestInterruption()
+            reader.setParent(QApplication.instance())
+            reader.finished.connect(reader.deleteLater)
+            if reader.isFinished():
+                reader.deleteLater()
+
+    def append_urls(self, rows):
+        if self.sender() is not self.reader:
+            return  # Late batch from a reader that was replaced
+        self.url_text.appendPlainText("\n".join(url for url, _ in rows))
+        for _, browser in rows:
+            self.browser_counts[browser] = self.browser_counts.get(browser, 0) + 1
+        self.status_label.setText(f"{sum(self.browser_counts.values())} URLs so far...")
+
+    def on_reading_finished(self, total):
+        if self.sender() is not self.reader:
             return
+        found = ", ".join(f"{browser}: {count}" for browser, count in self.browser_counts.items())
+        self.status_label.setText(f"{total} URLs ({found})." if total else "No browser history found.")
 
-        file_index = load_file_index()
-        results = []
-        for filename, paths in file_index.items():
-            if search_term in filename.lower():
-                results.extend(paths)
+    def done(self, result):
+        self.stop_reader()
+        super().done(result)
 
-        self.results_text.setPlainText("\n".join(results) if results else "No files found.")
-
-    def save_results(self):
-        results_text = self.results_text.toPlainText()
-        if not results_text:
-            return
-
-        file_path, _ = QFileDialog.getSaveFileName(self, "Save Search Results", "", "Text Files (*.txt)")
+    def save_urls(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save URLs", "", "Text Files (*.txt)")
         if file_path:
             with open(file_path, "w") as file:
-                file.write(results_text)
+                file.write(self.url_text.toPlainText())
+        self.accept()
 
 
 class Taskbar(QWidget):
+    first_painted = pyqtSignal()
+
     def __init__(self, show_main_window_callback):
         super().__init__()
         self.setWindowTitle("Workspace Taskbar")
         self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.CustomizeWindowHint)
         self.is_minimized = False
         self.saved_geometry = None
+        self.painted = False
         # Initialize UI and other components
         self.init_horizontal_expanded()
-        self.clipboard_manager = ClipboardManager()
+        self.clipboard_manager = None  # Started once the taskbar is on screen
+        self.launcher = None  # LauncherEngine, created on the first launch or pre-warm
         self.notepad = None
         # Set up layout and UI components
         self.init_ui(show_main_window_callback)
@@ -173,8 +274,48 @@ class Taskbar(QWidget):
         # Set up and defer file indexing
         self.indexer_thread = FileIndexerThread()
         self.indexer_thread.finished.connect(self.on_file_indexing_finished)
+        self.daemon_keepalive = None  # Keeps the shared index daemon, and with it the live index, running
+        self.keepalive_timer = QTimer(self)
+        self.keepalive_timer.setInterval(DAEMON_KEEPALIVE_MS)
         # Run indexing in the background after the taskbar UI is shown
-        QTimer.singleShot(1000, self.indexer_thread.start)  # Starts indexing 1 second after initialization
+        QTimer.singleShot(1000, self.start_indexing)  # Starts indexing 1 second after initialization
+        self.first_painted.connect(lambda: QTimer.singleShot(0, self.start_clipboard_manager))
+        self.first_painted.connect(lambda: QTimer.singleShot(PREWARM_DELAY_MS, self.prewarm_launcher_entries))
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.painted:
+            self.painted = True
+            self.first_painted.emit()
+
+    def start_clipboard_manager(self):
+        """Open the clipboard store and start capturing, unless that already happened."""
+        if self.clipboard_manager is None:
+            from app.clipboard_manager import ClipboardManager
+            self.clipboard_manager = ClipboardManager()
+        return self.clipboard_manager
+
+    def start_indexing(self):
+        """Start the index daemon shared by all taskbars, or index in-process without Unix sockets."""
+        from app.index_protocol import DaemonKeepAlive, daemon_supported
+        if daemon_supported():
+            self.daemon_keepalive = DaemonKeepAlive()
+            self.daemon_keepalive.check()  # Starts the daemon
+            self.keepalive_timer.timeout.connect(self.daemon_keepalive.check)
+            self.keepalive_timer.start()
+        else:
+            self.indexer_thread.start()
+
+    def launcher_engine(self):
+        if self.launcher is None:
+            from app.launcher import LauncherEngine
+            self.launcher = LauncherEngine(self)
+            self.launcher.failed.connect(self.on_launch_failed)
+        return self.launcher
+
+    def prewarm_launcher_entries(self):
+        if any(entry.get("prewarm") for entry in self.launcher_entries):
+            self.launcher_engine().prewarm(self.launcher_entries)
 
     def init_ui(self, show_main_window_callback):
         self.main_layout = QHBoxLayout()
@@ -216,7 +357,9 @@ class Taskbar(QWidget):
         return button
 
     def show_search_dialog(self):
-        search_dialog = FileSearchDialog(self)
+        from app.file_search import FileSearchDialog
+        with instrumentation.timed("dialog.file_search"):
+            search_dialog = FileSearchDialog(self)
         search_dialog.exec_()
 
     def create_launcher_button(self, button_size, icon_size):
@@ -229,6 +372,9 @@ class Taskbar(QWidget):
         add_entry_action = QAction("+ Add New Entry", self)
         add_entry_action.triggered.connect(self.show_add_entry_dialog)
         launcher_menu.addAction(add_entry_action)
+        self.processes_menu = launcher_menu.addMenu("Processes")
+        self.processes_menu.aboutToShow.connect(self.populate_processes_menu)
+        launcher_menu.addSeparator()
         launcher_button.setMenu(launcher_menu)
         self.load_launcher_entries(launcher_menu)
         return launcher_button
@@ -254,28 +400,35 @@ class Taskbar(QWidget):
             action = QAction(entry_data["name"], self)
             action.triggered.connect(lambda _, e=entry_data: self.execute_entry(e))
             self.launcher_button.menu().addAction(action)
+            if entry_data["prewarm"]:
+                self.launcher_engine().prewarm([entry_data])
 
     def save_launcher_entries(self):
         with open("launcher_entries.json", "w") as file:
             json.dump(self.launcher_entries, file, indent=4)
 
     def execute_entry(self, entry):
-        process = QProcess(self)
-        args = entry["parameters"].split() if entry["parameters"] else []
-        process.start(entry["path"], args)
+        self.launcher_engine().launch(entry)
+
+    def on_launch_failed(self, record):
+        QMessageBox.warning(self, "Launch failed", f"Could not start {record.name} ({record.program}):\n{record.error}")
+
+    def populate_processes_menu(self):
+        """List running launches first, then the most recently finished ones."""
+        self.processes_menu.clear()
+        records = []
+        if self.launcher is not None:
+            records = self.launcher.processes + list(reversed(self.launcher.finished_processes))
+        if not records:
+            self.processes_menu.addAction("No launched processes").setEnabled(False)
+        for record in records:
+            action = self.processes_menu.addAction(record.summary())
+            action.triggered.connect(lambda _, r=record: LaunchedProcessDialog(r, self).exec_())
 
     def show_url_list(self):
-        urls = self.get_all_open_urls()
-        if urls:
-            url_dialog = URLDialog(urls, self)
-            url_dialog.exec_()
-
-    def get_all_open_urls(self):
-        urls = []
-        urls.extend(get_chrome_open_urls())
-        urls.extend(get_edge_open_urls())
-        urls.extend(get_firefox_open_urls())
-        return urls
+        with instrumentation.timed("dialog.urls"):
+            url_dialog = URLDialog(self)
+        url_dialog.exec_()
 
     def relocate_taskbar(self, position):
         screen_geometry = QGuiApplication.primaryScreen().availableGeometry()
@@ -351,9 +504,10 @@ class Taskbar(QWidget):
     def show_clipboard_notepad(self):
         """Show clipboard notepad if not already visible, and handle any unexpected errors."""
         try:
-            clipboard_history = self.clipboard_manager.get_clipboard_history()
             if not self.notepad or not self.notepad.isVisible():
-                self.notepad = ClipboardNotepad(clipboard_history)
+                from app.clipboard_notepad import ClipboardNotepad
+                with instrumentation.timed("dialog.clipboard_notepad"):
+                    self.notepad = ClipboardNotepad(self.start_clipboard_manager().store)
                 self.notepad.show()
         except Exception as e:
             print(f"Error showing ClipboardNotepad: {e}")
@@ -398,6 +552,15 @@ class Taskbar(QWidget):
     def close_widget(self):
         self.close()
 
+    def closeEvent(self, event):
+        self.indexer_thread.stop()
+        self.keepalive_timer.stop()
+        if self.daemon_keepalive is not None:
+            self.daemon_keepalive.close()  # The daemon exits once no taskbar is left, after its idle timeout
+        if self.launcher is not None:
+            self.launcher.shutdown()
+        super().closeEvent(event)
+
     def on_file_indexing_finished(self):
         print("File indexing completed.")
 
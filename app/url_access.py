@@ -1,73 +1,461 @@
-import sqlite3
+import abc
+import configparser
 import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
+from app import instrumentation
+
+FETCH_BATCH = 1000  # Rows fetched per fetchmany and handed to the writer as one batch
+HARVEST_QUEUE_BATCHES = 64  # Batches buffered between the reading threads and the cache writer
+QUEUE_PUT_TIMEOUT = 0.1  # Seconds a reading thread waits on a full queue before checking for a stop
+HARVEST_COMMIT_INTERVAL = 0.25  # Seconds between commits of harvested URLs; each batch costs a commit
+LOCK_TIMEOUT = 1.0  # Seconds to wait for a browser's lock before reading the file without locking
+BACKUP_STEP_PAGES = 1024  # Pages copied per backup step; cancellation is checked between steps
+BACKUP_MAX_RESTARTS = 3  # Restarts caused by browser writes before the rest is copied in one step
+
+
+class SnapshotCancelled(Exception):
+    """A snapshot was cancelled between two backup steps."""
+
+
+class BackupRestarting(Exception):
+    """The source keeps changing between backup steps."""
+
 
-def get_chrome_open_urls():
-    """Get open URLs from Chrome."""
-    urls = []
-    user_data_path = Path(os.getenv('LOCALAPPDATA')) / "Google/Chrome/User Data/Default"
-    history_file = user_data_path / "History"
+def copy_database(source, destination, cancelled=lambda: False):
+    """Back ``source`` up into ``destination`` in steps of BACKUP_STEP_PAGES pages.
 
-    if not history_file.exists():
-        print("Chrome history file not found.")
-        return urls
+    Between steps ``cancelled`` is checked and SnapshotCancelled raised. The source's read
+    lock is released between steps, so a browser write restarts the backup; after
+    BACKUP_MAX_RESTARTS restarts the copy is finished in one step, holding the lock instead.
+    """
+    progress_state = {"remaining": None, "restarts": 0}
+
+    def progress(status, remaining, total):
+        if cancelled():
+            raise SnapshotCancelled()
+        if progress_state["remaining"] is not None and remaining > progress_state["remaining"]:
+            progress_state["restarts"] += 1
+            if progress_state["restarts"] > BACKUP_MAX_RESTARTS:
+                raise BackupRestarting()
+        progress_state["remaining"] = remaining
 
     try:
-        # Connect to the Chrome history SQLite database
-        with sqlite3.connect(history_file) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT url FROM urls WHERE hidden = 0")
-            urls = [row[0] for row in cursor.fetchall()]
-    except sqlite3.OperationalError as e:
-        print(f"Error accessing Chrome history file: {e}")
-    return urls
-
-
-def get_edge_open_urls():
-    """Get open URLs from Edge."""
-    urls = []
-    user_data_path = Path(os.getenv('LOCALAPPDATA')) / "Microsoft/Edge/User Data/Default"
-    history_file = user_data_path / "History"
-
-    if not history_file.exists():
-        print("Edge history file not found.")
-        return urls
+        source.backup(destination, pages=BACKUP_STEP_PAGES, progress=progress)
+    except BackupRestarting:
+        instrumentation.count("urls.backup_restarts_exhausted")
+        source.backup(destination)
+
 
+def backup_database(database_path, destination, cancelled=lambda: False):
+    """Copy a live SQLite database into ``destination`` with the online backup API.
+
+    The source is opened read-only so the browser is never blocked by us. If the browser holds
+    an exclusive lock, the file is read as immutable instead, which skips locking entirely.
+    The copy is made in steps, so ``cancelled`` stops it promptly (see copy_database).
+    """
+    uri = Path(database_path).resolve().as_uri()
+    try:
+        source = sqlite3.connect(f"{uri}?mode=ro", uri=True, timeout=LOCK_TIMEOUT)
+        try:
+            # backup() retries forever while the source is busy, so probe the lock first:
+            # a plain read honours the timeout and raises if the browser holds the file
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            copy_database(source, destination, cancelled)
+            return
+        finally:
+            source.close()
+    except sqlite3.OperationalError:
+        pass
+    source = sqlite3.connect(f"{uri}?immutable=1", uri=True)
     try:
-        # Connect to the Edge history SQLite database
-        with sqlite3.connect(history_file) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT url FROM urls WHERE hidden = 0")
-            urls = [row[0] for row in cursor.fetchall()]
-    except sqlite3.OperationalError as e:
-        print(f"Error accessing Edge history file: {e}")
-    return urls
+        copy_database(source, destination, cancelled)
+    finally:
+        source.close()
+
+
+def open_wal_snapshot(database_path):
+    """Open a read transaction on a live database in WAL mode, or return None.
+
+    In WAL mode a reader sees a consistent snapshot and never blocks the browser's writers, so
+    nothing has to be copied. Databases in rollback-journal mode, or held with an exclusive
+    lock, return None and have to be copied instead.
+    """
+    uri = Path(database_path).resolve().as_uri()
+    try:
+        conn = sqlite3.connect(f"{uri}?mode=ro", uri=True, timeout=LOCK_TIMEOUT, isolation_level=None)
+    except sqlite3.OperationalError:
+        return None
+    try:
+        if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal":
+            conn.execute("BEGIN")
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()  # Starts the read transaction
+            return conn
+    except sqlite3.OperationalError:
+        pass
+    conn.close()
+    return None
+
+
+@contextmanager
+def open_snapshot(database_path, cancelled=lambda: False):
+    """Yield a connection to a consistent snapshot of a live browser database.
+
+    A database in WAL mode is read in place, inside one read transaction (see
+    open_wal_snapshot), so writes that only reached the WAL never cause a whole copy. Other
+    databases are copied into a temporary file rather than into memory, so large histories
+    do not have to fit in memory; it is deleted on exit.
+    """
+    conn = open_wal_snapshot(database_path)
+    if conn is not None:
+        instrumentation.count("urls.wal_snapshots")
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+    fd, snapshot_path = tempfile.mkstemp(prefix="wsm_history_", suffix=".sqlite")
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(snapshot_path)
+        try:
+            backup_database(database_path, conn, cancelled)
+            yield conn
+        finally:
+            conn.close()
+    finally:
+        os.remove(snapshot_path)
+
+
+def file_signature(path):
+    """(mtime, size) of a database and of its WAL file, where recent writes may still sit."""
+    parts = []
+    for candidate in (path, f"{path}-wal"):
+        try:
+            stat = os.stat(candidate)
+        except OSError:
+            continue
+        parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+    return "|".join(parts) or None
+
+
+class HistoryProvider(abc.ABC):
+    """A browser's history databases and how to read their URLs incrementally.
+
+    Subclasses say where the databases are and name the table and columns; snapshotting,
+    high-water marks and streaming the rows are shared.
+    """
+    name = "Browser"
+    table = ""
+    visit_column = ""  # Raw last-visit time, in the browser's own units
+    unix_visit = ""  # SQL expression turning visit_column into Unix seconds
+    visit_offset = 0  # Raw visit = (Unix seconds + visit_offset) * visit_scale
+    visit_scale = 1_000_000
+    condition = "1"
+
+    @abc.abstractmethod
+    def history_files(self):
+        """Existing history database files for this browser."""
+
+    def max_id(self, conn):
+        return conn.execute(f"SELECT MAX(id) FROM {self.table}").fetchone()[0] or 0
+
+    def raw_visit(self, unix_seconds):
+        return int((unix_seconds + self.visit_offset) * self.visit_scale)
 
+    def read_since(self, conn, high_id, high_visit, batch_size=FETCH_BATCH, cancelled=lambda: False,
+                   visited_from=None, visited_before=None):
+        """Yield lists of (id, url, raw visit, Unix visit) for rows added after ``high_id`` or
+        visited after ``high_visit``, optionally only those last visited at or after
+        ``visited_from`` or before ``visited_before`` (Unix seconds; never visited counts as
+        before)."""
+        where, params = [self.condition, f"(id > ? OR {self.visit_column} > ?)"], [high_id, high_visit]
+        if visited_from is not None:
+            where.append(f"{self.visit_column} >= ?")
+            params.append(self.raw_visit(visited_from))
+        if visited_before is not None:
+            where.append(f"({self.visit_column} < ? OR {self.visit_column} IS NULL)")
+            params.append(self.raw_visit(visited_before))
+        cursor = conn.execute(
+            f"SELECT id, url, COALESCE({self.visit_column}, 0), {self.unix_visit} FROM {self.table}"
+            f" WHERE {' AND '.join(where)}", params)
+        while not cancelled():
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
 
-def get_firefox_open_urls():
-    """Get open URLs from Firefox."""
-    urls = []
-    profile_path = Path(os.getenv('APPDATA')) / "Mozilla/Firefox/Profiles"
 
-    # Find the default profile directory
-    profile_dirs = list(profile_path.glob("*.default-release"))
-    if not profile_dirs:
-        print("Firefox profile directory not found.")
-        return urls
+_profile_cache = {}  # data dir -> (mtime signature, profile dirs)
+_profile_cache_lock = threading.Lock()
 
-    session_file = profile_dirs[0] / "places.sqlite"
 
-    if not session_file.exists():
-        print("Firefox session file not found.")
-        return urls
+def path_mtimes(paths):
+    signature = []
+    for path in paths:
+        try:
+            signature.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
 
+
+def discover_profiles(data_dir, scan, watched=()):
+    """Return the profile directories that ``scan`` finds under a browser's data directory.
+
+    Results are cached per directory and only rescanned when the mtime of ``data_dir`` or of
+    one of the ``watched`` entries inside it changes, i.e. when profiles were added, removed
+    or (for Firefox) profiles.ini was rewritten.
+    """
+    data_dir = Path(data_dir)
+    signature = path_mtimes([data_dir, *(data_dir / name for name in watched)])
+    if signature[0] is None:
+        return []
+    with _profile_cache_lock:
+        cached = _profile_cache.get(data_dir)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    profiles = scan(data_dir)
+    with _profile_cache_lock:
+        _profile_cache[data_dir] = (signature, profiles)
+    return profiles
+
+
+def chromium_profile_dirs(user_data_dir):
+    """Default, Profile 1, ...: every subdirectory holding a Preferences file, except the
+    internal System Profile."""
     try:
-        # Connect to the Firefox places.sqlite database
-        with sqlite3.connect(session_file) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT url FROM moz_places")
-            urls = [row[0] for row in cursor.fetchall()]
-    except sqlite3.OperationalError as e:
-        print(f"Error accessing Firefox session file: {e}")
-    return urls
+        entries = list(os.scandir(user_data_dir))
+    except OSError:
+        return []
+    return sorted(Path(entry.path) for entry in entries
+                  if entry.is_dir() and entry.name != "System Profile"
+                  and os.path.isfile(os.path.join(entry.path, "Preferences")))
+
+
+def firefox_profile_dirs(firefox_dir):
+    """Profiles listed in profiles.ini, or any directory holding a prefs.js if it is missing."""
+    profiles = []
+    parser = configparser.RawConfigParser()
+    try:
+        parser.read(firefox_dir / "profiles.ini", encoding="utf-8")
+    except configparser.Error:
+        pass
+    for section in parser.sections():
+        if section.startswith("Profile") and parser.has_option(section, "Path"):
+            path = parser.get(section, "Path")
+            relative = parser.get(section, "IsRelative", fallback="1") == "1"
+            profiles.append(firefox_dir / path if relative else Path(path))
+    if not profiles:
+        for candidate in (firefox_dir / "Profiles", firefox_dir):
+            try:
+                profiles.extend(Path(entry.path) for entry in os.scandir(candidate)
+                                if entry.is_dir() and os.path.isfile(os.path.join(entry.path, "prefs.js")))
+            except OSError:
+                continue
+    return sorted(set(profiles))
+
+
+class ChromiumHistoryProvider(HistoryProvider):
+    """Chrome, Edge and other Chromium browsers share the same History schema.
+
+    Every profile of the user data directory is read; the directory is looked up under
+    %LOCALAPPDATA% on Windows, ~/.config on Linux and ~/Library/Application Support on macOS.
+    """
+    table = "urls"
+    visit_column = "last_visit_time"  # Microseconds since 1601-01-01
+    unix_visit = "last_visit_time / 1000000 - 11644473600"
+    visit_offset = 11644473600
+    condition = "hidden = 0"
+
+    def __init__(self, name, windows_dir=None, linux_dir=None, mac_dir=None):
+        self.name = name
+        self.windows_dir = windows_dir  # Relative to %LOCALAPPDATA%
+        self.linux_dir = linux_dir  # Relative to ~/.config
+        self.mac_dir = mac_dir  # Relative to ~/Library/Application Support
+
+    def user_data_dirs(self):
+        dirs = []
+        local_app_data = os.getenv('LOCALAPPDATA')
+        if local_app_data and self.windows_dir:
+            dirs.append(Path(local_app_data) / self.windows_dir)
+        if self.linux_dir:
+            dirs.append(Path(os.getenv('XDG_CONFIG_HOME') or Path.home() / ".config") / self.linux_dir)
+        if self.mac_dir:
+            dirs.append(Path.home() / "Library/Application Support" / self.mac_dir)
+        return dirs
+
+    def history_files(self):
+        history_files = []
+        for user_data_dir in self.user_data_dirs():
+            for profile_dir in discover_profiles(user_data_dir, chromium_profile_dirs):
+                # Checked on every call: a new profile only gets its History on first browse
+                history_file = profile_dir / "History"
+                if history_file.is_file():
+                    history_files.append(history_file)
+        return history_files
+
+
+class FirefoxHistoryProvider(HistoryProvider):
+    """Reads every Firefox profile, found through profiles.ini in %APPDATA%/Mozilla/Firefox,
+    ~/.mozilla/firefox (also the snap's copy) or ~/Library/Application Support/Firefox."""
+    name = "Firefox"
+    table = "moz_places"
+    visit_column = "last_visit_date"  # Microseconds since the Unix epoch, NULL if never visited
+    unix_visit = "COALESCE(last_visit_date, 0) / 1000000"
+
+    def firefox_dirs(self):
+        dirs = []
+        app_data = os.getenv('APPDATA')
+        if app_data:
+            dirs.append(Path(app_data) / "Mozilla/Firefox")
+        home = Path.home()
+        dirs.extend([home / ".mozilla/firefox", home / "snap/firefox/common/.mozilla/firefox",
+                     home / "Library/Application Support/Firefox"])
+        return dirs
+
+    def history_files(self):
+        history_files = []
+        for firefox_dir in self.firefox_dirs():
+            for profile_dir in discover_profiles(firefox_dir, firefox_profile_dirs, ("profiles.ini", "Profiles")):
+                places_file = profile_dir / "places.sqlite"
+                if places_file.is_file():
+                    history_files.append(places_file)
+        return history_files
+
+
+HISTORY_PROVIDERS = [
+    ChromiumHistoryProvider("Chrome", "Google/Chrome/User Data", "google-chrome", "Google/Chrome"),
+    ChromiumHistoryProvider("Chromium", "Chromium/User Data", "chromium", "Chromium"),
+    ChromiumHistoryProvider("Edge", "Microsoft/Edge/User Data", "microsoft-edge", "Microsoft Edge"),
+    FirefoxHistoryProvider(),
+]
+
+
+def harvest_browser_histories(cache, providers=None, cancelled=lambda: False, batch_size=FETCH_BATCH,
+                              on_batch=None, since=None):
+    """Bring a UrlCache up to date with every provider's history files, reading them concurrently.
+
+    Every profile's history file is a separate source read on its own pool thread. Files whose
+    signature is unchanged since the last harvest are skipped outright. The others are
+    snapshotted and only rows past their high-water mark are fetched; if a file's ids went
+    backwards (history was cleared) it is harvested from scratch. Pool threads hand batches to
+    the calling thread through a bounded queue, so only the caller writes to the cache. Batches
+    are committed at least every HARVEST_COMMIT_INTERVAL seconds and, once committed, passed to
+    ``on_batch(browser, rows)`` of (url, last visit) on the calling thread, so callers can show
+    URLs as they come in. With ``since`` (Unix seconds), only rows last visited at or after it
+    are passed on: the history query is bounded by it, and the older rows are read in a second
+    query afterwards, for the cache alone.
+    Returns browser name -> rows harvested.
+    """
+    providers = HISTORY_PROVIDERS if providers is None else providers
+    started = time.perf_counter()
+    marks = cache.source_marks()
+    sources = []
+    for provider in providers:
+        for history_file in provider.history_files():
+            path = str(history_file)
+            signature = file_signature(path)
+            previous = marks.get(path)
+            if previous is not None and previous[0] == signature:
+                instrumentation.count("urls.sources_unchanged")
+                continue
+            high_id, high_visit = previous[1:] if previous is not None else (0, 0)
+            sources.append((provider, path, signature, high_id, high_visit))
+
+    harvested = {provider.name: 0 for provider in providers}
+    instrumentation.count("urls.sources_read", len(sources))
+    if not sources:
+        instrumentation.record_time("urls.harvest", time.perf_counter() - started)
+        return harvested
+    results = queue.Queue(maxsize=HARVEST_QUEUE_BATCHES)
+    consumer_gone = threading.Event()  # The calling thread stopped reading the queue, e.g. it raised
+
+    def stopped():
+        return cancelled() or consumer_gone.is_set()
+
+    def put(result):
+        """Queue a result for the calling thread; False once it no longer reads the queue."""
+        while not consumer_gone.is_set():
+            try:
+                results.put(result, timeout=QUEUE_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def harvest(provider, path, signature, high_id, high_visit):
+        try:
+            with instrumentation.timed("urls.read_source"), open_snapshot(path, stopped) as conn:
+                if provider.max_id(conn) < high_id:
+                    high_id = high_visit = 0
+                new_id, new_visit = high_id, high_visit
+                # (visited_from, visited_before, passed on) for each query
+                windows = [(None, None, True)] if since is None else [(since, None, True), (None, since, False)]
+                for visited_from, visited_before, shown in windows:
+                    for rows in provider.read_since(conn, high_id, high_visit, batch_size, stopped,
+                                                    visited_from, visited_before):
+                        new_id = max(new_id, max(row[0] for row in rows))
+                        new_visit = max(new_visit, max(row[2] for row in rows))
+                        if not put((provider, [(url, visit) for _, url, _, visit in rows], shown)):
+                            return
+                if not stopped():
+                    put((provider, None, (path, signature, new_id, new_visit)))
+        except SnapshotCancelled:
+            pass
+        except (sqlite3.Error, OSError) as e:
+            instrumentation.count("urls.errors")
+            print(f"Error accessing {provider.name} history file: {e}")
+        finally:
+            put(None)
+
+    with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+        for source in sources:
+            pool.submit(harvest, *source)
+        uncommitted = []
+        last_commit = time.perf_counter()
+
+        def commit():
+            nonlocal last_commit
+            cache.commit()
+            last_commit = time.perf_counter()
+            if on_batch is not None:
+                for browser, rows in uncommitted:
+                    on_batch(browser, rows)
+            uncommitted.clear()
+
+        try:
+            finished = 0
+            while finished < len(sources):
+                try:
+                    result = results.get(timeout=HARVEST_COMMIT_INTERVAL)
+                except queue.Empty:
+                    result = False  # Quiet queue: still commit what is pending
+                if result and result[1] is not None:
+                    provider, rows, shown = result
+                    cache.add_urls(provider.name, rows)
+                    harvested[provider.name] += len(rows)
+                    if shown:
+                        uncommitted.append((provider.name, rows))
+                elif result:
+                    provider, _, (path, signature, high_id, high_visit) = result
+                    cache.update_source(path, provider.name, signature, high_id, high_visit)
+                    commit()
+                elif result is None:
+                    finished += 1
+                if uncommitted and time.perf_counter() - last_commit >= HARVEST_COMMIT_INTERVAL:
+                    commit()
+            commit()
+        finally:
+            # Lets reading threads blocked on a full queue give up, so leaving the pool cannot hang
+            consumer_gone.set()
+    instrumentation.count("urls.rows", sum(harvested.values()))
+    instrumentation.record_time("urls.harvest", time.perf_counter() - started)
+    return harvested
@@ -0,0 +1,115 @@
+import sqlite3
+
+URL_CACHE_DB = "url_cache.db"
+SCHEMA_VERSION = 1
+CACHE_SIZE_KIB = 64 * 1024  # Page cache for merging large first harvests into the url index
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    browser TEXT NOT NULL,
+    signature TEXT,
+    high_id INTEGER NOT NULL DEFAULT 0,
+    high_visit INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    browser TEXT NOT NULL,
+    last_visit INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS urls_last_visit ON urls (last_visit);
+"""
+
+
+class UrlCache:
+    """Local, deduplicated copy of the URLs harvested from every browser history database.
+
+    Each history file (a browser profile) is a source with a high-water mark: the largest row
+    id and raw visit time already harvested, so later harvests only fetch rows added or
+    revisited since. The file's signature lets unchanged sources be skipped without reading
+    them at all. URLs are unique across browsers and keep their most recent visit (in Unix
+    seconds), which is indexed for recency queries.
+    Like the other stores, a cache must stay on the thread that opened it.
+    """
+
+    def __init__(self, db_path=URL_CACHE_DB):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+        schema_version = self._get_meta("schema_version")
+        if schema_version != str(SCHEMA_VERSION):
+            if schema_version is not None:
+                self._drop_tables()
+            self.conn.executescript(SCHEMA)
+            self._set_meta("schema_version", SCHEMA_VERSION)
+            self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _get_meta(self, key):
+        try:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        except sqlite3.OperationalError:  # Fresh database without tables yet
+            return None
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _drop_tables(self):
+        for table in ("urls", "sources", "meta"):
+            self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+    # ---- harvesting -----------------------------------------------------------------------
+
+    def source_marks(self):
+        """Return path -> (signature, high_id, high_visit) for every known history file."""
+        return {path: (signature, high_id, high_visit) for path, signature, high_id, high_visit
+                in self.conn.execute("SELECT path, signature, high_id, high_visit FROM sources")}
+
+    def add_urls(self, browser, rows):
+        """Merge (url, last_visit) rows, keeping the most recent visit of each URL."""
+        self.conn.executemany(
+            "INSERT INTO urls (url, browser, last_visit) VALUES (?, ?, ?)"
+            " ON CONFLICT (url) DO UPDATE SET browser = excluded.browser, last_visit = excluded.last_visit"
+            " WHERE excluded.last_visit > urls.last_visit",
+            [(url, browser, last_visit) for url, last_visit in rows])
+
+    def commit(self):
+        self.conn.commit()
+
+    def update_source(self, path, browser, signature, high_id, high_visit):
+        """Record a source's new high-water mark, once every URL below it was added."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sources (path, browser, signature, high_id, high_visit) VALUES (?, ?, ?, ?, ?)",
+            (path, browser, signature, high_id, high_visit))
+        self.conn.commit()
+
+    # ---- reading --------------------------------------------------------------------------
+
+    def iter_recent(self, since=None, batch_size=1000):
+        """Yield lists of (url, browser) visited at or after ``since`` (Unix seconds, None for
+        all), most recent first."""
+        if since is None:
+            cursor = self.conn.execute("SELECT url, browser FROM urls ORDER BY last_visit DESC")
+        else:
+            cursor = self.conn.execute("SELECT url, browser FROM urls WHERE last_visit >= ? ORDER BY last_visit DESC",
+                                       (since,))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+
+    def url_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
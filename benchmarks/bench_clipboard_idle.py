@@ -0,0 +1,121 @@
+"""Compare idle wakeups and capture rate of the old polling clipboard monitor with ClipboardManager.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_clipboard_idle.py --seconds 10
+
+Each monitor first sits idle for --seconds while the main thread's voluntary context switches
+(Linux RUSAGE_THREAD), CPU time and handler calls are counted. A burst of --copies distinct
+copies is then made faster than the poll interval to count how many of them were captured.
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from PyQt5.QtCore import QEventLoop, QTimer  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from app.clipboard_manager import ClipboardManager  # noqa: E402
+from app.clipboard_store import ClipboardStore  # noqa: E402
+
+
+class PollingClipboardMonitor:
+    """The original ClipboardManager: poll clipboard.text() and compare full strings."""
+
+    def __init__(self, interval_ms):
+        self.clipboard = QApplication.clipboard()
+        self.clipboard_history = []
+        self.previous_text = ""
+        self.clipboard_timer = QTimer()
+        self.clipboard_timer.timeout.connect(self.check_clipboard)
+        self.clipboard_timer.start(interval_ms)
+
+    def check_clipboard(self):
+        current_text = self.clipboard.text()
+        if current_text and current_text != self.previous_text:
+            self.clipboard_history.append(current_text)
+            self.previous_text = current_text
+
+    def stop_monitoring(self):
+        self.clipboard_timer.stop()
+
+
+def count_calls(monitor):
+    calls = [0]
+    check = monitor.check_clipboard
+
+    def counted():
+        calls[0] += 1
+        check()
+    monitor.check_clipboard = counted
+    if isinstance(monitor, ClipboardManager):
+        monitor.change_timer.timeout.disconnect()
+        monitor.change_timer.timeout.connect(counted)
+    else:
+        monitor.clipboard_timer.timeout.disconnect()
+        monitor.clipboard_timer.timeout.connect(counted)
+    return calls
+
+
+def run_event_loop(seconds):
+    """Spin the event loop for ``seconds`` using a single wall-clock deadline wakeup."""
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec_()
+
+
+def measure_idle(monitor, seconds):
+    calls = count_calls(monitor)
+    usage = resource.getrusage(resource.RUSAGE_THREAD)
+    cpu = time.process_time()
+    run_event_loop(seconds)
+    after = resource.getrusage(resource.RUSAGE_THREAD)
+    # One switch is the deadline timer ending the measurement itself
+    wakeups = max(0, after.ru_nvcsw - usage.ru_nvcsw - 1)
+    return calls[0], wakeups, time.process_time() - cpu
+
+
+def captured(monitor):
+    if isinstance(monitor, ClipboardManager):
+        return monitor.store.entry_count
+    return len(monitor.clipboard_history)
+
+
+def measure_burst(app, monitor, copies, gap_ms):
+    captured_before = captured(monitor)
+    for i in range(copies):
+        app.clipboard().setText(f"burst copy {time.time_ns()} {i}")
+        run_event_loop(gap_ms / 1000)
+    return captured(monitor) - captured_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--poll-interval", type=int, default=3000, help="Legacy poll interval in ms")
+    parser.add_argument("--copies", type=int, default=20)
+    parser.add_argument("--copy-gap", type=int, default=50, help="Delay between burst copies in ms")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    app.clipboard().setText("benchmark baseline")
+    scratch = tempfile.mkdtemp(prefix="wsm_clipboard_bench_")
+    monitors = (("3s QTimer poll (original)", lambda: PollingClipboardMonitor(args.poll_interval)),
+                ("dataChanged + hash", lambda: ClipboardManager(
+                    ClipboardStore(os.path.join(scratch, "history.db"), os.path.join(scratch, "blobs")),
+                    image_dir=os.path.join(scratch, "images"))))
+    print(f"{'monitor':<28}{'idle calls':>11}{'wakeups':>9}{'idle CPU':>10}{'captured':>11}")
+    for label, factory in monitors:
+        monitor = factory()
+        calls, wakeups, cpu = measure_idle(monitor, args.seconds)
+        burst = measure_burst(app, monitor, args.copies, args.copy_gap)
+        monitor.stop_monitoring()
+        print(f"{label:<28}{calls:>11}{wakeups:>9}{cpu * 1000:>8.1f}ms{burst:>6}/{args.copies}")
+
+
+if __name__ == "__main__":
+    main()
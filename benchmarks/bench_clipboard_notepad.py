@@ -0,0 +1,82 @@
+"""Time opening the clipboard history window: the original joined QTextEdit vs ClipboardNotepad.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_clipboard_notepad.py --entries 10000
+
+A ClipboardStore with --entries synthetic entries (a mix of short snippets and multi-line
+blocks) is built in a temp directory. Each window is timed from construction until it has
+been shown and its pending events processed.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from PyQt5.QtWidgets import QApplication, QDialog, QTextEdit, QVBoxLayout  # noqa: E402
+
+from app.clipboard_manager import ClipboardEntry, content_digest  # noqa: E402
+from app.clipboard_notepad import ClipboardNotepad  # noqa: E402
+from app.clipboard_store import ClipboardStore  # noqa: E402
+
+WORDS = ["clipboard", "manager", "def", "return", "self", "https://example.com/page", "import", "value"]
+
+
+class JoinedTextNotepad(QDialog):
+    """The original ClipboardNotepad: the whole history joined into one QTextEdit."""
+
+    def __init__(self, clipboard_history):
+        super().__init__()
+        layout = QVBoxLayout()
+        self.text_edit = QTextEdit()
+        self.text_edit.setReadOnly(True)
+        layout.addWidget(self.text_edit)
+        self.setLayout(layout)
+        self.text_edit.setPlainText("\n".join(clipboard_history))
+
+
+def fill_store(store, entries, seed=1):
+    rng = random.Random(seed)
+    for i in range(entries):
+        lines = rng.choice((1, 1, 1, 5, 40))
+        text = "\n".join(" ".join(rng.choices(WORDS, k=rng.randint(3, 12))) for _ in range(lines)) + f" #{i}"
+        store.add(ClipboardEntry("text", text, content_digest(text.encode("utf-8")), timestamp=i))
+
+
+def time_window(app, factory):
+    start = time.perf_counter()
+    window = factory()
+    window.show()
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=10000)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    scratch = tempfile.mkdtemp(prefix="wsm_notepad_bench_")
+    store = ClipboardStore(os.path.join(scratch, "history.db"), os.path.join(scratch, "blobs"),
+                           max_entries=args.entries)
+    fill_store(store, args.entries)
+
+    def joined():
+        history = [text for _, _, text, _, _, _ in reversed(store.recent(args.entries))]
+        return JoinedTextNotepad(history)
+
+    for label, factory in (("joined QTextEdit (original)", joined),
+                           ("ClipboardNotepad", lambda: ClipboardNotepad(store))):
+        print(f"{label:<30}{time_window(app, factory) * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare the parallel scandir crawler with the original os.walk indexer.
+
+Usage:
+    python benchmarks/bench_crawler.py --files 1000000 --workers 1 4 16
+
+The synthetic tree is generated once under --tree (default: a temp directory) and reused on
+later runs when --keep is given. Drop the page cache between runs for cold-disk numbers.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from app.crawler import ParallelCrawler  # noqa: E402
+
+NAMES = ["__init__.py", "index.js", "README.md", "main.py", "utils.py", "package.json", "notes.txt"]
+
+
+def make_tree(root, total_files, files_per_dir=50, fanout=10):
+    """Create a balanced tree of empty files with a realistic share of repeated names."""
+    if os.path.exists(os.path.join(root, ".complete")):
+        return
+    created = 0
+    level = [root]
+    while created < total_files:
+        next_level = []
+        for dirpath in level:
+            os.makedirs(dirpath, exist_ok=True)
+            for i in range(min(files_per_dir, total_files - created)):
+                name = NAMES[i] if i < len(NAMES) else f"file_{created}.dat"
+                open(os.path.join(dirpath, name), "w").close()
+                created += 1
+            next_level.extend(os.path.join(dirpath, f"d{i}") for i in range(fanout))
+            if created >= total_files:
+                break
+        level = next_level
+    open(os.path.join(root, ".complete"), "w").close()
+
+
+def legacy_walk(root):
+    """The original index_files loop, kept verbatim for comparison."""
+    file_index = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            file_path = os.path.join(dirpath, filename)
+            file_index[filename] = file_index.get(filename, []) + [file_path]
+    return sum(len(paths) for paths in file_index.values())
+
+
+def parallel_crawl(root, workers):
+    file_index = {}
+    for dirpath, _, files, _ in ParallelCrawler(workers).walk([root]):
+        for filename, _, _ in files:
+            file_index.setdefault(filename, []).append(os.path.join(dirpath, filename))
+    return sum(len(paths) for paths in file_index.values())
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    count = func(*args)
+    return time.perf_counter() - start, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--tree", default=None)
+    parser.add_argument("--keep", action="store_true", help="keep the generated tree for later runs")
+    args = parser.parse_args()
+
+    tree = args.tree or os.path.join(tempfile.gettempdir(), f"wsm_bench_tree_{args.files}")
+    print(f"Generating {args.files} files under {tree} ...")
+    make_tree(tree, args.files)
+
+    elapsed, count = timed(legacy_walk, tree)
+    print(f"{'os.walk (original)':<24}{elapsed:8.2f}s  {count} files")
+    for workers in args.workers:
+        elapsed, count = timed(parallel_crawl, tree, workers)
+        print(f"{f'scandir x{workers}':<24}{elapsed:8.2f}s  {count} files")
+
+    if not args.keep and args.tree is None:
+        shutil.rmtree(tree, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
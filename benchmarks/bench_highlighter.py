@@ -0,0 +1,140 @@
+"""Keystroke latency in FileEditor on a large script: synchronous QSyntaxHighlighter vs the
+incremental, time-sliced SyntaxHighlighter.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_highlighter.py --lines 50000
+
+A synthetic Python script of --lines lines is generated once under --tree (default: a temp
+directory). Both highlighters share the same lexer; the baseline is the classic
+QSyntaxHighlighter subclass that highlights every affected block before returning. Timed:
+
+* load: setPlainText plus the longest single event-loop turn until highlighting is complete
+* typing: --keys keystrokes in the middle of the file, each timed until its events are processed
+* cascade: typing a triple quote at the top, which turns the rest of the file into a string
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from PyQt5.QtCore import Qt  # noqa: E402
+from PyQt5.QtGui import QSyntaxHighlighter, QTextCursor  # noqa: E402
+from PyQt5.QtTest import QTest  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from app.file_editor import FileEditor  # noqa: E402
+from app.syntax_highlighter import NORMAL, PYTHON, SyntaxHighlighter  # noqa: E402
+
+
+class SynchronousHighlighter(QSyntaxHighlighter):
+    """The textbook QSyntaxHighlighter around the same lexer."""
+    find_closer = staticmethod(SyntaxHighlighter.find_closer)
+    lex = SyntaxHighlighter.lex
+
+    def __init__(self, document):
+        self.language = PYTHON
+        super().__init__(document)
+
+    def highlightBlock(self, text):
+        ranges = []
+        self.setCurrentBlockState(self.lex(text, max(NORMAL, self.previousBlockState()), ranges))
+        for text_range in ranges:
+            self.setFormat(text_range.start, text_range.length, text_range.format)
+
+
+def make_script(path, lines):
+    if os.path.exists(path):
+        return
+    chunk = ['@decorator', 'def function_{0}(value, *args):', '    """Docstring of function {0}.',
+             '    Continued on a second line."""', '    total = value * {0} + 0x1f  # arithmetic',
+             "    label = f'item {{value}}' + \"{0}\"", '    if total > 10 and not args:',
+             '        return [str(item) for item in range(total)]', '    return None', '']
+    with open(path + ".tmp", "w") as script:
+        for i in range(-(-lines // len(chunk))):
+            script.write("\n".join(chunk).format(i) + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def settle(app, done):
+    """Process events until ``done()``, returning the longest single turn in ms."""
+    worst = 0.0
+    while True:
+        start = time.perf_counter()
+        app.processEvents()
+        worst = max(worst, time.perf_counter() - start)
+        if done():
+            return worst * 1000
+
+
+def run(app, path, keys, incremental):
+    editor = FileEditor()
+    editor.resize(900, 700)
+    editor.show()
+    if incremental:
+        done = editor.highlighter.is_idle
+        start = time.perf_counter()
+        editor.load_file(path)
+    else:
+        editor.highlighter.set_document(None, None)
+        start = time.perf_counter()
+        with open(path) as script:
+            editor.setPlainText(script.read())
+        highlighter = SynchronousHighlighter(editor.document())
+        highlighter.rehighlight()
+
+        def done():
+            return True
+    load = (time.perf_counter() - start) * 1000
+    worst_load_turn = settle(app, done)
+
+    editor.setFocus()
+    cursor = editor.textCursor()
+    cursor.setPosition(editor.document().findBlockByNumber(editor.blockCount() // 2).position() + 4)
+    editor.setTextCursor(cursor)
+    latencies = []
+    for i in range(keys):
+        start = time.perf_counter()
+        QTest.keyClick(editor, Qt.Key_Space if i % 8 == 7 else Qt.Key_A)
+        app.processEvents()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    cursor.movePosition(QTextCursor.Start)
+    editor.setTextCursor(cursor)
+    start = time.perf_counter()
+    QTest.keyClicks(editor, '"""')
+    app.processEvents()
+    cascade = (time.perf_counter() - start) * 1000
+    worst_cascade_turn = settle(app, done)
+    editor.close()
+    return load, worst_load_turn, latencies, cascade, worst_cascade_turn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=50_000)
+    parser.add_argument("--keys", type=int, default=200)
+    parser.add_argument("--tree", default=None)
+    args = parser.parse_args()
+
+    tree = args.tree or os.path.join(tempfile.gettempdir(), "wsm_bench_highlighter")
+    os.makedirs(tree, exist_ok=True)
+    path = os.path.join(tree, f"script_{args.lines}.py")
+    make_script(path, args.lines)
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    for label, incremental in (("synchronous QSyntaxHighlighter", False), ("incremental SyntaxHighlighter", True)):
+        load, load_turn, latencies, cascade, cascade_turn = run(app, path, args.keys, incremental)
+        latencies.sort()
+        print(f"{label} ({args.lines} lines)")
+        print(f"  load: {load:8.1f} ms, longest event-loop turn while highlighting {load_turn:8.1f} ms")
+        print(f"  keystroke: median {statistics.median(latencies):6.2f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99) - 1]:6.2f} ms, max {latencies[-1]:6.2f} ms")
+        print(f"  opening a string at the top: {cascade:8.1f} ms, longest turn afterwards {cascade_turn:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Compare memory and build time of the original dict-of-lists index with a compact layout.
+
+Usage:
+    python benchmarks/bench_index_memory.py --files 1000000
+
+Both indexes are built from the same pre-crawled listing, so only the data structure is
+measured. Peak memory is taken from tracemalloc. The index itself now lives in SQLite
+(app.index_store); CompactIndex is kept here as the measured in-memory reference.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from app.crawler import ParallelCrawler  # noqa: E402
+from bench_crawler import make_tree  # noqa: E402
+
+
+class CompactIndex:
+    """Memory-compact in-memory file index.
+
+    Every directory path and every distinct file name is stored once and referred to by an
+    integer ID. A file is just a (directory ID, name ID) pair kept in two parallel typed
+    arrays, and each name has an array-backed posting list of file IDs. Most names occur
+    once, so their posting list is a bare file ID until a second file shares the name.
+    """
+
+    def __init__(self):
+        self.dir_paths = []
+        self.dir_ids = {}
+        self.names = []
+        self.names_lower = []
+        self.name_ids = {}
+        self.file_dirs = array('I')
+        self.file_names = array('I')
+        self.postings = []
+
+    def add_directory(self, dirpath, filenames):
+        dir_id = self.dir_ids.get(dirpath)
+        if dir_id is None:
+            dir_id = self.dir_ids[dirpath] = len(self.dir_paths)
+            self.dir_paths.append(dirpath)
+        for filename in filenames:
+            self.add_file(dir_id, filename)
+        return dir_id
+
+    def add_file(self, dir_id, filename):
+        file_id = len(self.file_dirs)
+        self.file_dirs.append(dir_id)
+        name_id = self.name_ids.get(filename)
+        if name_id is None:
+            name_id = self.name_ids[filename] = len(self.names)
+            self.names.append(filename)
+            name_lower = filename.lower()
+            self.names_lower.append(filename if name_lower == filename else name_lower)
+            self.postings.append(file_id)
+        else:
+            posting = self.postings[name_id]
+            if isinstance(posting, int):
+                self.postings[name_id] = array('I', (posting, file_id))
+            else:
+                posting.append(file_id)
+        self.file_names.append(name_id)
+        return file_id
+
+
+def build_dict_of_lists(listing):
+    """The original index_files data structure, including its list-copying append."""
+    file_index = {}
+    for dirpath, filenames in listing:
+        for filename in filenames:
+            file_path = os.path.join(dirpath, filename)
+            file_index[filename] = file_index.get(filename, []) + [file_path]
+    return file_index
+
+
+def build_compact(listing):
+    index = CompactIndex()
+    for dirpath, filenames in listing:
+        index.add_directory(dirpath, filenames)
+    return index
+
+
+def measure(builder, listing):
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = builder(listing)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del index
+    return elapsed, current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1_000_000)
+    parser.add_argument("--tree", default=None)
+    args = parser.parse_args()
+
+    tree = args.tree or os.path.join(tempfile.gettempdir(), f"wsm_bench_tree_{args.files}")
+    make_tree(tree, args.files)
+    listing = [(dirpath, [name for name, _, _ in files]) for dirpath, _, files, _ in ParallelCrawler().walk([tree])]
+
+    for label, builder in (("dict of lists (original)", build_dict_of_lists), ("CompactIndex", build_compact)):
+        elapsed, current, peak = measure(builder, listing)
+        print(f"{label:<26}{elapsed:8.2f}s  retained {current / 2**20:8.1f} MiB  peak {peak / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Time opening a large log file: the original read() + setPlainText vs LargeFileViewer.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_large_file.py --size-mb 2048 --legacy-mb 64
+
+A synthetic log of --size-mb is generated once under --tree (default: a temp directory).
+The original FileEditor path is only timed on the first --legacy-mb of it, because reading
+the whole file into a QPlainTextEdit needs several times its size in memory. For the viewer,
+"interactive" is the time from the FileTree click until the first page has been painted;
+the background index and random jumps are timed too.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from PyQt5.QtWidgets import QApplication, QPlainTextEdit  # noqa: E402
+
+from app.large_file_viewer import LargeFileViewer, sniff_file  # noqa: E402
+
+
+def make_log(path, size_mb, seed=1):
+    if os.path.exists(path) and os.path.getsize(path) >= size_mb * 2**20:
+        return
+    rng = random.Random(seed)
+    block = "".join(f"2026-10-17 12:{i // 60 % 60:02d}:{i % 60:02d} INFO worker-{i % 32} processed request "
+                    f"id={rng.randrange(10**9)} in {rng.randrange(1000)}ms\n" for i in range(50000)).encode()
+    with open(path + ".tmp", "wb") as log:
+        for _ in range(-(-size_mb * 2**20 // len(block))):
+            log.write(block)
+    os.replace(path + ".tmp", path)
+
+
+def legacy_open(app, path, limit):
+    start = time.perf_counter()
+    editor = QPlainTextEdit()
+    with open(path, "r") as file:
+        editor.setPlainText(file.read(limit))
+    editor.resize(800, 600)
+    editor.show()
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+    editor.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--legacy-mb", type=int, default=64)
+    parser.add_argument("--jumps", type=int, default=200)
+    parser.add_argument("--tree", default=None)
+    args = parser.parse_args()
+
+    tree = args.tree or tempfile.gettempdir()
+    path = os.path.join(tree, f"wsm_bench_log_{args.size_mb}mb.log")
+    make_log(path, args.size_mb)
+    app = QApplication(sys.argv)
+
+    print(f"original read() + setPlainText, first {args.legacy_mb} MiB: "
+          f"{legacy_open(app, path, args.legacy_mb * 2**20) * 1000:.0f} ms")
+
+    viewer = LargeFileViewer()
+    viewer.resize(800, 600)
+    viewer.show()
+    app.processEvents()
+    start = time.perf_counter()
+    size, encoding = sniff_file(path)
+    viewer.open_file(path, encoding)
+    viewer.viewport().repaint()
+    print(f"LargeFileViewer, {size / 2**20:.0f} MiB, interactive after: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    while viewer.indexer.isRunning():
+        app.processEvents()
+        time.sleep(0.005)
+    app.processEvents()
+    print(f"  line index finished after: {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"({viewer.line_count:,} lines, {len(viewer.indexer.newlines_before) * 8 / 2**10:.0f} KiB of index)")
+
+    rng = random.Random(2)
+    scrollbar = viewer.verticalScrollBar()
+    start = time.perf_counter()
+    for _ in range(args.jumps):
+        scrollbar.setValue(rng.randrange(scrollbar.maximum() + 1))
+        viewer.viewport().repaint()
+    print(f"  random jump + repaint: {(time.perf_counter() - start) / args.jumps * 1000:.2f} ms each")
+    viewer.close_file()
+
+
+if __name__ == "__main__":
+    main()
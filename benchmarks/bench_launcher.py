@@ -0,0 +1,71 @@
+"""Launch a Python launcher entry cold vs from a pre-warmed standby interpreter.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_launcher.py --runs 10
+
+Each run launches a small script through LauncherEngine and times the click until its
+first line of output arrives, which is what the user waits for. "cold" starts a new
+interpreter every time; "pre-warmed" marks the entry for pre-warming, so the launch is
+handed to a standby interpreter that has already started up. Median milliseconds.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from app.launcher import STANDBY_REFILL_MS, LauncherEngine  # noqa: E402
+
+SCRIPT = "import json, sqlite3\nprint('ready', flush=True)\n"
+
+
+def wait_for(app, condition, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+def time_launch(app, engine, entry):
+    record = engine.launch(entry)
+    wait_for(app, lambda: record.stdout.lines or not record.running)
+    first_output = time.perf_counter() - record.requested
+    wait_for(app, lambda: not record.running)
+    return first_output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory(prefix="wsm_bench_launcher_") as workdir:
+        script = os.path.join(workdir, "entry.py")
+        with open(script, "w") as script_file:
+            script_file.write(SCRIPT)
+        entry = {"name": "entry", "path": sys.executable, "parameters": script}
+
+        engine = LauncherEngine()
+        cold = [time_launch(app, engine, entry) for _ in range(args.runs)]
+
+        warm_entry = dict(entry, prewarm=True)
+        engine.prewarm([warm_entry])
+        warm = []
+        for _ in range(args.runs):
+            # Give the standby time to be replaced and to finish starting, as between clicks
+            wait_for(app, lambda: False, timeout=STANDBY_REFILL_MS / 1000 + 0.5)
+            warm.append(time_launch(app, engine, warm_entry))
+        engine.shutdown()
+
+    print(f"{'cold interpreter':<24}{statistics.median(cold) * 1000:8.1f} ms to first output")
+    print(f"{'pre-warmed standby':<24}{statistics.median(warm) * 1000:8.1f} ms to first output")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Open and follow a large app.log: the original read() into a QTextEdit vs LogViewer.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_log_viewer.py --size-mb 300 --legacy-mb 32
+
+A synthetic log of --size-mb is generated once under --tree (default: a temp directory).
+The original Activity History path is only timed on the first --legacy-mb of it, since
+it holds the whole file in the widget. For LogViewer the timed steps are opening (tail),
+showing --append lines appended by another writer, and loading an older page on scroll-up.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from PyQt5.QtWidgets import QApplication, QTextEdit  # noqa: E402
+
+from app.log_viewer import LogViewer  # noqa: E402
+
+
+def make_log(path, size_mb):
+    if os.path.exists(path) and os.path.getsize(path) >= size_mb * 2**20:
+        return
+    block = "".join(f"2026-10-17 12:{i // 60 % 60:02d}:{i % 60:02d} INFO activity {i}: opened a file\n"
+                    for i in range(50000)).encode()
+    with open(path + ".tmp", "wb") as log:
+        for _ in range(-(-size_mb * 2**20 // len(block))):
+            log.write(block)
+    os.replace(path + ".tmp", path)
+
+
+def legacy_open(path, limit):
+    start = time.perf_counter()
+    view = QTextEdit()
+    view.setReadOnly(True)
+    with open(path, "r") as log_file:
+        view.setPlainText(log_file.read(limit))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=300)
+    parser.add_argument("--legacy-mb", type=int, default=32)
+    parser.add_argument("--append", type=int, default=10000)
+    parser.add_argument("--tree", default=None)
+    args = parser.parse_args()
+
+    tree = args.tree or os.path.join(tempfile.gettempdir(), "wsm_bench_log")
+    os.makedirs(tree, exist_ok=True)
+    master = os.path.join(tree, f"app_{args.size_mb}.log")
+    make_log(master, args.size_mb)
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    legacy = legacy_open(master, args.legacy_mb * 2**20)
+    print(f"{'original: read + setPlainText, ' + str(args.legacy_mb) + ' MB only':<44}{legacy * 1000:10.1f} ms")
+
+    # Follow a copy, so the appends below never grow the generated file
+    log_path = os.path.join(tree, "app.log")
+    shutil.copyfile(master, log_path)
+    viewer = LogViewer()
+    viewer.resize(900, 700)
+    viewer.show()
+    start = time.perf_counter()
+    viewer.open_log(log_path)
+    app.processEvents()
+    print(f"{f'LogViewer: open {args.size_mb} MB at the tail':<44}{(time.perf_counter() - start) * 1000:10.1f} ms")
+
+    with open(log_path, "a") as log:
+        log.write("".join(f"2026-10-17 13:00:00 INFO appended {i}\n" for i in range(args.append)))
+    last = f"2026-10-17 13:00:00 INFO appended {args.append - 1}"
+    start = time.perf_counter()
+    while viewer.document().lastBlock().text() != last:
+        app.processEvents()
+        time.sleep(0.001)
+    print(f"{f'LogViewer: {args.append} appended lines shown':<44}{(time.perf_counter() - start) * 1000:10.1f} ms"
+          "  (includes the watcher's debounce)")
+
+    start = time.perf_counter()
+    viewer.verticalScrollBar().setValue(0)
+    print(f"{'LogViewer: older page on scroll-up':<44}{(time.perf_counter() - start) * 1000:10.1f} ms")
+    print(f"\n{viewer.blockCount()} lines held in the view")
+    os.remove(log_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Start-up time from process creation to the taskbar's first paint, lazy vs eager.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_startup.py --runs 10
+
+main.py is started --runs times in each mode with --profile-startup, which makes it print
+its phase timings and quit right after the first paint. "eager" also builds the main window
+up front, as start-up used to. Each run works in a scratch directory (with the icons linked
+in) so no timings log or database lands in the checkout. Median milliseconds per phase.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def run_once(workdir, eager):
+    command = [sys.executable, os.path.join(ROOT, "main.py"), "--profile-startup"]
+    if eager:
+        command.append("--eager")
+    output = subprocess.run(command, cwd=workdir, capture_output=True, text=True, timeout=60).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="wsm_bench_startup_") as workdir:
+        os.symlink(os.path.join(ROOT, "resources"), os.path.join(workdir, "resources"))
+        for mode, eager in (("eager", True), ("lazy", False)):
+            runs = [run_once(workdir, eager) for _ in range(args.runs)]
+            phases = list(runs[0]["phases_ms"])
+            print(f"{mode} ({args.runs} runs, median ms)")
+            for phase in phases:
+                print(f"  {phase:<14}{statistics.median(run['phases_ms'].get(phase, 0) for run in runs):8.1f}")
+            print(f"  {'total':<14}{statistics.median(run['total_ms'] for run in runs):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
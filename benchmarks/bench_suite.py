@@ -0,0 +1,464 @@
+"""Reproducible benchmark suite: indexing, file search, URL harvesting, clipboard and UI open latency.
+
+Usage:
+    python benchmarks/bench_suite.py --scale small --output results.json
+    python benchmarks/bench_suite.py --scale medium --output after.json --compare before.json
+    python benchmarks/bench_suite.py --cases index search --files 1000000
+
+Fixtures are generated from fixed seeds under --fixtures (default: a temp directory) and
+reused by later runs, so two runs on the same machine measure the same data:
+
+* a file tree of --files entries (10k / 100k / 1M for the small / medium / large scales)
+* a Chrome History and a Firefox places.sqlite database of --history-rows URLs each
+* a clipboard history of --clipboard-entries entries, filled through ClipboardStore.add
+
+Every case runs in its own Python process with Qt's offscreen platform, so its peak RSS
+(ru_maxrss, where the platform has it) is its own:
+
+* index      full index_files build (files/s) and unchanged incremental rescans
+* search     FileSearchDialog.perform_search to the first page and to completion, per query
+* urls       first harvest of both browsers (rows/s), unchanged re-harvests, last-24h query
+* clipboard  store.add throughput, ClipboardNotepad open and filter latency
+* ui         FileSearchDialog and MainWindow from construction until shown
+
+Latencies are reported as p50/p90/p99/max in milliseconds over --repeat samples. The JSON
+written to --output has run metadata (commit, Python, Qt, platform, parameters) and one
+flat metric dict per case. With --compare, each metric is set against a previous JSON and
+changes beyond --threshold percent in the wrong direction are flagged; the exit status is
+1 if any were.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, os.path.dirname(__file__))
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+CASES = ["index", "search", "urls", "clipboard", "ui"]
+SCALES = {  # files, history rows per browser, clipboard entries
+    "small": (10_000, 50_000, 2_000),
+    "medium": (100_000, 500_000, 10_000),
+    "large": (1_000_000, 2_000_000, 50_000),
+}
+SUBSTRING_QUERIES = ["main.py", "readme", "file_12", ".json", "no_such_name"]
+FUZZY_QUERIES = ["rdme", "utlspy", "pkgjsn"]
+CLIPBOARD_FILTERS = ["import", "https", "value self", "#12"]
+RESCANS = 3  # Incremental rescans timed after the full index build
+WAIT_TIMEOUT = 300  # Seconds before a case gives up waiting on the event loop
+MIN_DELTA_MS = 0.5  # Latency changes smaller than this are never flagged, however large in percent
+
+
+# ---- fixtures ---------------------------------------------------------------------------
+
+def make_firefox_history(path, rows, seed=2):
+    """Create a Firefox-style places.sqlite with visits spread over the past year."""
+    if os.path.exists(path):
+        return
+    import random
+    import sqlite3
+    rng = random.Random(seed)
+    now = time.time()
+    conn = sqlite3.connect(path + ".tmp")
+    conn.execute("CREATE TABLE moz_places (id INTEGER PRIMARY KEY, url LONGVARCHAR, title LONGVARCHAR,"
+                 " visit_count INTEGER DEFAULT 0, hidden INTEGER DEFAULT 0 NOT NULL, last_visit_date INTEGER)")
+    conn.executemany(
+        "INSERT INTO moz_places (url, title, visit_count, last_visit_date) VALUES (?, ?, ?, ?)",
+        ((f"https://site{rng.randrange(5000)}.example.org/article/{i}", f"Article {i}", rng.randint(0, 20),
+          None if rng.random() < 0.05 else int((now - rng.uniform(0, 365 * 86400)) * 1_000_000))
+         for i in range(rows)))
+    conn.commit()
+    conn.close()
+    os.replace(path + ".tmp", path)
+
+
+def prepare_fixtures(fixtures, args):
+    """Generate whatever the selected cases need and is not there yet; returns their paths."""
+    from bench_crawler import make_tree
+    from bench_url_harvest import make_history
+
+    paths = {
+        "tree": os.path.join(fixtures, f"tree_{args.files}"),
+        "index_dir": os.path.join(fixtures, f"index_{args.files}"),
+        "chrome": os.path.join(fixtures, f"chrome_{args.history_rows}.History"),
+        "firefox": os.path.join(fixtures, f"firefox_{args.history_rows}.places.sqlite"),
+    }
+    if {"index", "search"} & set(args.cases):
+        make_tree(paths["tree"], args.files)
+        os.makedirs(paths["index_dir"], exist_ok=True)
+        # The same scope as index_files([tree]) in the index case, so the daemon that serves
+        # the search case reuses that index instead of resetting it to the home directory
+        with open(os.path.join(paths["index_dir"], "index_config.json"), "w") as config:
+            json.dump({"roots": [paths["tree"]], "exclude": []}, config)
+    if "urls" in args.cases:
+        make_history(paths["chrome"], args.history_rows)
+        make_firefox_history(paths["firefox"], args.history_rows)
+    return paths
+
+
+# ---- measurement ------------------------------------------------------------------------
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)  # Bytes on macOS, KiB elsewhere
+
+
+def latency_summary(seconds):
+    """p50/p90/p99/max of a list of durations, in milliseconds."""
+    ms = sorted(value * 1000 for value in seconds)
+    if len(ms) == 1:
+        return {"p50": round(ms[0], 2), "p90": round(ms[0], 2), "p99": round(ms[0], 2), "max": round(ms[0], 2)}
+    cuts = statistics.quantiles(ms, n=100, method="inclusive")
+    return {"p50": round(cuts[49], 2), "p90": round(cuts[89], 2), "p99": round(cuts[98], 2), "max": round(ms[-1], 2)}
+
+
+def wait_until(app, condition):
+    deadline = time.perf_counter() + WAIT_TIMEOUT
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark case timed out waiting on the event loop")
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+def time_open(app, factory):
+    start = time.perf_counter()
+    window = factory()
+    window.show()
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return elapsed
+
+
+# ---- cases (each runs in its own process) -----------------------------------------------
+
+def case_index(args, paths):
+    from app.file_indexer import index_files
+
+    for name in os.listdir("."):
+        if name.startswith("files_index.db"):
+            os.remove(name)
+    start = time.perf_counter()
+    index_files([paths["tree"]], incremental=False)
+    build = time.perf_counter() - start
+    rescans = []
+    for _ in range(RESCANS):
+        start = time.perf_counter()
+        index_files([paths["tree"]])
+        rescans.append(time.perf_counter() - start)
+    return {
+        "files": args.files,
+        "full_build_seconds": round(build, 3),
+        "files_per_second": round(args.files / build),
+        "rescan_ms": latency_summary(rescans),
+        "index_db_mb": round(os.path.getsize("files_index.db") / 2**20, 1),
+    }
+
+
+def case_search(args, paths):
+    from PyQt5.QtWidgets import QApplication
+    from app.file_search import FileSearchDialog
+    from app.index_protocol import DAEMON_START_TIMEOUT, IndexClient, daemon_supported, start_daemon
+
+    if not os.path.exists("files_index.db"):
+        raise SystemExit("search needs the index fixture: run the index case first")
+
+    class TimedSearchDialog(FileSearchDialog):
+        """Records when the current query's first page and its completion arrive."""
+        first_page = finished = None
+
+        def on_results_ready(self, query_id, paths):
+            super().on_results_ready(query_id, paths)
+            if query_id == self.query_id and self.first_page is None:
+                self.first_page = time.perf_counter()
+
+        def on_search_finished(self, query_id, total):
+            super().on_search_finished(query_id, total)
+            if query_id == self.query_id:
+                self.finished = time.perf_counter()
+                self.first_page = self.first_page or self.finished
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    # Searches go to the index daemon where there is one; it is started here, on the fixture
+    # index_config.json, so its startup pass can finish before the timings and it can be
+    # stopped again when the case ends
+    daemon = daemon_supported() and start_daemon(wait=DAEMON_START_TIMEOUT)
+    try:
+        if daemon:
+            with IndexClient() as client:
+                while client.status()["indexing"]:
+                    time.sleep(0.05)
+        dialog = TimedSearchDialog()
+        dialog.show()
+        results = {"files": args.files}
+        for mode, queries in (("Substring", SUBSTRING_QUERIES), ("Fuzzy", FUZZY_QUERIES)):
+            dialog.mode_dropdown.blockSignals(True)
+            dialog.mode_dropdown.setCurrentText(mode)
+            dialog.mode_dropdown.blockSignals(False)
+            first_pages, completions = [], []
+            for _ in range(args.repeat):
+                for query in queries:
+                    dialog.search_input.blockSignals(True)  # No debounce timer: the search is started directly
+                    dialog.search_input.setText(query)
+                    dialog.search_input.blockSignals(False)
+                    dialog.first_page = dialog.finished = None
+                    start = time.perf_counter()
+                    dialog.perform_search()
+                    wait_until(app, lambda: dialog.finished is not None)
+                    first_pages.append(dialog.first_page - start)
+                    completions.append(dialog.finished - start)
+            results[f"{mode.lower()}_first_page_ms"] = latency_summary(first_pages)
+            results[f"{mode.lower()}_complete_ms"] = latency_summary(completions)
+        dialog.done(0)
+    finally:
+        if daemon:
+            with IndexClient() as client:
+                client.shutdown()
+    return results
+
+
+def case_urls(args, paths):
+    from app.url_access import ChromiumHistoryProvider, FirefoxHistoryProvider, harvest_browser_histories
+    from app.url_cache import UrlCache
+
+    class FixtureChrome(ChromiumHistoryProvider):
+        def __init__(self):
+            super().__init__("Chrome")
+
+        def history_files(self):
+            return [paths["chrome"]]
+
+    class FixtureFirefox(FirefoxHistoryProvider):
+        def history_files(self):
+            return [paths["firefox"]]
+
+    for name in os.listdir("."):
+        if name.startswith("url_cache.db"):
+            os.remove(name)
+    providers = [FixtureChrome(), FixtureFirefox()]
+    with UrlCache("url_cache.db") as cache:
+        start = time.perf_counter()
+        harvested = harvest_browser_histories(cache, providers)
+        first = time.perf_counter() - start
+        repeats = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            harvest_browser_histories(cache, providers)
+            repeats.append(time.perf_counter() - start)
+        recent = []
+        since = time.time() - 86400
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            sum(len(rows) for rows in cache.iter_recent(since))
+            recent.append(time.perf_counter() - start)
+        rows = sum(harvested.values())
+        return {
+            "rows": rows,
+            "first_harvest_seconds": round(first, 3),
+            "rows_per_second": round(rows / first),
+            "unchanged_harvest_ms": latency_summary(repeats),
+            "last_24h_query_ms": latency_summary(recent),
+            "cached_urls": cache.url_count(),
+        }
+
+
+def case_clipboard(args, paths):
+    from PyQt5.QtWidgets import QApplication
+    from app.clipboard_notepad import ClipboardNotepad
+    from app.clipboard_store import ClipboardStore
+    from bench_clipboard_notepad import fill_store
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    shutil.rmtree("clipboard", ignore_errors=True)
+    os.makedirs("clipboard")
+    store = ClipboardStore(os.path.join("clipboard", "history.db"), os.path.join("clipboard", "blobs"),
+                           max_entries=args.clipboard_entries)
+    start = time.perf_counter()
+    fill_store(store, args.clipboard_entries)
+    fill = time.perf_counter() - start
+    opens = [time_open(app, lambda: ClipboardNotepad(store)) for _ in range(args.repeat)]
+
+    notepad = ClipboardNotepad(store)
+    notepad.show()
+    app.processEvents()
+    filters = []
+    for _ in range(args.repeat):
+        for term in CLIPBOARD_FILTERS:
+            notepad.filter_input.blockSignals(True)
+            notepad.filter_input.setText(term)
+            notepad.filter_input.blockSignals(False)
+            start = time.perf_counter()
+            notepad.apply_filter()
+            app.processEvents()
+            filters.append(time.perf_counter() - start)
+    notepad.close()
+    store.close()
+    return {
+        "entries": args.clipboard_entries,
+        "adds_per_second": round(args.clipboard_entries / fill),
+        "notepad_open_ms": latency_summary(opens),
+        "filter_ms": latency_summary(filters),
+    }
+
+
+def case_ui(args, paths):
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    start = time.perf_counter()
+    from app.main_window import MainWindow
+    from app.file_search import FileSearchDialog
+    imports = time.perf_counter() - start
+    return {
+        "imports_ms": round(imports * 1000, 2),
+        "file_search_open_ms": latency_summary([time_open(app, FileSearchDialog) for _ in range(args.repeat)]),
+        "main_window_open_ms": latency_summary([time_open(app, MainWindow) for _ in range(args.repeat)]),
+    }
+
+
+CASE_FUNCTIONS = {"index": case_index, "search": case_search, "urls": case_urls, "clipboard": case_clipboard,
+                  "ui": case_ui}
+
+
+def run_case(args, paths):
+    """Child process entry point: run one case and print its metrics as JSON."""
+    metrics = CASE_FUNCTIONS[args.case](args, paths)
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    print(json.dumps(metrics))
+
+
+# ---- driver -----------------------------------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_metadata(args):
+    from PyQt5.QtCore import QT_VERSION_STR
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "parameters": {"files": args.files, "history_rows": args.history_rows,
+                       "clipboard_entries": args.clipboard_entries, "repeat": args.repeat},
+    }
+
+
+def spawn_case(case, args, paths, workdir):
+    command = [sys.executable, os.path.abspath(__file__), "--case", case, "--fixtures", args.fixtures,
+               "--files", str(args.files), "--history-rows", str(args.history_rows),
+               "--clipboard-entries", str(args.clipboard_entries), "--repeat", str(args.repeat)]
+    completed = subprocess.run(command, cwd=workdir, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise SystemExit(f"case {case} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def flatten(metrics, prefix=""):
+    flat = {}
+    for key, value in metrics.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+
+def higher_is_better(metric):
+    return "_per_second" in metric
+
+
+def compare(results, results_parameters, baseline, threshold):
+    """Print every shared metric against the baseline; returns the number of regressions."""
+    regressions = 0
+    parameters = baseline.get("meta", {}).get("parameters")
+    if parameters != results_parameters:
+        print(f"warning: the baseline was run with {parameters}, not {results_parameters}")
+    print(f"\n{'metric':<52}{'baseline':>12}{'current':>12}{'change':>10}")
+    for case, metrics in results.items():
+        old = flatten(baseline.get("results", {}).get(case, {}))
+        for metric, value in flatten(metrics).items():
+            if metric not in old or metric in ("files", "rows", "entries", "cached_urls"):
+                continue
+            before = old[metric]
+            change = (value - before) / before * 100 if before else 0.0
+            worse = -change if higher_is_better(metric) else change
+            noise = "_ms." in metric and abs(value - before) < MIN_DELTA_MS
+            flag = "  REGRESSION" if worse > threshold and not noise else ""
+            regressions += bool(flag)
+            print(f"{case + '.' + metric:<52}{before:>12}{value:>12}{change:>+9.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--files", type=int, default=None, help="overrides the scale's file tree size")
+    parser.add_argument("--history-rows", type=int, default=None, help="overrides the scale's rows per browser")
+    parser.add_argument("--clipboard-entries", type=int, default=None, help="overrides the scale's history size")
+    parser.add_argument("--repeat", type=int, default=20, help="samples per latency measurement")
+    parser.add_argument("--fixtures", default=os.path.join(tempfile.gettempdir(), "wsm_bench_suite"))
+    parser.add_argument("--output", default=None, help="write the results JSON here")
+    parser.add_argument("--compare", default=None, help="a previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change flagged as a regression")
+    parser.add_argument("--case", choices=CASES, help=argparse.SUPPRESS)  # Child process mode
+    args = parser.parse_args()
+    files, history_rows, clipboard_entries = SCALES[args.scale]
+    args.files = args.files or files
+    args.history_rows = args.history_rows or history_rows
+    args.clipboard_entries = args.clipboard_entries or clipboard_entries
+
+    os.makedirs(args.fixtures, exist_ok=True)
+    if args.case:
+        args.cases = [args.case]
+        run_case(args, prepare_fixtures(args.fixtures, args))
+        return
+
+    start = time.perf_counter()
+    paths = prepare_fixtures(args.fixtures, args)
+    print(f"fixtures ready in {time.perf_counter() - start:.1f} s under {args.fixtures}")
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="wsm_bench_suite_run_") as scratch:
+        for case in (case for case in CASES if case in args.cases):
+            # index and search share the index database; the other cases get a scratch directory
+            workdir = paths["index_dir"] if case in ("index", "search") else scratch
+            results[case] = spawn_case(case, args, paths, workdir)
+            print(f"{case:<10}{json.dumps(results[case])}")
+
+    report = {"meta": run_metadata(args), "results": results}
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(results, report["meta"]["parameters"], json.load(baseline_file), args.threshold)
+        if regressions:
+            print(f"\n{regressions} metric(s) regressed by more than {args.threshold:g}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Compare the original full History read with incremental harvesting into the URL cache.
+
+Usage:
+    python benchmarks/bench_url_harvest.py --rows 500000
+
+A synthetic Chromium History database with --rows URLs is generated once under --tree
+(default: a temp directory). Timed steps:
+
+* the original reader: open the live file and fetchall() every URL
+* the first harvest into an empty cache (snapshot + full read + dedup)
+* a repeat harvest with the History file unchanged
+* a harvest after --new new URLs were added and as many old ones revisited
+* the last 24 hours filtered from the cache in SQL
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from app.url_access import ChromiumHistoryProvider, harvest_browser_histories  # noqa: E402
+from app.url_cache import UrlCache  # noqa: E402
+
+WEBKIT_EPOCH_OFFSET = 11644473600
+
+
+def webkit_time(unix_seconds):
+    return int((unix_seconds + WEBKIT_EPOCH_OFFSET) * 1_000_000)
+
+
+class FileHistoryProvider(ChromiumHistoryProvider):
+    def __init__(self, history_file):
+        super().__init__("Chrome")
+        self.history_file = history_file
+
+    def history_files(self):
+        return [self.history_file]
+
+
+def make_history(path, rows, seed=1):
+    """Create a Chromium-style History database with visits spread over the past year."""
+    if os.path.exists(path):
+        return
+    rng = random.Random(seed)
+    now = time.time()
+    conn = sqlite3.connect(path + ".tmp")
+    conn.execute("CREATE TABLE urls (id INTEGER PRIMARY KEY AUTOINCREMENT, url LONGVARCHAR, title LONGVARCHAR,"
+                 " visit_count INTEGER DEFAULT 0 NOT NULL, typed_count INTEGER DEFAULT 0 NOT NULL,"
+                 " last_visit_time INTEGER NOT NULL, hidden INTEGER DEFAULT 0 NOT NULL)")
+    conn.execute("CREATE INDEX urls_url_index ON urls (url)")
+    conn.executemany(
+        "INSERT INTO urls (url, title, visit_count, last_visit_time, hidden) VALUES (?, ?, ?, ?, ?)",
+        ((f"https://site{rng.randrange(5000)}.example.com/page/{i}?q={rng.randrange(10**6)}", f"Page {i}",
+          rng.randint(1, 20), webkit_time(now - rng.uniform(0, 365 * 86400)), int(rng.random() < 0.02))
+         for i in range(rows)))
+    conn.commit()
+    conn.close()
+    os.replace(path + ".tmp", path)
+
+
+def original_read(path):
+    with sqlite3.connect(path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT url FROM urls WHERE hidden = 0")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def timed(label, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{label:<40}{(time.perf_counter() - start) * 1000:10.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--new", type=int, default=1000)
+    parser.add_argument("--tree", default=None)
+    args = parser.parse_args()
+
+    tree = args.tree or os.path.join(tempfile.gettempdir(), f"wsm_bench_history_{args.rows}")
+    os.makedirs(tree, exist_ok=True)
+    master = os.path.join(tree, "History.master")
+    make_history(master, args.rows)
+    # Work on a fresh copy so the revisits below never accumulate in the generated file
+    history = os.path.join(tree, "History")
+    with sqlite3.connect(master) as source, sqlite3.connect(history) as copy:
+        source.backup(copy)
+    cache_path = os.path.join(tree, "url_cache.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(cache_path + suffix):
+            os.remove(cache_path + suffix)
+    providers = [FileHistoryProvider(history)]
+
+    urls = timed("original: fetchall() of the live file", lambda: original_read(history))
+    with UrlCache(cache_path) as cache:
+        timed("first harvest into an empty cache", lambda: harvest_browser_histories(cache, providers))
+        timed("repeat harvest, History unchanged", lambda: harvest_browser_histories(cache, providers))
+
+        now = time.time()
+        with sqlite3.connect(history) as conn:
+            conn.executemany("INSERT INTO urls (url, title, last_visit_time) VALUES (?, '', ?)",
+                             ((f"https://new.example.com/{now}/{i}", webkit_time(now)) for i in range(args.new)))
+            conn.execute("UPDATE urls SET last_visit_time = ? WHERE id % ? = 0",
+                         (webkit_time(now), max(1, args.rows // args.new)))
+        harvested = timed(f"harvest after {args.new} new + revisited", lambda: harvest_browser_histories(cache, providers))
+        recent = timed("last 24 hours from the cache (SQL)",
+                       lambda: [url for rows in cache.iter_recent(now - 86400) for url, _ in rows])
+        print(f"\n{len(urls)} URLs originally, {cache.url_count()} cached, {harvested['Chrome']} rows in the "
+              f"incremental harvest, {len(recent)} visited in the last 24 hours")
+
+
+if __name__ == "__main__":
+    main()
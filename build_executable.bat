@@ -12,13 +12,29 @@ pyinstaller --onefile --noconsole ^
 --add-data "static/taskbar.qss;static" ^
 --add-data "themes/;themes/" ^
 --add-data "launcher_entries.json;." ^
---add-data "files_index.pkl;." ^
+--add-data "index_config.json;." ^
 --hidden-import "app.main_window" ^
 --hidden-import "app.taskbar" ^
 --hidden-import "app.clipboard_manager" ^
+--hidden-import "app.clipboard_store" ^
 --hidden-import "app.clipboard_notepad" ^
 --hidden-import "app.url_access" ^
+--hidden-import "app.url_cache" ^
 --hidden-import "app.file_indexer" ^
+--hidden-import "app.crawler" ^
+--hidden-import "app.index_store" ^
+--hidden-import "app.fs_watcher" ^
+--hidden-import "app.file_search" ^
+--hidden-import "app.fuzzy_match" ^
+--hidden-import "app.index_config" ^
+--hidden-import "app.startup_timing" ^
+--hidden-import "app.launcher" ^
+--hidden-import "app.instrumentation" ^
+--hidden-import "app.diagnostics_panel" ^
+--hidden-import "app.index_protocol" ^
+--hidden-import "app.index_daemon" ^
+--hidden-import "app.duplicate_finder" ^
+--hidden-import "app.duplicates_panel" ^
 --hidden-import "PyQt5.QtWidgets" ^
 --hidden-import "PyQt5.QtCore" ^
 --hidden-import "PyQt5.QtGui" ^
@@ -1,7 +1,12 @@
+import time
+STARTED = time.perf_counter()  # Taken before any other import, so imports count towards start-up
+
 import sys
 from PyQt5.QtWidgets import QApplication
-from app.main_window import MainWindow
+from app import instrumentation
+from app.startup_timing import StartupTimer
 from app.taskbar import Taskbar
+import json
 import os
 
 
@@ -13,7 +18,19 @@ def resource_path(relative_path):
 
 
 def main():
+    if "--index-daemon" in sys.argv:
+        # A PyInstaller bundle starts the index daemon by running itself with this flag
+        from app.index_daemon import main as index_daemon_main
+        sys.exit(index_daemon_main([arg for arg in sys.argv[1:] if arg != "--index-daemon"]))
+
+    # --eager builds the main window up front as before; --profile-startup prints the
+    # start-up timings and quits once the taskbar has been painted
+    timer = StartupTimer(STARTED)
+    timer.mark("imports")
+    eager = "--eager" in sys.argv
+    profile_only = "--profile-startup" in sys.argv
     app = QApplication(sys.argv)
+    timer.mark("qapplication")
 
     # Load the stylesheet (adjust path based on script's directory)
     # stylesheet_path = os.path.join(os.path.dirname(__file__), "static/taskbar.qss")
@@ -23,10 +40,36 @@ def main():
             app.setStyleSheet(style_file.read())
     else:
         print("Warning: Stylesheet not found at", stylesheet_path)
+    timer.mark("stylesheet")
+
+    # The main window (file tree, editor, activity history) is only built when first opened
+    window = None
+
+    def show_main_window():
+        nonlocal window
+        if window is None:
+            with instrumentation.timed("dialog.main_window"):
+                from app.main_window import MainWindow
+                window = MainWindow()
+        window.show()
+
+    if eager:
+        from app.main_window import MainWindow
+        window = MainWindow()
+        timer.mark("main_window")
+    taskbar = Taskbar(show_main_window_callback=show_main_window)
+    timer.mark("taskbar")
+
+    def on_first_paint():
+        timer.mark("first_paint")
+        summary = timer.save(mode="eager" if eager else "lazy")
+        for phase, seconds in timer.phases:
+            instrumentation.record_time(f"startup.{phase}", seconds)
+        if profile_only:
+            print(json.dumps(summary))
+            app.quit()
 
-    # Initialize the main window and taskbar
-    window = MainWindow()  # Ensure MainWindow is defined in main_window.py
-    taskbar = Taskbar(show_main_window_callback=window.show)  # Pass show method for callback
+    taskbar.first_painted.connect(on_first_paint)
 
     # Show the taskbar only
     taskbar.show()
@@ -5,8 +5,8 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('resources/icons/manager.png', 'resources/icons'), ('resources/icons/clipboard.png', 'resources/icons'), ('resources/icons/launcher.png', 'resources/icons'), ('resources/icons/url_list.png', 'resources/icons'), ('resources/icons/file_search.png', 'resources/icons'), ('resources/icons/minimize_taskbar.png', 'resources/icons'), ('resources/icons/cross_taskbar_close.png', 'resources/icons'), ('resources/icons/suraj_icon_210.png', 'resources/icons'), ('static/taskbar.qss', 'static'), ('themes/', 'themes/'), ('launcher_entries.json', '.'), ('files_index.pkl', '.')],
-    hiddenimports=['app.main_window', 'app.taskbar', 'app.clipboard_manager', 'app.clipboard_notepad', 'app.url_access', 'app.file_indexer', 'PyQt5.QtWidgets', 'PyQt5.QtCore', 'PyQt5.QtGui'],
+    datas=[('resources/icons/manager.png', 'resources/icons'), ('resources/icons/clipboard.png', 'resources/icons'), ('resources/icons/launcher.png', 'resources/icons'), ('resources/icons/url_list.png', 'resources/icons'), ('resources/icons/file_search.png', 'resources/icons'), ('resources/icons/minimize_taskbar.png', 'resources/icons'), ('resources/icons/cross_taskbar_close.png', 'resources/icons'), ('resources/icons/suraj_icon_210.png', 'resources/icons'), ('static/taskbar.qss', 'static'), ('themes/', 'themes/'), ('launcher_entries.json', '.'), ('index_config.json', '.')],
+    hiddenimports=['app.main_window', 'app.taskbar', 'app.clipboard_manager', 'app.clipboard_store', 'app.clipboard_notepad', 'app.url_access', 'app.url_cache', 'app.file_indexer', 'app.crawler', 'app.index_store', 'app.fs_watcher', 'app.file_search', 'app.fuzzy_match', 'app.index_config', 'app.startup_timing', 'app.launcher', 'app.instrumentation', 'app.diagnostics_panel', 'app.index_protocol', 'app.index_daemon', 'app.duplicate_finder', 'app.duplicates_panel', 'PyQt5.QtWidgets', 'PyQt5.QtCore', 'PyQt5.QtGui'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,91 @@
+"""ClipboardStore: deduplication, the ring-buffer budgets, spilled texts and case-insensitive
+search with and without the FTS5 trigram index."""
+import hashlib
+
+import pytest
+
+from app import clipboard_store
+from app.clipboard_store import SPILL_THRESHOLD, ClipboardStore
+
+TEXTS = ["Hello World", "Ärger im Büro", "ΣΊΣΥΦΟΣ", "straße", "plain ascii", "ab", "x"]
+
+
+class Entry:
+    def __init__(self, text, timestamp):
+        self.kind = "text"
+        self.text = text
+        self.digest = hashlib.sha1(text.encode()).hexdigest()
+        self.timestamp = timestamp
+
+
+@pytest.fixture(params=["trigram", "scan"])
+def store(request, tmp_path, monkeypatch):
+    if request.param == "scan":
+        monkeypatch.setattr(clipboard_store, "TRIGRAM_MIN_SQLITE", (99,))  # As on SQLite < 3.34
+    with ClipboardStore(str(tmp_path / "clipboard.db"), str(tmp_path / "blobs")) as store:
+        assert store.has_fts == (request.param == "trigram")
+        for i, text in enumerate(TEXTS):
+            store.add(Entry(text, 1000 + i))
+        yield store
+
+
+def texts(rows):
+    return [row[2] for row in rows]
+
+
+@pytest.mark.parametrize("term", ["hello", "WORLD", "o w", "ärger", "BÜRO", "üro", "σίσυφος", "ascii", "ab", "X", "zzz"])
+def test_search_is_case_insensitive_beyond_ascii(store, term):
+    expected = [text for text in reversed(TEXTS) if term.casefold() in text.casefold()]
+
+    assert texts(store.search(term)) == expected
+
+
+def test_short_terms_fold_non_ascii(store):
+    assert texts(store.search("Ä")) == ["Ärger im Büro"]
+    assert texts(store.search("ü")) == ["Ärger im Büro"]
+
+
+def test_copying_again_only_bumps_the_entry(store):
+    entry_id = store.add(Entry("Hello World", 2000))
+
+    row = store.recent(1)[0]
+    assert row[0] == entry_id and row[2] == "Hello World" and row[5] == 2
+    assert store.entry_count == len(TEXTS)
+
+
+def test_removed_entries_are_no_longer_found(store):
+    entry_id = store.search("hello")[0][0]
+    store.remove(entry_id)
+
+    assert store.search("hello") == []
+
+
+def test_oldest_entries_are_evicted_first(tmp_path):
+    with ClipboardStore(str(tmp_path / "clipboard.db"), str(tmp_path / "blobs"), max_entries=3) as store:
+        for i, text in enumerate(TEXTS):
+            store.add(Entry(text, 1000 + i))
+
+        assert texts(store.recent(10)) == list(reversed(TEXTS[-3:]))
+        assert store.search("hello") == []
+
+
+def test_large_texts_spill_to_a_blob_and_keep_a_searchable_preview(tmp_path):
+    text = "needle " + "y" * SPILL_THRESHOLD
+    with ClipboardStore(str(tmp_path / "clipboard.db"), str(tmp_path / "blobs")) as store:
+        entry_id = store.add(Entry(text, 1000))
+
+        assert len(store.recent(1)[0][2]) < len(text)
+        assert store.full_text(entry_id) == text
+        assert [row[0] for row in store.search("needle")] == [entry_id]
+
+
+def test_index_is_built_for_an_existing_history_once_supported(tmp_path, monkeypatch):
+    db_path, blob_dir = str(tmp_path / "clipboard.db"), str(tmp_path / "blobs")
+    monkeypatch.setattr(clipboard_store, "TRIGRAM_MIN_SQLITE", (99,))
+    with ClipboardStore(db_path, blob_dir) as store:
+        store.add(Entry("written before the upgrade", 1000))
+    monkeypatch.undo()
+
+    with ClipboardStore(db_path, blob_dir) as store:
+        assert store.has_fts
+        assert texts(store.search("upgrade")) == ["written before the upgrade"]
@@ -0,0 +1,127 @@
+"""ParallelCrawler and index_files: full and incremental walks, early close, cancellation and
+unreadable or vanished directories."""
+import os
+import threading
+import time
+
+import pytest
+
+from app import crawler
+from app.crawler import ParallelCrawler, scan_directory
+from app.file_indexer import index_files
+from app.index_config import IndexConfig, IndexRules
+from app.index_store import IndexStore
+
+
+def make_tree(root, dirs=3, subdirs=3, files=2):
+    for i in range(dirs):
+        for j in range(subdirs):
+            directory = root / f"d{i}" / f"s{j}"
+            directory.mkdir(parents=True)
+            for k in range(files):
+                (directory / f"f{k}.txt").write_text("x" * k)
+
+
+def walked_files(root, **kwargs):
+    dirs, _ = ParallelCrawler(**kwargs).crawl([root])
+    return {os.path.join(dirpath, name) for dirpath, (_, files, _) in dirs.items() for name, _, _ in files}
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_crawl_finds_every_directory_and_file(tmp_path, workers):
+    make_tree(tmp_path)
+    expected = {os.path.join(dirpath, name) for dirpath, _, names in os.walk(tmp_path) for name in names}
+
+    assert walked_files(str(tmp_path), workers=workers) == expected
+
+
+def test_unchanged_directories_are_not_listed_again(tmp_path):
+    make_tree(tmp_path)
+    first, rescanned = ParallelCrawler(workers=2).crawl([str(tmp_path)])
+    previous = {path: (signature, subdirs) for path, (signature, _, subdirs) in first.items()}
+    (tmp_path / "d1" / "s2" / "new.txt").write_text("new")
+
+    second, rescanned = ParallelCrawler(workers=2).crawl([str(tmp_path)], previous)
+
+    assert rescanned == 1
+    assert {name for name, _, _ in second[str(tmp_path / "d1" / "s2")][1]} == {"f0.txt", "f1.txt", "new.txt"}
+    assert second[str(tmp_path / "d0" / "s0")][1] is None
+
+
+def test_closing_the_walk_early_stops_every_worker(tmp_path):
+    make_tree(tmp_path, dirs=10, subdirs=10)
+    before = threading.active_count()
+    walk = ParallelCrawler(workers=4).walk([str(tmp_path)])
+
+    next(walk)
+    walk.close()
+
+    # Workers only notice once they finish the directory they are listing
+    deadline = time.monotonic() + 5
+    while threading.active_count() > before and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert threading.active_count() == before
+
+
+def test_symlinked_directories_are_not_followed_and_broken_links_are_kept(tmp_path):
+    (tmp_path / "real").mkdir()
+    (tmp_path / "real" / "file.txt").write_text("data")
+    os.symlink(tmp_path / "real", tmp_path / "link")
+    os.symlink(tmp_path / "missing", tmp_path / "dangling")
+
+    files, subdirs = scan_directory(str(tmp_path))
+
+    assert [name for name, _ in subdirs] == ["real"]
+    assert ("dangling", 0, 0) in files
+    assert not any(path.startswith(str(tmp_path / "link")) for path in walked_files(str(tmp_path), workers=2))
+
+
+def test_unreadable_and_vanished_directories_are_skipped(tmp_path, monkeypatch):
+    make_tree(tmp_path, dirs=2, subdirs=1)
+    locked = str(tmp_path / "d0" / "s0")
+    real_scandir = os.scandir
+
+    def scandir(path):
+        if str(path) == locked:
+            raise PermissionError(13, "Permission denied", path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(crawler.os, "scandir", scandir)
+    dirs, _ = ParallelCrawler(workers=2).crawl([str(tmp_path), str(tmp_path / "missing")])
+
+    assert dirs[locked][1] == []  # Listed as empty rather than failing the whole walk
+    assert str(tmp_path / "d1" / "s0") in dirs
+    assert str(tmp_path / "missing") not in dirs
+
+
+def test_rules_prune_before_listing(tmp_path):
+    make_tree(tmp_path, dirs=2, subdirs=1)
+    rules = IndexRules([str(tmp_path)], ["d0/", "f1.txt"])
+
+    found = walked_files(str(tmp_path), workers=2, rules=rules)
+
+    assert found == {str(tmp_path / "d1" / "s0" / "f0.txt")}
+
+
+def test_cancelled_pass_keeps_its_rows_and_the_next_pass_completes(tmp_path, monkeypatch):
+    tree = tmp_path / "tree"
+    make_tree(tree)
+    monkeypatch.chdir(tmp_path)
+    config = IndexConfig([str(tree)])
+    assert index_files(config=config, workers=2) == 1
+    (tree / "d2" / "s2" / "f0.txt").unlink()
+
+    polls = []
+
+    def cancel_after_the_root():
+        polls.append(None)
+        return len(polls) > 1
+
+    assert index_files(config=config, workers=2, cancelled=cancel_after_the_root) is None
+    with IndexStore() as store:
+        assert store.file_count() == 18  # Nothing was purged by the cancelled pass
+
+    assert index_files(config=config, workers=2) == 3
+    with IndexStore() as store:
+        assert store.file_count() == 17
+        assert str(tree / "d2" / "s2" / "f0.txt") not in store.search_substring("f0.txt")
@@ -0,0 +1,159 @@
+"""DuplicateFinder over a small indexed tree: grouping by content, hard links, files that only
+share their ends, the hash cache and cancellation."""
+import os
+
+import pytest
+
+from app.duplicate_finder import PARTIAL_BLOCK, DuplicateFinder, HashCache
+from app.index_store import IndexStore
+
+LARGE = 2 * PARTIAL_BLOCK + 4096  # Large enough to need the full hash stage
+
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def index_tree(store, root):
+    store.begin_generation()
+    for dirpath, _, names in os.walk(root):
+        files = [(name, os.path.getsize(os.path.join(dirpath, name)), 0) for name in names]
+        store.record_directory(dirpath, (0, 0), files)
+    store.finish_generation()
+
+
+@pytest.fixture
+def store(tmp_path):
+    with IndexStore(str(tmp_path / "index.db")) as store:
+        yield store
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with HashCache(str(tmp_path / "hashes.db")) as cache:
+        yield cache
+
+
+def find(store, cache, **kwargs):
+    return DuplicateFinder(store, cache, min_size=1, workers=2, **kwargs)
+
+
+def test_identical_files_are_grouped_and_sorted_by_wasted_space(tmp_path, store, cache):
+    tree = tmp_path / "tree"
+    small = [write(tree / name, b"small content") for name in ("a.txt", "b/a.txt", "c/a.txt")]
+    large = [write(tree / name, b"L" * LARGE) for name in ("big1", "sub/big2")]
+    write(tree / "same-size.txt", b"other content")  # Same size as the small ones, other bytes
+    write(tree / "unique", b"u" * 99)
+    index_tree(store, str(tree))
+
+    groups = find(store, cache).find()
+
+    assert [group.paths for group in groups] == [sorted(large), sorted(small)]
+    assert [group.wasted for group in groups] == [LARGE, 2 * len(b"small content")]
+
+
+def test_hard_links_count_as_one_file(tmp_path, store, cache):
+    tree = tmp_path / "tree"
+    original = write(tree / "original", b"x" * 5000)
+    os.link(original, tree / "hard-link")
+    copy = write(tree / "copy", b"x" * 5000)
+    os.link(tree / "copy", tree / "copy-link")
+    index_tree(store, str(tree))
+
+    groups = find(store, cache).find()
+
+    # Each inode is reached through one of its names; the links take no extra space
+    assert len(groups) == 1 and len(groups[0].paths) == 2
+    assert groups[0].wasted == 5000
+    assert {os.stat(path).st_ino for path in groups[0].paths} == {os.stat(original).st_ino, os.stat(copy).st_ino}
+
+
+def test_only_hard_links_are_no_duplicates(tmp_path, store, cache):
+    tree = tmp_path / "tree"
+    original = write(tree / "original", b"x" * 5000)
+    os.link(original, tree / "hard-link")
+    index_tree(store, str(tree))
+
+    assert find(store, cache).find() == []
+
+
+def test_files_that_only_share_their_ends_are_told_apart(tmp_path, store, cache):
+    tree = tmp_path / "tree"
+    ends = b"E" * PARTIAL_BLOCK
+    write(tree / "one", ends + b"1" * 4096 + ends)
+    write(tree / "two", ends + b"2" * 4096 + ends)
+    index_tree(store, str(tree))
+    finder = find(store, cache)
+
+    assert finder.find() == []
+    assert finder.stats["partial_hashed"] == 2 and finder.stats["full_hashed"] == 2
+
+
+def test_second_scan_is_answered_from_the_cache(tmp_path, store, cache):
+    tree = tmp_path / "tree"
+    for name in ("a", "b"):
+        write(tree / name, b"D" * LARGE)
+    index_tree(store, str(tree))
+    first = find(store, cache).find()
+
+    finder = find(store, cache)
+    assert [group.paths for group in finder.find()] == [group.paths for group in first]
+    assert finder.stats["partial_hashed"] == finder.stats["full_hashed"] == finder.stats["bytes_read"] == 0
+    assert finder.stats["cache_hits"] == 4
+
+
+def test_a_modified_file_is_hashed_again(tmp_path, store, cache):
+    tree = tmp_path / "tree"
+    a = write(tree / "a", b"same bytes")
+    write(tree / "b", b"same bytes")
+    index_tree(store, str(tree))
+    assert len(find(store, cache).find()) == 1
+
+    write(tree / "a", b"SAME BYTES")
+    os.utime(a, ns=(os.stat(a).st_atime_ns, os.stat(a).st_mtime_ns + 10**9))
+
+    assert find(store, cache).find() == []
+
+
+def test_deleted_files_are_skipped(tmp_path, store, cache):
+    tree = tmp_path / "tree"
+    paths = [write(tree / name, b"content") for name in ("a", "b", "c")]
+    index_tree(store, str(tree))
+    os.remove(paths[0])
+
+    groups = find(store, cache).find()
+
+    assert [group.paths for group in groups] == [sorted(paths[1:])]
+
+
+def test_cancelling_skips_the_remaining_stages(tmp_path, store, cache):
+    tree = tmp_path / "tree"
+    for i in range(6):
+        write(tree / f"file{i}", b"C" * LARGE)
+    index_tree(store, str(tree))
+    stages = []
+
+    def progress(stage, done, total):
+        stages.append(stage)
+
+    finder = find(store, cache, progress=progress, cancelled=lambda: "partial" in stages)
+    groups = finder.find()
+
+    assert groups == []  # Large files are only confirmed by the full hash, which never ran
+    assert "full" not in stages
+    assert finder.stats["full_hashed"] == 0
+    assert finder.stats["partial_hashed"] == 1
+
+
+def test_progress_reaches_the_total_of_every_stage(tmp_path, store, cache):
+    tree = tmp_path / "tree"
+    for i in range(3):
+        write(tree / f"file{i}", b"P" * LARGE)
+    index_tree(store, str(tree))
+    reports = []
+
+    find(store, cache, progress=lambda stage, done, total: reports.append((stage, done, total))).find()
+
+    assert ("partial", 3, 3) in reports and ("full", 3, 3) in reports
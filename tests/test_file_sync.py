@@ -0,0 +1,68 @@
+"""line_changes against random edits: applying the changes to the old lines must give the new ones."""
+import random
+
+import pytest
+
+from app import file_sync
+from app.file_sync import decode_text, line_changes
+
+
+def apply(old_lines, changes):
+    lines = list(old_lines)
+    for old_start, old_end, replacement in reversed(changes):
+        lines[old_start:old_end] = replacement
+    return lines
+
+
+def random_edit(rng, lines):
+    lines = list(lines)
+    for _ in range(rng.randint(1, 4)):
+        position = rng.randint(0, len(lines))
+        action = rng.choice(["insert", "delete", "replace"])
+        if action == "insert" or not lines:
+            lines[position:position] = [f"new {rng.random():.6f}" for _ in range(rng.randint(1, 3))]
+        elif action == "delete":
+            del lines[position:position + rng.randint(1, 3)]
+        else:
+            lines[position:position + 1] = [f"changed {rng.random():.6f}"]
+    return lines
+
+
+def test_no_changes():
+    assert line_changes(["a", "b"], ["a", "b"]) == []
+
+
+@pytest.mark.parametrize("old, new, expected", [
+    (["a", "b"], ["a", "b", "c"], [(2, 2, ["c"])]),
+    (["a", "b", "c"], ["a", "c"], [(1, 2, [])]),
+    (["a", "b", "c"], ["a", "B", "c"], [(1, 2, ["B"])]),
+    ([], ["a"], [(0, 0, ["a"])]),
+])
+def test_local_edits_are_single_ranges(old, new, expected):
+    assert line_changes(old, new) == expected
+
+
+def test_random_edits_round_trip():
+    rng = random.Random(3)
+    for _ in range(300):
+        old = [f"line {i % 7}" for i in range(rng.randint(0, 30))]
+        new = random_edit(rng, old)
+        changes = line_changes(old, new)
+
+        assert apply(old, changes) == new
+        assert [start for start, _, _ in changes] == sorted(start for start, _, _ in changes)
+
+
+def test_huge_middles_are_replaced_wholesale(monkeypatch):
+    monkeypatch.setattr(file_sync, "MAX_DIFF_LINES", 10)
+    old = ["head"] + [f"old {i}" for i in range(20)] + ["tail"]
+    new = ["head"] + [f"new {i}" for i in range(15)] + ["tail"]
+
+    assert line_changes(old, new) == [(1, 21, new[1:16])]
+
+
+def test_decode_text_normalises_newlines():
+    assert decode_text(b"a\r\nb\r\n", "utf-8") == ("a\nb\n", "\r\n")
+    assert decode_text(b"a\nb", "utf-8") == ("a\nb", "\n")
+    with pytest.raises(UnicodeDecodeError):
+        decode_text(b"\xff\xfe invalid", "utf-8")
@@ -0,0 +1,98 @@
+"""Gitignore-style exclude rules: negation, anchoring and directory-only patterns."""
+import os
+
+import pytest
+
+from app.index_config import IndexRules
+
+ROOT = os.path.join(os.sep, "index", "root")
+
+
+def rules(*exclude, **kwargs):
+    return IndexRules([ROOT], exclude, **kwargs)
+
+
+@pytest.mark.parametrize("exclude", [("*.log", "build/"), ("*.log", "!keep.log", "build/")])
+def test_unanchored_patterns_match_at_any_depth(exclude):
+    # The second set has a negation, so it takes the per-pattern path instead of the merged regex
+    ignore = rules(*exclude)
+
+    assert ignore.skip_file("debug.log")
+    assert ignore.skip_file("a/b/debug.log")
+    assert not ignore.skip_file("debug.log.txt")
+    assert ignore.prune_dir("build", "build")
+    assert ignore.prune_dir("src/build", "build")
+    assert not ignore.prune_dir("builder", "builder")
+
+
+def test_a_slash_anchors_the_pattern_to_the_root():
+    ignore = rules("/out", "docs/*.tmp", "**/cache/")
+
+    assert ignore.prune_dir("out", "out")
+    assert not ignore.prune_dir("src/out", "out")
+    assert ignore.skip_file("docs/draft.tmp")
+    assert not ignore.skip_file("src/docs/draft.tmp")
+    assert not ignore.skip_file("docs/sub/draft.tmp")  # '*' stops at a slash
+    assert ignore.prune_dir("cache", "cache")
+    assert ignore.prune_dir("a/b/cache", "cache")
+
+
+def test_trailing_slash_only_matches_directories():
+    ignore = rules("tmp/")
+
+    assert ignore.prune_dir("tmp", "tmp")
+    assert not ignore.skip_file("tmp")
+    assert not ignore.skip_file("a/tmp")
+
+
+def test_the_last_matching_line_wins():
+    ignore = rules("*.log", "!important.log", "/logs/important.log")
+
+    assert ignore.skip_file("debug.log")
+    assert not ignore.skip_file("important.log")
+    assert not ignore.skip_file("src/important.log")
+    assert ignore.skip_file("logs/important.log")  # Excluded again by the later anchored line
+
+
+def test_negation_cannot_reinclude_files_below_an_excluded_directory():
+    ignore = rules("vendor/", "!vendor/keep.txt")
+
+    # The crawler never lists a pruned directory, so the negated file is never seen
+    assert ignore.prunes_path(os.path.join(ROOT, "vendor", "keep.txt"))
+    assert not ignore.prunes_path(os.path.join(ROOT, "src", "keep.txt"))
+
+
+def test_character_classes_and_negated_classes():
+    ignore = rules("file[0-9].txt", "data[!a-z].bin")
+
+    assert ignore.skip_file("file7.txt")
+    assert not ignore.skip_file("fileA.txt")
+    assert ignore.skip_file("data1.bin")
+    assert not ignore.skip_file("datax.bin")
+
+
+def test_comments_and_blank_lines_are_ignored():
+    ignore = rules("# *.txt", "", "   ", "*.bak")
+
+    assert not ignore.skip_file("notes.txt")
+    assert ignore.skip_file("notes.bak")
+
+
+def test_depth_limit_and_hidden_directories():
+    ignore = rules(max_depth=2, hidden_dirs="exclude", hidden_allow=[".config"])
+
+    assert not ignore.prune_dir("a/b", "b")
+    assert ignore.prune_dir("a/b/c", "c")
+    assert ignore.prune_dir(".secret", ".secret")
+    assert not ignore.prune_dir(".config", ".config")
+
+
+def test_paths_are_matched_relative_to_the_longest_root():
+    nested = os.path.join(ROOT, "nested")
+    ignore = IndexRules([ROOT, nested], ["/skip/"])
+
+    assert ignore.relative(ROOT) == ""
+    assert ignore.relative(os.path.join(nested, "skip")) == "skip"
+    assert ignore.relative(os.path.join(os.sep, "elsewhere")) is None
+    assert ignore.prunes_path(os.path.join(nested, "skip", "file"))
+    assert ignore.prunes_path(os.path.join(os.sep, "elsewhere", "file"))
@@ -0,0 +1,124 @@
+"""IndexStore queries against a brute-force scan of the same names: trigram substring search,
+short terms, prefixes, extensions and the character masks fuzzy search filters on."""
+import os
+import random
+
+import pytest
+
+from app.index_store import IndexStore, char_mask, trigrams
+
+ROOT = os.path.join(os.sep, "data")
+NAMES = [
+    "README.md", "readme.txt", "Makefile", "main.py", "main_window.py", "Main.java", ".bashrc",
+    "a", "ab", "abc", "abcabc", "aaaa", "report 2024.pdf", "Report-2024-final.PDF", "naïve.txt",
+    "ÆRØ.txt", "tab\tname", "dots.in.name.tar.gz", "x" * 40, "__init__.py",
+]
+
+
+def random_names(count, seed=7):
+    rng = random.Random(seed)
+    alphabet = "abcABC_.- 019é"
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 12))) for _ in range(count)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = IndexStore(str(tmp_path / "index.db"))
+    store.begin_generation()
+    names = list(dict.fromkeys(NAMES + random_names(400)))
+    # Half the names live in two directories, so a name maps to several paths
+    store.record_directory(os.path.join(ROOT, "one"), (1, 1), [(name, i, i) for i, name in enumerate(names)])
+    store.record_directory(os.path.join(ROOT, "two"), (2, 2), [(name, 0, 0) for name in names[::2]])
+    store.finish_generation()
+    store.all_paths = [os.path.join(ROOT, "one", name) for name in names] + \
+        [os.path.join(ROOT, "two", name) for name in names[::2]]
+    yield store
+    store.close()
+
+
+def brute_force(store, term):
+    return sorted(path for path in store.all_paths if term.lower() in os.path.basename(path).lower())
+
+
+@pytest.mark.parametrize("term", [
+    "a", "ab", "abc", "ABC", "cab", "main", "MAIN.PY", "readme", "2024", "port 2", ".py", ".tar.gz",
+    "aaa", "aaaa", "aaaaa", "x" * 39, "ïve", "__", "nomatch", "é", "a.b", "-", " ", "\tna",
+])
+def test_substring_search_matches_a_scan(store, term):
+    assert sorted(store.search_substring(term)) == brute_force(store, term)
+
+
+def test_random_terms_match_a_scan(store):
+    for term in random_names(200, seed=11):
+        assert sorted(store.search_substring(term)) == brute_force(store, term), term
+
+
+def test_iter_substring_pages_through_the_same_results(store):
+    pages = list(store.iter_substring("a", batch_size=7))
+
+    assert all(len(page) <= 7 for page in pages)
+    assert sorted(path for page in pages for path in page) == brute_force(store, "a")
+
+
+def test_limit(store):
+    assert len(store.search_substring("a", limit=5)) == 5
+
+
+def test_prefix_and_extension(store):
+    assert sorted(store.search_prefix("MAIN")) == sorted(
+        path for path in store.all_paths if os.path.basename(path).lower().startswith("main"))
+    assert sorted(store.search_extension("PDF")) == sorted(
+        path for path in store.all_paths if path.lower().endswith(".pdf"))
+
+
+def test_trigrams():
+    assert trigrams("abcabc") == ["abc", "bca", "cab"]
+    assert trigrams("ab") == []
+
+
+@pytest.mark.parametrize("term", ["main", "2024", "ïve", "a-b", "x.y", "zz"])
+def test_char_mask_never_filters_out_a_matching_name(store, term):
+    mask = char_mask(term)
+    candidates = {name for _, name in store.names_with_chars(mask)}
+
+    for path in brute_force(store, term):
+        assert os.path.basename(path).lower() in candidates
+
+
+def test_char_mask_bits():
+    assert char_mask("abc") == 0b111
+    assert char_mask("cba cab") == 0b111  # Order, repeats and whitespace do not matter
+    assert char_mask("0") == 1 << 26
+    assert char_mask("z9") == 1 << 25 | 1 << 35
+    assert char_mask("a") & char_mask("ab") == char_mask("a")
+
+
+def test_unchanged_directory_keeps_its_rows_and_stale_ones_are_purged(store):
+    store.begin_generation()
+    store.record_directory(os.path.join(ROOT, "one"), (1, 1), None)
+
+    assert store.finish_generation()
+    assert store.search_substring("makefile") == [os.path.join(ROOT, "one", "Makefile")]
+    assert store.directory_paths() == [os.path.join(ROOT, "one")]
+
+
+def test_update_file_stats(store):
+    path = os.path.join(ROOT, "one", "Makefile")
+
+    assert store.update_file_stats(path, 4096, 1234)
+    assert not store.update_file_stats(os.path.join(ROOT, "one", "missing"), 1, 1)
+    size, = store.conn.execute(
+        "SELECT f.size FROM files f JOIN names n ON n.id = f.name_id WHERE n.name = 'Makefile' "
+        "AND f.dir_id = (SELECT id FROM dirs WHERE path = ?)", (os.path.join(ROOT, "one"),)).fetchone()
+    assert size == 4096
+
+
+def test_rollback_forgets_names_inserted_by_the_discarded_transaction(store):
+    store.begin_generation()
+    store.record_directory(os.path.join(ROOT, "three"), (3, 3), [("brand-new.txt", 1, 1)])
+    store.rollback()
+
+    store.record_directory(os.path.join(ROOT, "three"), (3, 3), [("brand-new.txt", 1, 1)])
+    store.commit()
+
+    assert store.search_substring("brand-new") == [os.path.join(ROOT, "three", "brand-new.txt")]
@@ -0,0 +1,309 @@
+"""Profile discovery and incremental harvesting against fixture profile trees.
+
+Chromium and Firefox layouts are built under tmp_path, with synthetic History and
+places.sqlite databases holding only the tables and columns the providers read.
+"""
+import os
+import sqlite3
+import time
+
+import pytest
+
+from app import url_access
+from app.url_access import (
+    ChromiumHistoryProvider, FirefoxHistoryProvider, chromium_profile_dirs, discover_profiles,
+    firefox_profile_dirs, harvest_browser_histories
+)
+from app.url_cache import UrlCache
+
+WEBKIT_EPOCH_OFFSET = 11644473600
+
+
+def webkit_time(unix_seconds):
+    return int((unix_seconds + WEBKIT_EPOCH_OFFSET) * 1_000_000)
+
+
+def make_chromium_history(path, rows):
+    """rows: (url, unix visit, hidden)"""
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS urls (id INTEGER PRIMARY KEY AUTOINCREMENT, url LONGVARCHAR,"
+                     " last_visit_time INTEGER NOT NULL, hidden INTEGER DEFAULT 0 NOT NULL)")
+        conn.executemany("INSERT INTO urls (url, last_visit_time, hidden) VALUES (?, ?, ?)",
+                         [(url, webkit_time(visit), hidden) for url, visit, hidden in rows])
+    conn.close()
+
+
+def make_firefox_places(path, rows):
+    """rows: (url, unix visit or None)"""
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS moz_places (id INTEGER PRIMARY KEY, url LONGVARCHAR,"
+                     " last_visit_date INTEGER)")
+        conn.executemany("INSERT INTO moz_places (url, last_visit_date) VALUES (?, ?)",
+                         [(url, None if visit is None else int(visit * 1_000_000)) for url, visit in rows])
+    conn.close()
+
+
+def make_chromium_profile(user_data_dir, name, history_rows=None):
+    profile = user_data_dir / name
+    profile.mkdir(parents=True)
+    (profile / "Preferences").write_text("{}")
+    if history_rows is not None:
+        make_chromium_history(profile / "History", history_rows)
+    return profile
+
+
+def make_firefox_profile(firefox_dir, relative_path, places_rows=None):
+    profile = firefox_dir / relative_path
+    profile.mkdir(parents=True)
+    (profile / "prefs.js").write_text("")
+    if places_rows is not None:
+        make_firefox_places(profile / "places.sqlite", places_rows)
+    return profile
+
+
+def touch_later(path):
+    """Move a path's mtime forward, so the change is seen even on coarse-grained file systems."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+
+
+@pytest.fixture(autouse=True)
+def fresh_profile_cache():
+    url_access._profile_cache.clear()
+    yield
+    url_access._profile_cache.clear()
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """An empty home directory with no Windows-style data directories."""
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.delenv("XDG_CONFIG_HOME", raising=False)
+    monkeypatch.delenv("LOCALAPPDATA", raising=False)
+    monkeypatch.delenv("APPDATA", raising=False)
+    return home
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with UrlCache(str(tmp_path / "url_cache.db")) as cache:
+        yield cache
+
+
+# ---- discovery --------------------------------------------------------------------------
+
+def test_chromium_profiles_need_preferences_and_skip_system_profile(tmp_path):
+    make_chromium_profile(tmp_path, "Default")
+    make_chromium_profile(tmp_path, "Profile 1")
+    make_chromium_profile(tmp_path, "System Profile")
+    (tmp_path / "Crashpad").mkdir()
+
+    assert chromium_profile_dirs(tmp_path) == [tmp_path / "Default", tmp_path / "Profile 1"]
+
+
+def test_chromium_profiles_of_missing_directory(tmp_path):
+    assert chromium_profile_dirs(tmp_path / "missing") == []
+
+
+def test_firefox_profiles_from_profiles_ini(tmp_path):
+    firefox_dir = tmp_path / "firefox"
+    relative = make_firefox_profile(firefox_dir, "abcd.default-release")
+    absolute = make_firefox_profile(tmp_path / "elsewhere", "efgh.work")
+    make_firefox_profile(firefox_dir, "unlisted.old")  # Not in profiles.ini, so not a profile
+    (firefox_dir / "profiles.ini").write_text(
+        "[General]\nStartWithLastProfile=1\n\n"
+        "[Profile0]\nName=default-release\nIsRelative=1\nPath=abcd.default-release\n\n"
+        f"[Profile1]\nName=work\nIsRelative=0\nPath={absolute}\n\n"
+        "[Install4F96D1932A9F858E]\nDefault=abcd.default-release\n")
+
+    assert firefox_profile_dirs(firefox_dir) == sorted([relative, absolute])
+
+
+def test_firefox_profiles_without_profiles_ini(tmp_path):
+    firefox_dir = tmp_path / "Firefox"
+    in_profiles = make_firefox_profile(firefox_dir, "Profiles/abcd.default")
+    top_level = make_firefox_profile(firefox_dir, "efgh.default")
+    (firefox_dir / "Crash Reports").mkdir()
+
+    assert firefox_profile_dirs(firefox_dir) == sorted([in_profiles, top_level])
+
+
+def test_discover_profiles_rescans_only_after_changes(tmp_path):
+    make_chromium_profile(tmp_path, "Default")
+    scans = []
+
+    def scan(data_dir):
+        scans.append(data_dir)
+        return chromium_profile_dirs(data_dir)
+
+    assert discover_profiles(tmp_path, scan) == [tmp_path / "Default"]
+    assert discover_profiles(tmp_path, scan) == [tmp_path / "Default"]
+    assert len(scans) == 1
+
+    make_chromium_profile(tmp_path, "Profile 1")
+    touch_later(tmp_path)
+    assert discover_profiles(tmp_path, scan) == [tmp_path / "Default", tmp_path / "Profile 1"]
+    assert len(scans) == 2
+
+
+def test_discover_profiles_watches_profiles_ini(tmp_path):
+    firefox_dir = tmp_path / "firefox"
+    first = make_firefox_profile(firefox_dir, "abcd.first")
+    second = make_firefox_profile(firefox_dir, "efgh.second")
+    ini = firefox_dir / "profiles.ini"
+    ini.write_text("[Profile0]\nIsRelative=1\nPath=abcd.first\n")
+    watched = ("profiles.ini", "Profiles")
+    assert discover_profiles(firefox_dir, firefox_profile_dirs, watched) == [first]
+
+    # Rewriting profiles.ini leaves the directory's own mtime alone
+    ini.write_text("[Profile0]\nIsRelative=1\nPath=abcd.first\n\n[Profile1]\nIsRelative=1\nPath=efgh.second\n")
+    touch_later(ini)
+    assert discover_profiles(firefox_dir, firefox_profile_dirs, watched) == [first, second]
+
+
+def test_discover_profiles_of_missing_directory(tmp_path):
+    assert discover_profiles(tmp_path / "missing", chromium_profile_dirs) == []
+
+
+def test_chromium_history_files_of_every_profile(home):
+    user_data_dir = home / ".config" / "google-chrome"
+    default = make_chromium_profile(user_data_dir, "Default", [])
+    make_chromium_profile(user_data_dir, "Profile 1")  # Never browsed: no History yet
+    second = make_chromium_profile(user_data_dir, "Profile 2", [])
+    provider = ChromiumHistoryProvider("Chrome", linux_dir="google-chrome")
+
+    assert provider.history_files() == [default / "History", second / "History"]
+
+
+def test_firefox_history_files_of_every_profile(home):
+    firefox_dir = home / ".mozilla" / "firefox"
+    first = make_firefox_profile(firefox_dir, "abcd.default", [])
+    second = make_firefox_profile(firefox_dir, "efgh.work", [])
+    (firefox_dir / "profiles.ini").write_text(
+        "[Profile0]\nIsRelative=1\nPath=abcd.default\n\n[Profile1]\nIsRelative=1\nPath=efgh.work\n")
+
+    assert FirefoxHistoryProvider().history_files() == [first / "places.sqlite", second / "places.sqlite"]
+
+
+# ---- harvesting -------------------------------------------------------------------------
+
+def cached_urls(cache):
+    return {url: browser for rows in cache.iter_recent() for url, browser in rows}
+
+
+def test_harvest_every_profile_of_both_browsers(home, cache):
+    now = time.time()
+    chrome_dir = home / ".config" / "google-chrome"
+    make_chromium_profile(chrome_dir, "Default", [("https://a.example/", now - 60, 0),
+                                                  ("https://hidden.example/", now - 60, 1)])
+    make_chromium_profile(chrome_dir, "Profile 1", [("https://b.example/", now - 120, 0)])
+    firefox_dir = home / ".mozilla" / "firefox"
+    make_firefox_profile(firefox_dir, "abcd.default", [("https://c.example/", now - 30),
+                                                       ("https://never-visited.example/", None)])
+    (firefox_dir / "profiles.ini").write_text("[Profile0]\nIsRelative=1\nPath=abcd.default\n")
+    providers = [ChromiumHistoryProvider("Chrome", linux_dir="google-chrome"), FirefoxHistoryProvider()]
+
+    harvested = harvest_browser_histories(cache, providers)
+
+    assert harvested == {"Chrome": 2, "Firefox": 2}
+    assert cached_urls(cache) == {"https://a.example/": "Chrome", "https://b.example/": "Chrome",
+                                  "https://c.example/": "Firefox", "https://never-visited.example/": "Firefox"}
+    assert len(cache.source_marks()) == 3
+
+
+def test_incremental_harvest_follows_the_high_water_mark(home, cache):
+    now = time.time()
+    user_data_dir = home / ".config" / "google-chrome"
+    profile = make_chromium_profile(user_data_dir, "Default", [
+        ("https://old.example/", now - 7200, 0), ("https://revisited.example/", now - 3600, 0)])
+    history = str(profile / "History")
+    providers = [ChromiumHistoryProvider("Chrome", linux_dir="google-chrome")]
+
+    assert harvest_browser_histories(cache, providers) == {"Chrome": 2}
+    signature, high_id, high_visit = cache.source_marks()[history]
+    assert high_id == 2 and high_visit == webkit_time(now - 3600)
+
+    # Unchanged file: skipped without being read
+    assert harvest_browser_histories(cache, providers) == {"Chrome": 0}
+
+    # Only the new row and the revisited one are fetched
+    make_chromium_history(history, [("https://new.example/", now - 60, 0)])
+    with sqlite3.connect(history) as conn:
+        conn.execute("UPDATE urls SET last_visit_time = ? WHERE url = 'https://revisited.example/'",
+                     (webkit_time(now - 10),))
+    conn.close()
+    touch_later(history)
+    batches = []
+    assert harvest_browser_histories(cache, providers, on_batch=lambda browser, rows: batches.extend(rows)) == {
+        "Chrome": 2}
+    assert sorted(url for url, _ in batches) == ["https://new.example/", "https://revisited.example/"]
+    assert cache.source_marks()[history][1:] == (3, webkit_time(now - 10))
+    recent = [url for rows in cache.iter_recent(now - 1800) for url, _ in rows]
+    assert recent == ["https://revisited.example/", "https://new.example/"]
+
+
+def test_cleared_history_is_harvested_from_scratch(home, cache):
+    now = time.time()
+    profile = make_chromium_profile(home / ".config" / "google-chrome", "Default", [
+        (f"https://page{i}.example/", now - 3600, 0) for i in range(5)])
+    history = profile / "History"
+    providers = [ChromiumHistoryProvider("Chrome", linux_dir="google-chrome")]
+    assert harvest_browser_histories(cache, providers) == {"Chrome": 5}
+
+    # The browser cleared its history: ids start over, below the previous high-water mark
+    history.unlink()
+    make_chromium_history(history, [("https://after-clear.example/", now - 3600 * 2, 0)])
+    touch_later(history)
+
+    assert harvest_browser_histories(cache, providers) == {"Chrome": 1}
+    assert "https://after-clear.example/" in cached_urls(cache)
+    assert cache.source_marks()[str(history)][1] == 1
+
+
+def test_cancelled_harvest_keeps_the_previous_mark(home, cache):
+    profile = make_chromium_profile(home / ".config" / "google-chrome", "Default", [
+        ("https://a.example/", time.time(), 0)])
+    providers = [ChromiumHistoryProvider("Chrome", linux_dir="google-chrome")]
+
+    assert harvest_browser_histories(cache, providers, cancelled=lambda: True) == {"Chrome": 0}
+    assert str(profile / "History") not in cache.source_marks()
+    assert harvest_browser_histories(cache, providers) == {"Chrome": 1}
+
+
+def test_harvest_since_passes_on_only_the_window_but_caches_everything(home, cache):
+    now = time.time()
+    make_chromium_profile(home / ".config" / "google-chrome", "Default", [
+        ("https://recent.example/", now - 60, 0), ("https://last-week.example/", now - 86400 * 5, 0)])
+    firefox_dir = home / ".mozilla" / "firefox"
+    make_firefox_profile(firefox_dir, "abcd.default", [("https://today.example/", now - 600),
+                                                       ("https://never-visited.example/", None)])
+    providers = [ChromiumHistoryProvider("Chrome", linux_dir="google-chrome"), FirefoxHistoryProvider()]
+    batches = []
+
+    harvested = harvest_browser_histories(cache, providers, since=now - 86400,
+                                          on_batch=lambda browser, rows: batches.extend(rows))
+
+    assert harvested == {"Chrome": 2, "Firefox": 2}
+    assert sorted(url for url, _ in batches) == ["https://recent.example/", "https://today.example/"]
+    assert len(cached_urls(cache)) == 4
+
+
+def test_wal_database_is_read_in_place(home, cache, monkeypatch):
+    now = time.time()
+    profile = make_firefox_profile(home / ".mozilla" / "firefox", "abcd.default", [])
+    places = str(profile / "places.sqlite")
+    browser = sqlite3.connect(places)  # Stays open, like the browser, so the WAL is kept
+    browser.execute("PRAGMA journal_mode=WAL")
+    browser.execute("INSERT INTO moz_places (url, last_visit_date) VALUES (?, ?)",
+                    ("https://in-wal.example/", int(now * 1_000_000)))
+    browser.commit()
+    copies = []
+    monkeypatch.setattr(url_access, "backup_database", lambda *args: copies.append(args))
+    try:
+        assert harvest_browser_histories(cache, [FirefoxHistoryProvider()]) == {"Firefox": 1}
+    finally:
+        browser.close()
+    assert copies == []
+    assert "https://in-wal.example/" in cached_urls(cache)